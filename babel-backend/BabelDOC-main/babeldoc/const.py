@@ -1,3 +1,5 @@
+import atexit
+import concurrent.futures
 import itertools
 import multiprocessing as mp
 import os
@@ -84,6 +86,69 @@ def close_process_pool():
             _process_pool = None
 
 
+# The pool typesetting and drawing instructions generation share, see
+# TranslationConfig.typesetting_workers
+TYPESETTING_POOL_NAME = "typesetting"
+
+_worker_pools: dict[str, tuple[tuple, concurrent.futures.ProcessPoolExecutor]] = {}
+_worker_pools_lock = threading.Lock()
+
+
+def get_worker_pool(
+    name: str,
+    max_workers: int,
+    initializer=None,
+    initargs: tuple = (),
+) -> concurrent.futures.ProcessPoolExecutor:
+    """A named process pool that is kept alive between calls.
+
+    Its workers, and whatever they have loaded (open documents, the layout
+    model), are reused by later calls in this process. ``initializer`` only
+    runs when the pool is created.
+    """
+    # A forked child inherits the parent's pools, which it cannot use. The
+    # pool keeps initargs alive, so their ids identify them while it exists
+    key = (os.getpid(), max_workers, initializer, tuple(map(id, initargs)))
+    with _worker_pools_lock:
+        entry = _worker_pools.get(name)
+        if entry is None or entry[0] != key:
+            if entry is not None and entry[0][0] == key[0]:
+                entry[1].shutdown(wait=False, cancel_futures=True)
+            pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers, initializer=initializer, initargs=initargs
+            )
+            entry = (key, pool)
+            _worker_pools[name] = entry
+        return entry[1]
+
+
+def split_for_workers(items: list, max_workers: int) -> list[list]:
+    """Split ``items`` into consecutive chunks for a pool of ``max_workers``.
+
+    A few chunks per worker keep them all busy when chunks take unequal time.
+    """
+    if not items:
+        return []
+    num_chunks = min(len(items), max_workers * 4)
+    chunk_size = -(-len(items) // num_chunks)
+    return [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+
+def close_worker_pool(name: str):
+    with _worker_pools_lock:
+        entry = _worker_pools.pop(name, None)
+    if entry is not None and entry[0][0] == os.getpid():
+        entry[1].shutdown(wait=True, cancel_futures=True)
+
+
+def close_worker_pools():
+    for name in list(_worker_pools):
+        close_worker_pool(name)
+
+
+atexit.register(close_worker_pools)
+
+
 def batched(iterable, n, *, strict=False):
     # batched('ABCDEFG', 3) → ABC DEF G
     if n < 1:
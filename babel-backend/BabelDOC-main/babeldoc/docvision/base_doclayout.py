@@ -50,6 +50,11 @@ class DocLayoutModel(abc.ABC):
     def load_available():
         return DocLayoutModel.load_onnx()
 
+    def warm_up(self):  # noqa: B027
+        """
+        Load what the model needs for inference, e.g. in a new worker process.
+        """
+
     @property
     @abc.abstractmethod
     def stride(self) -> int:
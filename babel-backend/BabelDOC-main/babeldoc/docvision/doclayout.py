@@ -1,19 +1,21 @@
 import ast
 import logging
 import platform
+import queue
 import re
 import threading
 from collections.abc import Generator
+from dataclasses import dataclass
 
 import cv2
 import numpy as np
 
 from babeldoc.docvision.base_doclayout import DocLayoutModel
 from babeldoc.docvision.base_doclayout import YoloResult
+from babeldoc.docvision.layout_cache import LayoutCache
 from babeldoc.format.pdf.document_il.utils.mupdf_helper import get_no_rotation_img
 
 try:
-    import onnx
     import onnxruntime
 except ImportError as e:
     if "DLL load failed" in str(e):
@@ -36,27 +38,52 @@ logger = logging.getLogger(__name__)
 os_name = platform.system()
 
 
+# Inference sessions loaded in this process, by model path. Unpickled models
+# (e.g. in pool workers) and later documents reuse them instead of loading the
+# ONNX file again.
+_sessions: dict[str, onnxruntime.InferenceSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def _get_session(model_path: str) -> onnxruntime.InferenceSession:
+    with _sessions_lock:
+        session = _sessions.get(model_path)
+        if session is None:
+            providers = []
+
+            available_providers = onnxruntime.get_available_providers()
+            for provider in available_providers:
+                # disable dml|cuda|
+                # directml/cuda may encounter problems under special circumstances
+                if re.match(r"cpu", provider, re.IGNORECASE):
+                    logger.info(f"Available Provider: {provider}")
+                    providers.append(provider)
+            options = onnxruntime.SessionOptions()
+            # The layout graph is a plain chain of ops: run it on the intra-op
+            # thread pool only, and let those threads sleep between batches so
+            # that they do not compete with page rendering
+            options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+            options.inter_op_num_threads = 1
+            options.add_session_config_entry("session.intra_op.allow_spinning", "0")
+            session = onnxruntime.InferenceSession(
+                model_path, sess_options=options, providers=providers
+            )
+            _sessions[model_path] = session
+        return session
+
+
 class OnnxModel(DocLayoutModel):
+    # Images are letterboxed to fit this size
+    imgsz = 1024
+    # Pages per inference batch in handle_document
+    batch_size = 4
+
     def __init__(self, model_path: str):
         self.model_path = model_path
-
-        model = onnx.load(model_path)
-        metadata = {d.key: d.value for d in model.metadata_props}
+        self.model = _get_session(model_path)
+        metadata = self.model.get_modelmeta().custom_metadata_map
         self._stride = ast.literal_eval(metadata["stride"])
         self._names = ast.literal_eval(metadata["names"])
-        providers = []
-
-        available_providers = onnxruntime.get_available_providers()
-        for provider in available_providers:
-            # disable dml|cuda|
-            # directml/cuda may encounter problems under special circumstances
-            if re.match(r"cpu", provider, re.IGNORECASE):
-                logger.info(f"Available Provider: {provider}")
-                providers.append(provider)
-        self.model = onnxruntime.InferenceSession(
-            model.SerializeToString(),
-            providers=providers,
-        )
         self.lock = threading.Lock()
 
     def __getstate__(self):
@@ -70,7 +97,13 @@ class OnnxModel(DocLayoutModel):
     def __setstate__(self, state):
         self.__dict__.update(state)
         self.lock = threading.Lock()
-        # model is left as None; workers needing it should re-init if necessary.
+        # Reuse the session if this process has already loaded the model,
+        # otherwise it is loaded on first use
+        self.model = _sessions.get(self.model_path)
+
+    def warm_up(self):
+        if self.model is None:
+            self.model = _get_session(self.model_path)
 
     @staticmethod
     def from_pretrained():
@@ -155,14 +188,74 @@ class OnnxModel(DocLayoutModel):
         boxes[..., :4] = (boxes[..., :4] - [pad_x, pad_y, pad_x, pad_y]) / gain
         return boxes
 
+    @property
+    def max_batch_size(self) -> int | None:
+        """The batch size fixed by the model's input, or None if it is dynamic."""
+        self.warm_up()
+        batch_dim = self.model.get_inputs()[0].shape[0]
+        return batch_dim if isinstance(batch_dim, int) and batch_dim > 0 else None
+
+    def preprocess(self, image: np.ndarray) -> np.ndarray:
+        """Letterbox an HWC BGR page image into a normalized CHW float tensor."""
+        pix = self.resize_and_pad_image(image, new_shape=self.imgsz)
+        pix = np.transpose(pix, (2, 0, 1))  # CHW
+        return pix.astype(np.float32) / 255.0  # Normalize to [0, 1]
+
+    def _batches(self, items, batch_size: int, tensor_of):
+        """Group consecutive items whose tensors have the same shape."""
+        if self.max_batch_size is not None:
+            batch_size = min(batch_size, self.max_batch_size)
+        batch = []
+        for item in items:
+            if batch and (
+                len(batch) >= batch_size
+                or tensor_of(batch[0]).shape != tensor_of(item).shape
+            ):
+                yield batch
+                batch = []
+            batch.append(item)
+        if batch:
+            yield batch
+
+    def infer_boxes(self, tensors: list[np.ndarray], orig_shapes: list[tuple]):
+        """Run one batch of preprocessed tensors of the same shape.
+
+        Returns the detected boxes of each image, as rows of x0, y0, x1, y1,
+        conf, cls in the coordinates of the original image.
+        """
+        self.warm_up()
+        batch_input = np.stack(tensors, axis=0)  # BCHW
+        new_h, new_w = batch_input.shape[2:]
+        batch_preds = self.model.run(None, {"images": batch_input})[0]
+
+        results = []
+        for preds, orig_shape in zip(batch_preds, orig_shapes, strict=True):
+            preds = preds[preds[..., 4] > 0.25]
+            if len(preds) > 0:
+                preds[..., :4] = self.scale_boxes(
+                    (new_h, new_w),
+                    preds[..., :4],
+                    orig_shape,
+                )
+            results.append(preds)
+        return results
+
+    def infer(self, tensors: list[np.ndarray], orig_shapes: list[tuple]):
+        """Like infer_boxes, but returns YoloResult objects."""
+        return [
+            YoloResult(boxes_data=preds, names=self._names)
+            for preds in self.infer_boxes(tensors, orig_shapes)
+        ]
+
     def predict(self, image, imgsz=800, batch_size=16, **kwargs):
         """
         Predict the layout of document pages.
 
         Args:
             image: A single image or a list of images of document pages.
-            imgsz: Resize the image to this size. Must be a multiple of the stride.
-            batch_size: Number of images to process in one batch.
+            imgsz: Unused, images are always resized to ``self.imgsz``.
+            batch_size: Number of images to process in one batch. Only
+                consecutive images of the same aspect ratio are batched.
             **kwargs: Additional arguments.
 
         Returns:
@@ -172,51 +265,91 @@ class OnnxModel(DocLayoutModel):
         if isinstance(image, np.ndarray) and len(image.shape) == 3:
             image = [image]
 
-        total_images = len(image)
+        items = [(self.preprocess(img), img.shape[:2]) for img in image]
         results = []
-        batch_size = 1
-
-        # Process images in batches
-        for i in range(0, total_images, batch_size):
-            batch_images = image[i : i + batch_size]
-            batch_size_actual = len(batch_images)
-
-            # Calculate target size based on the maximum height in the batch
-            max_height = max(img.shape[0] for img in batch_images)
-            target_imgsz = 1024
-
-            # Preprocess batch
-            processed_batch = []
-            orig_shapes = []
-            for img in batch_images:
-                orig_h, orig_w = img.shape[:2]
-                orig_shapes.append((orig_h, orig_w))
-
-                pix = self.resize_and_pad_image(img, new_shape=target_imgsz)
-                pix = np.transpose(pix, (2, 0, 1))  # CHW
-                pix = pix.astype(np.float32) / 255.0  # Normalize to [0, 1]
-                processed_batch.append(pix)
-
-            # Stack batch
-            batch_input = np.stack(processed_batch, axis=0)  # BCHW
-            new_h, new_w = batch_input.shape[2:]
-
-            # Run inference
-            batch_preds = self.model.run(None, {"images": batch_input})[0]
-
-            # Process each prediction in the batch
-            for j in range(batch_size_actual):
-                preds = batch_preds[j]
-                preds = preds[preds[..., 4] > 0.25]
-                if len(preds) > 0:
-                    preds[..., :4] = self.scale_boxes(
-                        (new_h, new_w),
-                        preds[..., :4],
-                        orig_shapes[j],
+        for batch in self._batches(items, batch_size, lambda item: item[0]):
+            results.extend(
+                self.infer([t for t, _ in batch], [shape for _, shape in batch])
+            )
+        return results
+
+    def _render_pages(
+        self,
+        pages,
+        mupdf_doc,
+        translate_config,
+        layout_cache: LayoutCache | None,
+        output: queue.Queue,
+        stop: threading.Event,
+    ):
+        """Render pages into ``output``, ending with None.
+
+        Pages found in ``layout_cache`` come with their boxes, the others with
+        their preprocessed tensor. Runs in a background thread until done or
+        ``stop`` is set; an exception is passed on in place of the next page.
+        """
+        try:
+            for page in pages:
+                translate_config.raise_if_cancelled()
+                with self.lock:
+                    # pix = mupdf_doc[page.page_number].get_pixmap(dpi=72)
+                    pix = get_no_rotation_img(mupdf_doc[page.page_number])
+                image = np.frombuffer(pix.samples, np.uint8).reshape(
+                    pix.height,
+                    pix.width,
+                    3,
+                )[:, :, ::-1]
+                rendered = _RenderedPage(page, image)
+                if layout_cache is not None:
+                    rendered.cache_key = layout_cache.page_key(
+                        pix.width, pix.height, pix.samples
                     )
-                results.append(YoloResult(boxes_data=preds, names=self._names))
+                    rendered.boxes = layout_cache.get(rendered.cache_key)
+                if rendered.boxes is None:
+                    rendered.tensor = self.preprocess(image)
+                if not self._put(output, rendered, stop):
+                    return
+            self._put(output, None, stop)
+        except Exception as e:
+            self._put(output, e, stop)
 
-        return results
+    @staticmethod
+    def _put(output: queue.Queue, item, stop: threading.Event) -> bool:
+        """Put ``item`` unless the consumer has gone away."""
+        while not stop.is_set():
+            try:
+                output.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _detect(
+        self,
+        rendered_pages: list["_RenderedPage"],
+        layout_cache: LayoutCache | None,
+        save_debug_image,
+    ):
+        """Run the pages that have no boxes yet through the model, then yield
+        all of them in order."""
+        misses = [rendered for rendered in rendered_pages if rendered.boxes is None]
+        for batch in self._batches(misses, self.batch_size, lambda r: r.tensor):
+            boxes = self.infer_boxes(
+                [rendered.tensor for rendered in batch],
+                [rendered.image.shape[:2] for rendered in batch],
+            )
+            for rendered, page_boxes in zip(batch, boxes, strict=True):
+                rendered.boxes = page_boxes
+                if layout_cache is not None:
+                    layout_cache.set(rendered.cache_key, page_boxes)
+        for rendered in rendered_pages:
+            result = YoloResult(boxes_data=rendered.boxes, names=self._names)
+            save_debug_image(
+                rendered.image,
+                result,
+                rendered.page.page_number + 1,
+            )
+            yield rendered.page, result
 
     def handle_document(
         self,
@@ -227,20 +360,53 @@ class OnnxModel(DocLayoutModel):
     ) -> Generator[
         tuple[babeldoc.format.pdf.document_il.il_version_1.Page, YoloResult], None, None
     ]:
-        for page in pages:
-            translate_config.raise_if_cancelled()
-            with self.lock:
-                # pix = mupdf_doc[page.page_number].get_pixmap(dpi=72)
-                pix = get_no_rotation_img(mupdf_doc[page.page_number])
-            image = np.frombuffer(pix.samples, np.uint8).reshape(
-                pix.height,
-                pix.width,
-                3,
-            )[:, :, ::-1]
-            predict_result = self.predict(image)[0]
-            save_debug_image(
-                image,
-                predict_result,
-                page.page_number + 1,
-            )
-            yield page, predict_result
+        """Detect the layout of ``pages``, in order.
+
+        A background thread renders and preprocesses the next pages while the
+        current batch runs through the model. With
+        ``translate_config.use_layout_cache``, pages whose rendering was seen
+        before by this model are not run through it again.
+        """
+        layout_cache = (
+            LayoutCache(self.model_path, self.imgsz)
+            if translate_config.use_layout_cache
+            else None
+        )
+        rendered = queue.Queue(maxsize=2 * self.batch_size)
+        stop = threading.Event()
+        renderer = threading.Thread(
+            target=self._render_pages,
+            args=(pages, mupdf_doc, translate_config, layout_cache, rendered, stop),
+            name="layout-render",
+            daemon=True,
+        )
+        renderer.start()
+
+        try:
+            pending = []
+            misses = 0
+            while (item := rendered.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                pending.append(item)
+                misses += item.boxes is None
+                # Cached pages are passed on at once, the others once they
+                # fill a batch
+                if misses == 0 or misses >= self.batch_size:
+                    translate_config.raise_if_cancelled()
+                    yield from self._detect(pending, layout_cache, save_debug_image)
+                    pending = []
+                    misses = 0
+            yield from self._detect(pending, layout_cache, save_debug_image)
+        finally:
+            stop.set()
+            renderer.join()
+
+
+@dataclass
+class _RenderedPage:
+    page: babeldoc.format.pdf.document_il.il_version_1.Page
+    image: np.ndarray
+    tensor: np.ndarray | None = None
+    cache_key: str | None = None
+    boxes: np.ndarray | None = None
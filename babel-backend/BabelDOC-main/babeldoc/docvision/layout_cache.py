@@ -0,0 +1,132 @@
+"""Persistent cache of layout detection results, one entry per rendered page.
+
+The key is a hash of the layout model file and the rendered page pixels, i.e.
+exactly what the model sees, so a page is recognised again in a re-exported
+or re-saved version of a book and by every run that uses the same model.
+"""
+
+import hashlib
+import io
+import logging
+import random
+import threading
+from functools import cache
+from pathlib import Path
+
+import numpy as np
+import peewee
+from peewee import SQL
+from peewee import AutoField
+from peewee import BlobField
+from peewee import CharField
+from peewee import Model
+from peewee import SqliteDatabase
+from peewee import fn
+
+from babeldoc.const import CACHE_FOLDER
+
+logger = logging.getLogger(__name__)
+
+# we don't init the database here
+db = SqliteDatabase(None)
+
+# Cleanup configuration
+CLEAN_PROBABILITY = 0.001  # 0.1% chance to trigger cleanup
+MAX_CACHE_ROWS = 200_000  # Keep only the latest 200,000 pages
+
+_cleanup_lock = threading.Lock()
+
+
+class _LayoutCache(Model):
+    id = AutoField()
+    key = CharField(max_length=64)
+    boxes = BlobField()
+
+    class Meta:
+        database = db
+        constraints = [SQL("UNIQUE (key) ON CONFLICT REPLACE")]
+
+
+@cache
+def _file_digest(path: str) -> str:
+    sha256_hash = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for byte_block in iter(lambda: f.read(1024 * 1024), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
+class LayoutCache:
+    """Layout results of one model, by rendered page."""
+
+    def __init__(self, model_path: str, imgsz: int):
+        self.model_key = f"{_file_digest(model_path)}:{imgsz}"
+
+    def page_key(self, width: int, height: int, samples) -> str:
+        """The key of a page rendered to ``samples`` (RGB, ``width`` x ``height``)."""
+        key = hashlib.sha256(f"{self.model_key}:{width}x{height}:".encode())
+        key.update(samples)
+        return key.hexdigest()
+
+    # Since peewee and the underlying sqlite are thread-safe,
+    # get and set operations don't need locks.
+    def get(self, key: str) -> np.ndarray | None:
+        """The cached boxes (rows of x0, y0, x1, y1, conf, cls) of a page."""
+        try:
+            result = _LayoutCache.get_or_none(key=key)
+        except peewee.OperationalError as e:
+            if "database is locked" in str(e):
+                logger.debug("Layout cache is locked")
+                return None
+            raise
+        if result is None:
+            return None
+        return np.load(io.BytesIO(result.boxes), allow_pickle=False)
+
+    def set(self, key: str, boxes: np.ndarray):
+        buffer = io.BytesIO()
+        np.save(buffer, boxes, allow_pickle=False)
+        try:
+            _LayoutCache.create(key=key, boxes=buffer.getvalue())
+            # Trigger cache cleanup with a small probability.
+            if random.random() < CLEAN_PROBABILITY:  # noqa: S311
+                self._cleanup()
+        except peewee.OperationalError as e:
+            if "database is locked" in str(e):
+                logger.debug("Layout cache is locked")
+            else:
+                raise
+
+    def _cleanup(self) -> None:
+        """Remove old entries, keeping only the latest MAX_CACHE_ROWS pages."""
+        if not _cleanup_lock.acquire(blocking=False):
+            return
+        try:
+            max_id = _LayoutCache.select(fn.MAX(_LayoutCache.id)).scalar()
+            if not max_id or max_id <= MAX_CACHE_ROWS:
+                return
+            _LayoutCache.delete().where(
+                _LayoutCache.id <= max_id - MAX_CACHE_ROWS
+            ).execute()
+        finally:
+            _cleanup_lock.release()
+
+
+def init_db(cache_db_path: Path | None = None):
+    if cache_db_path is None:
+        CACHE_FOLDER.mkdir(parents=True, exist_ok=True)
+        cache_db_path = CACHE_FOLDER / "layout_cache.v1.db"
+    logger.debug(f"Initializing layout cache database at {cache_db_path}")
+    if not db.is_closed():
+        db.close()
+    db.init(
+        cache_db_path,
+        pragmas={
+            "journal_mode": "wal",
+            "busy_timeout": 1000,
+        },
+    )
+    db.create_tables([_LayoutCache], safe=True)
+
+
+init_db()
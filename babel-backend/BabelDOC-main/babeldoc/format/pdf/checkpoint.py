@@ -0,0 +1,168 @@
+"""Stage checkpoints for resuming an interrupted translation.
+
+When the working directory is kept (``--working-dir`` or ``--resume``), the IL
+is written to ``checkpoint.il.zst`` in it after every stage that produces it,
+up to and including paragraph translation. A run with ``resume=True`` loads
+it and continues with the next stage; typesetting and PDF generation are
+always redone from the translated IL. In split mode every part has its own
+working directory and checkpoint, and finished parts also store their result
+so that they are not translated again.
+"""
+
+import hashlib
+import json
+import logging
+import pickle
+from pathlib import Path
+
+import pyzstd
+
+from babeldoc.format.pdf import il_cache
+from babeldoc.format.pdf.document_il import il_version_1
+from babeldoc.format.pdf.translation_config import SharedContextCrossSplitPart
+from babeldoc.format.pdf.translation_config import TranslateResult
+from babeldoc.format.pdf.translation_config import TranslationConfig
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = "checkpoint.il.zst"
+PART_RESULT_FILE = "part_result.pkl.zst"
+
+# Shared context carried over from the interrupted run; user glossaries come
+# from the new run's config
+SHARED_CONTEXT_FIELDS = (
+    "first_paragraph",
+    "recent_title_paragraph",
+    "auto_extracted_glossary",
+    "raw_extracted_terms",
+    "auto_enabled_ocr_workaround",
+    "valid_char_count_total",
+    "total_valid_text_token_count",
+)
+
+
+class StageCheckpoint:
+    def __init__(self, translation_config: TranslationConfig):
+        self.translation_config = translation_config
+        self.path = translation_config.get_working_file_path(CHECKPOINT_FILE)
+        self.part_result_path = translation_config.get_working_file_path(
+            PART_RESULT_FILE
+        )
+        # Computed before any stage runs, as stages may change the config
+        self.fingerprint = self._fingerprint()
+
+    @classmethod
+    def for_config(
+        cls, translation_config: TranslationConfig
+    ) -> "StageCheckpoint | None":
+        """The checkpoint of a run, or None if its working dir is temporary."""
+        if not translation_config.keeps_working_dir():
+            return None
+        return cls(translation_config)
+
+    def _fingerprint(self) -> str:
+        config = self.translation_config
+        key = {
+            "parse": il_cache.parse_cache_key(config),
+            "lang_in": config.lang_in,
+            "lang_out": config.lang_out,
+            "translator": str(config.translator),
+            "term_extraction_translator": str(config.term_extraction_translator),
+            "auto_extract_glossary": config.auto_extract_glossary,
+            "skip_translation": config.skip_translation,
+            "custom_system_prompt": config.custom_system_prompt,
+        }
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+    def save(self, stage_name: str, document: il_version_1.Document):
+        """Record that ``stage_name`` finished with ``document`` as its output."""
+        shared_context = self.translation_config.shared_context_cross_split_part
+        il_cache.dump_document(
+            self.path,
+            document,
+            stage=stage_name,
+            fingerprint=self.fingerprint,
+            state=il_cache.get_parse_state(self.translation_config),
+            shared_context={
+                field: getattr(shared_context, field) for field in SHARED_CONTEXT_FIELDS
+            },
+        )
+        logger.debug(f"saved checkpoint after {stage_name} to {self.path}")
+
+    def load(self) -> tuple[str, il_version_1.Document] | None:
+        """Restore the last checkpoint into the config.
+
+        Returns the name of the last finished stage and its IL, or None if
+        there is no usable checkpoint.
+        """
+        if not self.path.exists():
+            logger.info(f"no checkpoint in {self.path.parent}, starting over")
+            return None
+        try:
+            payload = il_cache.load_document(self.path)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            return None
+        if payload["fingerprint"] != self.fingerprint:
+            logger.warning(
+                f"Checkpoint {self.path} was made for another input file or "
+                "settings, starting over"
+            )
+            return None
+        il_cache.restore_parse_state(self.translation_config, payload["state"])
+        shared_context = self.translation_config.shared_context_cross_split_part
+        for field, value in payload["shared_context"].items():
+            setattr(shared_context, field, value)
+        logger.info(
+            f"resuming {self.translation_config.input_file} after {payload['stage']}"
+        )
+        return payload["stage"], payload["document"]
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+        self.part_result_path.unlink(missing_ok=True)
+
+    def save_part_result(
+        self,
+        result: TranslateResult | None,
+        shared_context: SharedContextCrossSplitPart | None,
+    ):
+        """Record the result of a finished split part."""
+        data = pyzstd.compress(
+            pickle.dumps(
+                {
+                    "fingerprint": self.fingerprint,
+                    "result": result,
+                    "shared_context": shared_context,
+                },
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        )
+        temp_path = self.part_result_path.with_suffix(".part")
+        temp_path.write_bytes(data)
+        temp_path.replace(self.part_result_path)
+
+    def load_part_result(
+        self,
+    ) -> tuple[TranslateResult | None, SharedContextCrossSplitPart | None] | None:
+        """The stored result of a finished split part, if its files still exist."""
+        if not self.part_result_path.exists():
+            return None
+        try:
+            # Only read from the working dir of an earlier run of this user
+            payload = pickle.loads(  # noqa: S301
+                pyzstd.decompress(self.part_result_path.read_bytes())
+            )
+        except Exception as e:
+            logger.warning(
+                f"Ignoring unreadable part result {self.part_result_path}: {e}"
+            )
+            return None
+        if payload["fingerprint"] != self.fingerprint:
+            return None
+        result = payload["result"]
+        if result is not None:
+            for path in (result.mono_pdf_path, result.dual_pdf_path):
+                if path is not None and not Path(path).exists():
+                    return None
+        return result, payload["shared_context"]
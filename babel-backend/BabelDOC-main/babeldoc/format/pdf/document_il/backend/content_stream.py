@@ -0,0 +1,119 @@
+"""Writing PDF content streams.
+
+PDFCreater renders the characters, forms, rectangles and curves of a page as
+operators appended to a ContentStreamWriter. The writer keeps them as a list
+of byte strings and joins them once, in :meth:`ContentStreamWriter.tobytes`.
+"""
+
+# Text state for TJ arrays: the numbers in them only correct the glyph
+# advances if there is no character or word spacing and no horizontal scaling
+_TEXT_STATE_RESET = b"0 Tc 0 Tw 100 Tz "
+
+
+class ContentStreamWriter:
+    """
+    The operators of one content stream.
+
+    Consecutive characters with the same graphic state, font and size are
+    shown in one ``q ... BT ... ET Q`` block. In the block, a character on the
+    baseline of the previous one joins that one's ``TJ`` array, behind the
+    number that moves the text position from the end of the previous glyph to
+    the character. This needs the previous glyph's advance; without it, and
+    for vertical text, a character gets its own text matrix, as before.
+    """
+
+    def __init__(self, data: bytes = b""):
+        self._chunks: list[bytes] = [data] if data else []
+        # (graphic state, font id, font size) of the open text block
+        self._text_block: tuple[str | None, str, float] | None = None
+        self._text_state_reset = False
+        # The baseline of the open TJ array, and where the text position is
+        # after its last glyph, None if that glyph's advance is unknown
+        self._array_y: float | None = None
+        self._array_end_x: float | None = None
+
+    def append(self, data: bytes):
+        """Append operators; they close the open text block."""
+        if self._text_block is not None:
+            self._end_text()
+        self._chunks.append(data)
+
+    def show_char(
+        self,
+        graphic_state: str | None,
+        font_id: str,
+        font_size: float,
+        x: float,
+        y: float,
+        code: bytes,
+        advance: float | None = None,
+        vertical: bool = False,
+    ):
+        """Show a character at ``x``, ``y``.
+
+        Args:
+            graphic_state: Operators setting the graphic state of the
+                character, as in ``GraphicState.passthrough_per_char_instruction``.
+            code: The hex string of the glyph, see :func:`hex_code`.
+            advance: The width of the glyph at ``font_size``, if known.
+            vertical: Draw the glyph rotated by 90 degrees, with ``x``, ``y``
+                the bottom right corner of its box.
+        """
+        chunks = self._chunks
+        block = (graphic_state, font_id, font_size)
+        if block != self._text_block:
+            if self._text_block is not None:
+                self._end_text()
+            self._text_block = block
+            self._text_state_reset = advance is not None
+            chunks.append(b"q ")
+            if graphic_state:
+                chunks.append(f"{graphic_state} \n".encode())
+            chunks.append(b"BT ")
+            if self._text_state_reset:
+                chunks.append(_TEXT_STATE_RESET)
+            chunks.append(b"/%s %f Tf " % (font_id.encode(), font_size))
+
+        if vertical:
+            self._end_array()
+            chunks.append(b"0 1 -1 0 %f %f Tm %s Tj " % (x, y, code))
+            return
+        if y == self._array_y and self._array_end_x is not None:
+            # In thousandths of the font size, against the writing direction
+            adjustment = (self._array_end_x - x) * 1000 / font_size
+            if abs(adjustment) >= 0.001:
+                chunks.append(b"%.3f" % adjustment)
+            chunks.append(code)
+        else:
+            self._end_array()
+            chunks.append(b"1 0 0 1 %f %f Tm [" % (x, y))
+            chunks.append(code)
+            self._array_y = y
+        if advance is not None and self._text_state_reset:
+            self._array_end_x = x + advance
+        else:
+            self._array_end_x = None
+
+    def _end_array(self):
+        if self._array_y is not None:
+            self._chunks.append(b"] TJ ")
+            self._array_y = None
+            self._array_end_x = None
+
+    def _end_text(self):
+        self._end_array()
+        self._chunks.append(b"ET Q \n")
+        self._text_block = None
+
+    def tobytes(self) -> bytes:
+        if self._text_block is not None:
+            self._end_text()
+        return b"".join(self._chunks)
+
+
+def hex_code(character_id: int, encoding_length: int) -> bytes:
+    """The PDF hex string of a character code, e.g. ``b"<0041>"``."""
+    # pdf32000-2008 page14:
+    # As hexadecimal data enclosed in angle brackets < >
+    # see 7.3.4.3, "Hexadecimal Strings."
+    return b"<%0*X>" % (encoding_length * 2, character_id)
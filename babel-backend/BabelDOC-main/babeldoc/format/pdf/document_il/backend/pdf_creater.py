@@ -1,3 +1,4 @@
+import concurrent.futures
 import io
 import itertools
 import logging
@@ -12,17 +13,25 @@ from pathlib import Path
 
 import freetype
 import pymupdf
-from bitstring import BitStream
 
 from babeldoc.assets.embedding_assets_metadata import FONT_NAMES
+from babeldoc.const import TYPESETTING_POOL_NAME
+from babeldoc.const import close_worker_pool
+from babeldoc.const import get_worker_pool
+from babeldoc.const import split_for_workers
 from babeldoc.format.pdf.document_il import PdfOriginalPath
+from babeldoc.format.pdf.document_il import binary_codec
 from babeldoc.format.pdf.document_il import il_version_1
+from babeldoc.format.pdf.document_il.backend.content_stream import ContentStreamWriter
+from babeldoc.format.pdf.document_il.backend.content_stream import hex_code
 from babeldoc.format.pdf.document_il.utils.fontmap import FontMapper
+from babeldoc.format.pdf.document_il.utils.fontmap import get_worker_font_mapper
 from babeldoc.format.pdf.document_il.utils.matrix_helper import matrix_to_bytes
-from babeldoc.format.pdf.document_il.utils.zstd_helper import zstd_decompress
+from babeldoc.format.pdf.document_il.utils.zstd_helper import zstd_decompress_bytes
 from babeldoc.format.pdf.translation_config import TranslateResult
 from babeldoc.format.pdf.translation_config import TranslationConfig
 from babeldoc.format.pdf.translation_config import WatermarkOutputMode
+from babeldoc.progress_monitor import RetryableStage
 
 logger = logging.getLogger(__name__)
 
@@ -50,10 +59,10 @@ class RenderUnit(ABC):
     @abstractmethod
     def render(
         self,
-        draw_op: BitStream,
+        draw_op: ContentStreamWriter,
         context: "RenderContext",
     ) -> None:
-        """Render this unit to the draw_op BitStream."""
+        """Render this unit to the draw_op content stream."""
         pass
 
     def get_sort_key(self) -> tuple[int, int]:
@@ -73,7 +82,7 @@ class CharacterRenderUnit(RenderUnit):
         super().__init__(render_order, sub_render_order, char.xobj_id)
         self.char = char
 
-    def render(self, draw_op: BitStream, context: "RenderContext") -> None:
+    def render(self, draw_op: ContentStreamWriter, context: "RenderContext") -> None:
         char = self.char
         if char.char_unicode == "\n":
             return
@@ -97,18 +106,6 @@ class CharacterRenderUnit(RenderUnit):
             elif font_id not in context.available_font_list:
                 return
 
-        draw_op.append(b"q ")
-        context.pdf_creator.render_graphic_state(draw_op, char.pdf_style.graphic_state)
-
-        if char.vertical:
-            draw_op.append(
-                f"BT /{font_id} {char_size:f} Tf 0 1 -1 0 {char.box.x2:f} {char.box.y:f} Tm ".encode(),
-            )
-        else:
-            draw_op.append(
-                f"BT /{font_id} {char_size:f} Tf 1 0 0 1 {char.box.x:f} {char.box.y:f} Tm ".encode(),
-            )
-
         encoding_length = encoding_length_map.get(font_id, None)
         if encoding_length is None:
             if font_id in context.all_encoding_length_map:
@@ -119,10 +116,17 @@ class CharacterRenderUnit(RenderUnit):
                 )
                 return
 
-        draw_op.append(
-            f"<{char.pdf_character_id:0{encoding_length * 2}x}>".upper().encode(),
+        graphic_state = char.pdf_style.graphic_state
+        draw_op.show_char(
+            graphic_state.passthrough_per_char_instruction if graphic_state else None,
+            font_id,
+            char_size,
+            char.box.x2 if char.vertical else char.box.x,
+            char.box.y,
+            hex_code(char.pdf_character_id, encoding_length),
+            context.pdf_creator.glyph_advance(char),
+            char.vertical,
         )
-        draw_op.append(b" Tj ET Q \n")
 
 
 class FormRenderUnit(RenderUnit):
@@ -137,7 +141,7 @@ class FormRenderUnit(RenderUnit):
         super().__init__(render_order, sub_render_order, form.xobj_id)
         self.form = form
 
-    def render(self, draw_op: BitStream, context: "RenderContext") -> None:
+    def render(self, draw_op: ContentStreamWriter, context: "RenderContext") -> None:
         form = self.form
         draw_op.append(b"q ")
 
@@ -229,7 +233,7 @@ class RectangleRenderUnit(RenderUnit):
         self.rectangle = rectangle
         self.line_width = line_width
 
-    def render(self, draw_op: BitStream, context: "RenderContext") -> None:
+    def render(self, draw_op: ContentStreamWriter, context: "RenderContext") -> None:
         rectangle = self.rectangle
         x1 = rectangle.box.x
         y1 = rectangle.box.y
@@ -270,7 +274,7 @@ class CurveRenderUnit(RenderUnit):
         super().__init__(render_order, sub_render_order, curve.xobj_id)
         self.curve = curve
 
-    def render(self, draw_op: BitStream, context: "RenderContext") -> None:
+    def render(self, draw_op: ContentStreamWriter, context: "RenderContext") -> None:
         curve = self.curve
         draw_op.append(b"q n ")
 
@@ -300,7 +304,7 @@ class CurveRenderUnit(RenderUnit):
         )
 
         draw_op.append(b" ")
-        path_op = BitStream(b" ")
+        path_ops = [b" "]
 
         # Use original path if available, otherwise fall back to transformed path
         path_to_use = (
@@ -312,9 +316,10 @@ class CurveRenderUnit(RenderUnit):
             if isinstance(path, PdfOriginalPath):
                 path = path.pdf_path
             if path.has_xy:
-                path_op.append(f"{path.x:F} {path.y:F} {path.op} ".encode())
+                path_ops.append(f"{path.x:F} {path.y:F} {path.op} ".encode())
             else:
-                path_op.append(f"{path.op} ".encode())
+                path_ops.append(f"{path.op} ".encode())
+        path_op = b"".join(path_ops)
 
         if curve.fill_background:
             draw_op.append(path_op)
@@ -560,17 +565,18 @@ class PDFCreater:
         document: il_version_1.Document,
         translation_config: TranslationConfig,
         mediabox_data: dict,
+        font_mapper: FontMapper | None = None,
     ):
         self.original_pdf_path = original_pdf_path
         self.docs = document
         self.font_path = translation_config.font
-        self.font_mapper = FontMapper(translation_config)
+        self.font_mapper = font_mapper or FontMapper(translation_config)
         self.translation_config = translation_config
         self.mediabox_data = mediabox_data
 
     def render_graphic_state(
         self,
-        draw_op: BitStream,
+        draw_op: ContentStreamWriter,
         graphic_state: il_version_1.GraphicState,
     ):
         if graphic_state is None:
@@ -604,6 +610,19 @@ class PDFCreater:
                 f"{graphic_state.passthrough_per_char_instruction} \n".encode(),
             )
 
+    def glyph_advance(self, char: il_version_1.PdfCharacter) -> float | None:
+        """The width of a character in one of the fonts added by the font mapper.
+
+        None for the fonts of the original PDF, whose widths are not known here.
+        """
+        font = self.font_mapper.fontid2font.get(char.pdf_style.font_id)
+        if font is None or not char.char_unicode or len(char.char_unicode) != 1:
+            return None
+        # The typesetter uses the glyph of the unicode character
+        if font.has_glyph(ord(char.char_unicode)) != char.pdf_character_id:
+            return None
+        return font.char_lengths(char.char_unicode, char.pdf_style.font_size)[0]
+
     def render_paragraph_to_char(
         self,
         paragraph: il_version_1.PdfParagraph,
@@ -752,8 +771,8 @@ class PDFCreater:
         self,
         render_units: list[RenderUnit],
         context: RenderContext,
-        page_op: BitStream,
-        xobj_draw_ops: dict[str, BitStream],
+        page_op: ContentStreamWriter,
+        xobj_draw_ops: dict[str, ContentStreamWriter],
     ) -> None:
         """Render sorted render units to appropriate draw streams."""
         # Sort render units by (render_order, sub_render_order)
@@ -801,14 +820,14 @@ class PDFCreater:
 
     def _render_rectangle(
         self,
-        draw_op: BitStream,
+        draw_op: ContentStreamWriter,
         rectangle: il_version_1.PdfRectangle,
         line_width: float = 0.4,
     ):
         """Draw a rectangle in PDF for visualization purposes.
 
         Args:
-            draw_op: BitStream to append PDF drawing operations
+            draw_op: Content stream to append PDF drawing operations
             rectangle: Rectangle object containing position information
             line_width: Line width
         """
@@ -972,7 +991,7 @@ class PDFCreater:
             page_encoding_length_map = {
                 f.font_id: f.encoding_length for f in page.pdf_font
             }
-            page_op = BitStream()
+            page_op = ContentStreamWriter()
             # q {ops_base}Q 1 0 0 1 {x0} {y0} cm {ops_new}
             page_op.append(b"q ")
             if base_op is not None:
@@ -1007,26 +1026,20 @@ class PDFCreater:
                 draw_op = page_op
                 encoding_length_map = page_encoding_length_map
 
-                draw_op.append(b"q ")
-                self.render_graphic_state(draw_op, char.pdf_style.graphic_state)
-                if char.vertical:
-                    draw_op.append(
-                        f"BT /{font_id} {char_size:f} Tf 0 1 -1 0 {char.box.x2:f} {char.box.y:f} Tm ".encode(),
-                    )
-                else:
-                    draw_op.append(
-                        f"BT /{font_id} {char_size:f} Tf 1 0 0 1 {char.box.x:f} {char.box.y:f} Tm ".encode(),
-                    )
-
                 encoding_length = encoding_length_map[font_id]
-                # pdf32000-2008 page14:
-                # As hexadecimal data enclosed in angle brackets < >
-                # see 7.3.4.3, "Hexadecimal Strings."
-                draw_op.append(
-                    f"<{char.pdf_character_id:0{encoding_length * 2}x}>".upper().encode(),
+                graphic_state = char.pdf_style.graphic_state
+                draw_op.show_char(
+                    graphic_state.passthrough_per_char_instruction
+                    if graphic_state
+                    else None,
+                    font_id,
+                    char_size,
+                    char.box.x2 if char.vertical else char.box.x,
+                    char.box.y,
+                    hex_code(char.pdf_character_id, encoding_length),
+                    self.glyph_advance(char),
+                    char.vertical,
                 )
-
-                draw_op.append(b" Tj ET Q \n")
             for rect in page.pdf_rectangle:
                 if not rect.debug_info:
                     continue
@@ -1288,11 +1301,9 @@ class PDFCreater:
                 self.stage_name,
                 len(self.docs.page),
             ) as pbar:
-                for page in self.docs.page:
-                    self.update_page_content_stream(
-                        check_font_exists, page, pdf, translation_config
-                    )
-                    pbar.advance()
+                self.update_content_streams(
+                    check_font_exists, pdf, translation_config, pbar
+                )
             translation_config.raise_if_cancelled()
             gc_level = 1
             if self.translation_config.ocr_workaround:
@@ -1455,6 +1466,50 @@ class PDFCreater:
     def update_page_content_stream(
         self, check_font_exists, page, pdf, translation_config, skip_char: bool = False
     ):
+        translation_config.raise_if_cancelled()
+        available_font_list, xobj_available_fonts = self.get_page_available_fonts(
+            pdf, page
+        )
+        xobj_streams, page_stream = self.render_page_content_stream(
+            check_font_exists,
+            page,
+            available_font_list,
+            xobj_available_fonts,
+            translation_config,
+            skip_char,
+        )
+        self.set_page_content_stream(pdf, page, xobj_streams, page_stream)
+
+    def get_page_available_fonts(
+        self, pdf, page: il_version_1.Page
+    ) -> tuple[set[str], dict[str, set[str]]]:
+        """The fonts in the resources of the page and of each of its xobjects."""
+        available_font_list = self.get_available_font_list(pdf, page)
+        xobj_available_fonts = {}
+        for xobj in page.pdf_xobject:
+            xobj_available_fonts[xobj.xobj_id] = available_font_list.copy()
+            try:
+                xobj_available_fonts[xobj.xobj_id].update(
+                    self.get_xobj_available_fonts(xobj.xref_id, pdf),
+                )
+            except Exception:
+                pass
+        return available_font_list, xobj_available_fonts
+
+    def render_page_content_stream(
+        self,
+        check_font_exists: bool,
+        page: il_version_1.Page,
+        available_font_list: set[str],
+        xobj_available_fonts: dict[str, set[str]],
+        translation_config: TranslationConfig,
+        skip_char: bool = False,
+    ) -> tuple[dict[int, bytes], bytes]:
+        """Render the drawing instructions of a page without touching the PDF.
+
+        Returns:
+            The new content stream of each xobject by xref, and the page's.
+        """
         assert page.cropbox is not None and page.cropbox.box is not None
         page_crop_box = page.cropbox.box
         ctm_for_ops = (
@@ -1466,39 +1521,27 @@ class PDFCreater:
             -page_crop_box.y,
         )
         ctm_for_ops = f" {' '.join(f'{x:f}' for x in ctm_for_ops)} cm ".encode()
-        translation_config.raise_if_cancelled()
-        xobj_available_fonts = {}
         xobj_draw_ops = {}
         xobj_encoding_length_map = {}
-        available_font_list = self.get_available_font_list(pdf, page)
         page_encoding_length_map: dict[str | None, int | None] = {
             f.font_id: f.encoding_length for f in page.pdf_font
         }
         all_encoding_length_map = page_encoding_length_map.copy()
         for xobj in page.pdf_xobject:
-            xobj_available_fonts[xobj.xobj_id] = available_font_list.copy()
-            try:
-                xobj_available_fonts[xobj.xobj_id].update(
-                    self.get_xobj_available_fonts(xobj.xref_id, pdf),
-                )
-            except Exception:
-                pass
             xobj_encoding_length_map[xobj.xobj_id] = {
                 f.font_id: f.encoding_length for f in xobj.pdf_font
             }
             all_encoding_length_map.update(xobj_encoding_length_map[xobj.xobj_id])
             xobj_encoding_length_map[xobj.xobj_id].update(page_encoding_length_map)
-            xobj_op = BitStream()
-            base_op = xobj.base_operations.value
-            base_op = zstd_decompress(base_op)
-            xobj_op.append(base_op.encode())
-            xobj_draw_ops[xobj.xobj_id] = xobj_op
-        page_op = BitStream()
+            xobj_draw_ops[xobj.xobj_id] = ContentStreamWriter(
+                zstd_decompress_bytes(xobj.base_operations.value)
+            )
+        page_op = ContentStreamWriter()
         # q {ops_base}Q 1 0 0 1 {x0} {y0} cm {ops_new}
         # page_op.append(b"q ")
         # base_op = page.base_operations.value
-        # base_op = zstd_decompress(base_op)
-        # page_op.append(base_op.encode())
+        # base_op = zstd_decompress_bytes(base_op)
+        # page_op.append(base_op)
         # page_op.append(b" \n")
         page_op.append(ctm_for_ops)
         page_op.append(b" \n")
@@ -1524,17 +1567,127 @@ class PDFCreater:
             ]
         # Render all units to their appropriate streams
         self.render_units_to_stream(render_units, context, page_op, xobj_draw_ops)
+        xobj_streams = {
+            xobj.xref_id: xobj_draw_ops[xobj.xobj_id].tobytes()
+            for xobj in page.pdf_xobject
+        }
+        return xobj_streams, page_op.tobytes()
+
+    def set_page_content_stream(
+        self,
+        pdf,
+        page: il_version_1.Page,
+        xobj_streams: dict[int, bytes],
+        page_stream: bytes,
+    ):
         # Update xobject streams
-        for xobj in page.pdf_xobject:
-            draw_op = xobj_draw_ops[xobj.xobj_id]
+        for xref_id, xobj_stream in xobj_streams.items():
             try:
-                pdf.update_stream(xobj.xref_id, draw_op.tobytes())
+                pdf.update_stream(xref_id, xobj_stream)
             except Exception:
-                logger.warning(f"update xref {xobj.xref_id} stream fail, continue")
-        draw_op = page_op
+                logger.warning(f"update xref {xref_id} stream fail, continue")
         op_container = pdf.get_new_xref()
         # Since this is a draw instruction container,
         # no additional information is needed
         pdf.update_object(op_container, "<<>>")
-        pdf.update_stream(op_container, draw_op.tobytes())
+        pdf.update_stream(op_container, page_stream)
         pdf[page.page_number].set_contents(op_container)
+
+    def update_content_streams(
+        self,
+        check_font_exists: bool,
+        pdf,
+        translation_config: TranslationConfig,
+        pbar,
+    ):
+        """Render the content streams of all pages.
+
+        Uses the typesetting pool when typesetting_workers allows it, and
+        falls back to rendering here if the pool breaks.
+        """
+        workers = translation_config.typesetting_workers or 1
+        if workers > 1 and len(self.docs.page) > 1:
+            # Pages the pool already counted are not counted again on fallback
+            pbar = RetryableStage(pbar)
+            try:
+                self.update_content_streams_in_pool(
+                    check_font_exists, pdf, translation_config, workers, pbar
+                )
+                return
+            except concurrent.futures.BrokenExecutor as e:
+                close_worker_pool(TYPESETTING_POOL_NAME)
+                logger.warning(
+                    f"Parallel drawing instructions failed, falling back to serial: {e}"
+                )
+                pbar.restart()
+        for page in self.docs.page:
+            self.update_page_content_stream(
+                check_font_exists, page, pdf, translation_config
+            )
+            pbar.advance()
+
+    def update_content_streams_in_pool(
+        self,
+        check_font_exists: bool,
+        pdf,
+        translation_config: TranslationConfig,
+        workers: int,
+        pbar,
+    ):
+        """Render the content streams of all pages in the typesetting pool.
+
+        The workers only get the pages and their available fonts; the PDF is
+        updated here.
+        """
+        executor = get_worker_pool(TYPESETTING_POOL_NAME, workers)
+        chunks = split_for_workers(self.docs.page, workers)
+        futures = [
+            executor.submit(
+                _render_content_streams_worker,
+                translation_config,
+                binary_codec.encode_list(il_version_1.Page, chunk),
+                [self.get_page_available_fonts(pdf, page) for page in chunk],
+                check_font_exists,
+            )
+            for chunk in chunks
+        ]
+        try:
+            for chunk, future in zip(chunks, futures, strict=True):
+                streams = future.result()
+                translation_config.raise_if_cancelled()
+                for page, (xobj_streams, page_stream) in zip(
+                    chunk, streams, strict=True
+                ):
+                    self.set_page_content_stream(pdf, page, xobj_streams, page_stream)
+                pbar.advance(len(chunk))
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def _render_content_streams_worker(
+    translation_config: TranslationConfig,
+    pages_data: bytes,
+    available_fonts: list[tuple[set[str], dict[str, set[str]]]],
+    check_font_exists: bool,
+) -> list[tuple[dict[int, bytes], bytes]]:
+    """Worker function rendering the content streams of some pages."""
+    pdf_creater = PDFCreater(
+        None,
+        None,
+        translation_config,
+        None,
+        font_mapper=get_worker_font_mapper(translation_config),
+    )
+    return [
+        pdf_creater.render_page_content_stream(
+            check_font_exists,
+            page,
+            available_font_list,
+            xobj_available_fonts,
+            translation_config,
+        )
+        for page, (available_font_list, xobj_available_fonts) in zip(
+            binary_codec.decode(pages_data), available_fonts, strict=True
+        )
+    ]
@@ -0,0 +1,234 @@
+"""Compact binary serialization of il_version_1 objects.
+
+Objects are packed with msgpack by schema instead of by name: a list of IL
+dataclasses is stored column by column, one column per field, with nested
+dataclasses split into columns recursively. The boxes, char ids and render
+orders of the millions of PdfCharacter in a large book thus become a few
+flat float64/int64 arrays, which are small and compress well with zstd.
+
+Files written by :func:`write_document` are zstd-compressed; :func:`encode`
+and :func:`decode` give the uncompressed bytes, e.g. for sending pages
+between processes.
+"""
+
+import dataclasses
+import hashlib
+import sys
+import types
+import typing
+from array import array
+from pathlib import Path
+
+import msgpack
+import pyzstd
+
+from babeldoc.format.pdf.document_il import il_version_1
+
+FORMAT_VERSION = 1
+
+# msgpack extension types of packed columns
+_FLOAT_COLUMN = 1
+_INT_COLUMN = 2
+
+# Field kinds
+_VALUE = 0
+_OBJECT = 1
+_OBJECTS = 2
+_VALUES = 3
+
+# PDFs map glyphs to lone surrogates, which strict UTF-8 cannot encode
+_UNICODE_ERRORS = "surrogatepass"
+
+_schemas: dict[type, list[tuple[str, int, type | None]]] = {}
+
+
+def _field_kind(field_type) -> tuple[int, type | None]:
+    if typing.get_origin(field_type) in (typing.Union, types.UnionType):
+        (field_type,) = [
+            arg for arg in typing.get_args(field_type) if arg is not type(None)
+        ]
+    if typing.get_origin(field_type) is list:
+        (item_type,) = typing.get_args(field_type)
+        if dataclasses.is_dataclass(item_type):
+            return _OBJECTS, item_type
+        return _VALUES, None
+    if dataclasses.is_dataclass(field_type):
+        return _OBJECT, field_type
+    return _VALUE, None
+
+
+def _schema(cls: type) -> list[tuple[str, int, type | None]]:
+    schema = _schemas.get(cls)
+    if schema is None:
+        schema = [
+            (field.name, *_field_kind(field.type)) for field in dataclasses.fields(cls)
+        ]
+        _schemas[cls] = schema
+    return schema
+
+
+def _schema_hash() -> str:
+    """Changes whenever a field of an IL class is added, removed or renamed."""
+    names = []
+    for name, cls in sorted(vars(il_version_1).items()):
+        if isinstance(cls, type) and dataclasses.is_dataclass(cls):
+            names.append(f"{name}:{','.join(f[0] for f in _schema(cls))}")
+    return hashlib.sha256(";".join(names).encode()).hexdigest()[:16]
+
+
+SCHEMA_HASH = _schema_hash()
+
+
+def _pack_array(typecode: str, values: list) -> bytes:
+    packed = array(typecode, values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _pack_values(values: list):
+    """A column of plain values, as a packed array if they are all floats or ints."""
+    if not values:
+        return values
+    if all(isinstance(value, float) for value in values):
+        return msgpack.ExtType(_FLOAT_COLUMN, _pack_array("d", values))
+    if all(type(value) is int for value in values):
+        try:
+            return msgpack.ExtType(_INT_COLUMN, _pack_array("q", values))
+        except OverflowError:
+            pass
+    return values
+
+
+def _ext_hook(code: int, data: bytes):
+    if code == _FLOAT_COLUMN:
+        unpacked = array("d")
+    elif code == _INT_COLUMN:
+        unpacked = array("q")
+    else:
+        return msgpack.ExtType(code, data)
+    unpacked.frombytes(data)
+    if sys.byteorder == "big":
+        unpacked.byteswap()
+    return unpacked.tolist()
+
+
+def _default(value):
+    # numpy scalars end up in ctm and relocation_transform
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"cannot serialize {type(value)}")
+
+
+def _encode_objects(cls: type, objects: list) -> list:
+    columns = []
+    for name, kind, item_cls in _schema(cls):
+        values = [getattr(obj, name) for obj in objects]
+        if kind == _VALUE:
+            columns.append(_pack_values(values))
+        elif kind == _OBJECT:
+            present = [value for value in values if value is not None]
+            mask = (
+                None
+                if len(present) == len(values)
+                else bytes(value is not None for value in values)
+            )
+            columns.append([mask, _encode_objects(item_cls, present)])
+        else:
+            # -1 marks a None list
+            lengths = [-1 if value is None else len(value) for value in values]
+            flat = [item for value in values if value for item in value]
+            if kind == _OBJECTS:
+                items = _encode_objects(item_cls, flat)
+            else:
+                items = _pack_values(flat)
+            columns.append([_pack_values(lengths), items])
+    return [len(objects), columns]
+
+
+def _decode_objects(cls: type, data: list) -> list:
+    count, columns = data
+    decoded = []
+    for (_, kind, item_cls), column in zip(_schema(cls), columns, strict=True):
+        if kind == _VALUE:
+            decoded.append(column)
+        elif kind == _OBJECT:
+            mask, items = column
+            objects = _decode_objects(item_cls, items)
+            if mask is not None:
+                present = iter(objects)
+                objects = [next(present) if flag else None for flag in mask]
+            decoded.append(objects)
+        else:
+            lengths, items = column
+            if kind == _OBJECTS:
+                flat = _decode_objects(item_cls, items)
+            else:
+                flat = items
+            values = []
+            position = 0
+            for length in lengths:
+                if length < 0:
+                    values.append(None)
+                else:
+                    values.append(flat[position : position + length])
+                    position += length
+            decoded.append(values)
+    return [cls(*row) for row in zip(*decoded, strict=True)] if count else []
+
+
+def encode_list(cls: type, objects: list) -> bytes:
+    """Pack a list of IL objects of type ``cls``."""
+    return msgpack.packb(
+        [
+            FORMAT_VERSION,
+            SCHEMA_HASH,
+            cls.__name__,
+            True,
+            _encode_objects(cls, objects),
+        ],
+        use_bin_type=True,
+        default=_default,
+        unicode_errors=_UNICODE_ERRORS,
+    )
+
+
+def encode(obj) -> bytes:
+    """Pack a single IL object, usually an ``il_version_1.Document``."""
+    cls = type(obj)
+    return msgpack.packb(
+        [FORMAT_VERSION, SCHEMA_HASH, cls.__name__, False, _encode_objects(cls, [obj])],
+        use_bin_type=True,
+        default=_default,
+        unicode_errors=_UNICODE_ERRORS,
+    )
+
+
+def decode(data: bytes):
+    """Unpack what :func:`encode` or :func:`encode_list` produced.
+
+    Raises:
+        ValueError: If the data was written by another format or IL schema.
+    """
+    version, schema_hash, class_name, is_list, payload = msgpack.unpackb(
+        data,
+        ext_hook=_ext_hook,
+        raw=False,
+        strict_map_key=False,
+        unicode_errors=_UNICODE_ERRORS,
+    )
+    if version != FORMAT_VERSION or schema_hash != SCHEMA_HASH:
+        raise ValueError(
+            f"IL data of format {version}/{schema_hash} cannot be read by "
+            f"format {FORMAT_VERSION}/{SCHEMA_HASH}"
+        )
+    objects = _decode_objects(getattr(il_version_1, class_name), payload)
+    return objects if is_list else objects[0]
+
+
+def write_document(document: il_version_1.Document, path: str | Path, level: int = 3):
+    Path(path).write_bytes(pyzstd.compress(encode(document), level_or_option=level))
+
+
+def read_document(path: str | Path) -> il_version_1.Document:
+    return decode(pyzstd.decompress(Path(path).read_bytes()))
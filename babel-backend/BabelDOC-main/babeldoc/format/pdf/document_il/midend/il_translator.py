@@ -224,6 +224,9 @@ class DocumentTranslateTracker:
                 "multi_paragraph_index": getattr(para, "multi_paragraph_index", None),
                 "original_placeholders": original_placeholders,
                 "removed_hallucinated_placeholders": removed_hallucinated_placeholders,
+                "translation_memory_hit": getattr(
+                    para, "translation_memory_hit", False
+                ),
             }
             paragraphs.append(
                 paragraph_json,
@@ -268,6 +271,9 @@ class ParagraphTranslateTracker:
     def record_multi_paragraph_index(self, index):
         self.multi_paragraph_index = index
 
+    def record_translation_memory_hit(self):
+        self.translation_memory_hit = True
+
     def set_output(self, output: str):
         self.output = output
 
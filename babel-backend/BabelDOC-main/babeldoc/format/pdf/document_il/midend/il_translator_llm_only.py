@@ -1,3 +1,4 @@
+import asyncio
 import copy
 import json
 import logging
@@ -31,7 +32,9 @@ from babeldoc.format.pdf.document_il.utils.paragraph_helper import (
     is_pure_numeric_paragraph,
 )
 from babeldoc.format.pdf.translation_config import TranslationConfig
+from babeldoc.translator.cache import TranslationMemory
 from babeldoc.translator.translator import BaseTranslator
+from babeldoc.utils.async_priority_executor import AsyncPriorityExecutor
 from babeldoc.utils.priority_thread_pool_executor import PriorityThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
@@ -107,6 +110,31 @@ class BatchParagraph:
         self.trackers = [page_tracker.new_paragraph() for _ in paragraphs]
 
 
+class LLMTranslateBatch:
+    """The state of one LLM request translating a BatchParagraph."""
+
+    def __init__(
+        self,
+        batch_paragraph: BatchParagraph,
+        page_font_map: dict[str, PdfFont] | None,
+        xobj_font_map: dict[int, dict[str, PdfFont]] | None,
+        title_paragraph: PdfParagraph | None,
+        local_title_paragraph: PdfParagraph | None,
+        fallback_executor: PriorityThreadPoolExecutor | None,
+    ):
+        self.batch_paragraph = batch_paragraph
+        self.page_font_map = page_font_map
+        self.xobj_font_map = xobj_font_map
+        self.title_paragraph = title_paragraph
+        self.local_title_paragraph = local_title_paragraph
+        self.fallback_executor = fallback_executor
+        self.inputs = []
+        self.llm_translate_trackers = []
+        self.paragraph_unicodes = []
+        self.should_translate_paragraph = []
+        self.recalled_paragraph = []
+
+
 class ILTranslatorLLMOnly:
     stage_name = "Translate Paragraphs"
 
@@ -146,9 +174,17 @@ class ILTranslatorLLMOnly:
         except NotImplementedError as e:
             raise ValueError("LLM translator not supported") from e
 
+        # Reuse translations of paragraphs seen in other batches and runs
+        self.translation_memory = (
+            None
+            if translate_engine.ignore_cache
+            else TranslationMemory(translate_engine)
+        )
+
         self.ok_count = 0
         self.fallback_count = 0
         self.total_count = 0
+        self.translation_memory_hit_count = 0
 
     def calc_token_count(self, text: str) -> int:
         try:
@@ -173,8 +209,102 @@ class ILTranslatorLLMOnly:
         return None
 
     def translate(self, docs: Document) -> None:
-        self.il_translator.docs = docs
         tracker = DocumentTranslateTracker()
+        total = self._prepare_translate(docs)
+        translated_ids = set()
+        with self.translation_config.progress_monitor.stage_start(
+            self.stage_name,
+            total,
+        ) as pbar:
+            with PriorityThreadPoolExecutor(
+                max_workers=self.translation_config.pool_max_workers,
+            ) as executor2:
+                with PriorityThreadPoolExecutor(
+                    max_workers=self.translation_config.pool_max_workers,
+                ) as executor:
+                    self._submit_document(
+                        docs, executor, pbar, tracker, executor2, translated_ids
+                    )
+
+        self._finish_translate(tracker)
+
+    async def atranslate(self, docs: Document) -> None:
+        """Like translate, but runs the LLM requests as asyncio tasks.
+
+        Up to ``translation_config.max_concurrent_requests`` requests are in
+        flight at once from the calling thread, instead of one thread per
+        request. Falling back to simple translation still uses threads.
+        """
+        tracker = DocumentTranslateTracker()
+        total = self._prepare_translate(docs)
+        translated_ids = set()
+        try:
+            with self.translation_config.progress_monitor.stage_start(
+                self.stage_name,
+                total,
+            ) as pbar:
+                with PriorityThreadPoolExecutor(
+                    max_workers=self.translation_config.pool_max_workers,
+                ) as executor2:
+                    async with AsyncPriorityExecutor(
+                        self.translation_config.max_concurrent_requests,
+                    ) as executor:
+                        self._submit_document(
+                            docs, executor, pbar, tracker, executor2, translated_ids
+                        )
+        finally:
+            await self.translate_engine.aclose()
+
+        self._finish_translate(tracker)
+
+    def _submit_document(
+        self,
+        docs: Document,
+        executor: PriorityThreadPoolExecutor | AsyncPriorityExecutor,
+        pbar: tqdm,
+        tracker: DocumentTranslateTracker,
+        executor2: PriorityThreadPoolExecutor,
+        translated_ids: set[int],
+    ):
+        self.process_cross_page_paragraph(
+            docs,
+            executor,
+            pbar,
+            tracker,
+            executor2,
+            translated_ids,
+        )
+        # Cross-column detection per page (after cross-page processing)
+        for page in docs.page:
+            self.process_cross_column_paragraph(
+                page,
+                executor,
+                pbar,
+                tracker,
+                executor2,
+                translated_ids,
+            )
+        for page in docs.page:
+            self.process_page(
+                page,
+                executor,
+                pbar,
+                tracker.new_page(),
+                executor2,
+                translated_ids,
+            )
+
+    def _paragraph_translate_fn(
+        self, executor: PriorityThreadPoolExecutor | AsyncPriorityExecutor
+    ):
+        """The translate_paragraph variant that runs on ``executor``."""
+        if isinstance(executor, AsyncPriorityExecutor):
+            return self.atranslate_paragraph
+        return self.translate_paragraph
+
+    def _prepare_translate(self, docs: Document) -> int:
+        """Find the title paragraph and count the paragraphs to translate."""
+        self.il_translator.docs = docs
         self.mid = 0
 
         if not self.translation_config.shared_context_cross_split_part.first_paragraph:
@@ -190,7 +320,7 @@ class ILTranslatorLLMOnly:
                 logger.info(f"Found first title paragraph: {title_paragraph.unicode}")
 
         # count total paragraph
-        total = sum(
+        return sum(
             [
                 len(
                     [
@@ -202,45 +332,8 @@ class ILTranslatorLLMOnly:
                 for page in docs.page
             ]
         )
-        translated_ids = set()
-        with self.translation_config.progress_monitor.stage_start(
-            self.stage_name,
-            total,
-        ) as pbar:
-            with PriorityThreadPoolExecutor(
-                max_workers=self.translation_config.pool_max_workers,
-            ) as executor2:
-                with PriorityThreadPoolExecutor(
-                    max_workers=self.translation_config.pool_max_workers,
-                ) as executor:
-                    self.process_cross_page_paragraph(
-                        docs,
-                        executor,
-                        pbar,
-                        tracker,
-                        executor2,
-                        translated_ids,
-                    )
-                    # Cross-column detection per page (after cross-page processing)
-                    for page in docs.page:
-                        self.process_cross_column_paragraph(
-                            page,
-                            executor,
-                            pbar,
-                            tracker,
-                            executor2,
-                            translated_ids,
-                        )
-                    for page in docs.page:
-                        self.process_page(
-                            page,
-                            executor,
-                            pbar,
-                            tracker.new_page(),
-                            executor2,
-                            translated_ids,
-                        )
 
+    def _finish_translate(self, tracker: DocumentTranslateTracker):
         path = self.translation_config.get_working_file_path("translate_tracking.json")
 
         if (
@@ -251,7 +344,7 @@ class ILTranslatorLLMOnly:
             with Path(path).open("w", encoding="utf-8") as f:
                 f.write(tracker.to_json())
         logger.info(
-            f"Translation completed. Total: {self.total_count}, Successful: {self.ok_count}, Fallback: {self.fallback_count}"
+            f"Translation completed. Total: {self.total_count}, Successful: {self.ok_count}, Fallback: {self.fallback_count}, From translation memory: {self.translation_memory_hit_count}"
         )
 
     def _is_body_text_paragraph(self, paragraph: PdfParagraph) -> bool:
@@ -434,7 +527,7 @@ class ILTranslatorLLMOnly:
             self.mid += 1
             # Submit translation task (force submit regardless of token count)
             executor.submit(
-                self.translate_paragraph,
+                self._paragraph_translate_fn(executor),
                 batch_paragraph,
                 pbar,
                 merged_font_map,
@@ -507,7 +600,7 @@ class ILTranslatorLLMOnly:
             batch = BatchParagraph([p1, p2], [page, page], tracker.new_cross_column())
             self.mid += 1
             executor.submit(
-                self.translate_paragraph,
+                self._paragraph_translate_fn(executor),
                 batch,
                 pbar,
                 page_font_map,
@@ -588,7 +681,7 @@ class ILTranslatorLLMOnly:
             if total_token_count > 200 or len(paragraphs) > 5:
                 self.mid += 1
                 executor.submit(
-                    self.translate_paragraph,
+                    self._paragraph_translate_fn(executor),
                     BatchParagraph(paragraphs, [page] * len(paragraphs), tracker),
                     pbar,
                     page_font_map,
@@ -606,7 +699,7 @@ class ILTranslatorLLMOnly:
         if paragraphs:
             self.mid += 1
             executor.submit(
-                self.translate_paragraph,
+                self._paragraph_translate_fn(executor),
                 BatchParagraph(paragraphs, [page] * len(paragraphs), tracker),
                 pbar,
                 page_font_map,
@@ -633,243 +726,361 @@ class ILTranslatorLLMOnly:
     ):
         """Translate a paragraph using pre and post processing functions."""
         self.translation_config.raise_if_cancelled()
-        should_translate_paragraph = []
+        batch = LLMTranslateBatch(
+            batch_paragraph,
+            page_font_map,
+            xobj_font_map,
+            title_paragraph,
+            local_title_paragraph,
+            executor,
+        )
         try:
-            inputs = []
-            llm_translate_trackers = []
-            paragraph_unicodes = []
-            for i in range(len(batch_paragraph.paragraphs)):
-                paragraph = batch_paragraph.paragraphs[i]
-                tracker = batch_paragraph.trackers[i]
-                text, translate_input = self.il_translator.pre_translate_paragraph(
-                    paragraph, tracker, page_font_map, xobj_font_map
-                )
-                if text is None:
-                    pbar.advance(1)
-                    continue
-
-                tracker.record_multi_paragraph_id(mp_id)
-
-                llm_translate_tracker = tracker.new_llm_translate_tracker()
-                should_translate_paragraph.append(i)
-                llm_translate_trackers.append(llm_translate_tracker)
-                inputs.append(
-                    (
-                        text,
-                        translate_input,
-                        paragraph,
-                        tracker,
-                        llm_translate_tracker,
-                        paragraph_unicodes,
-                    )
-                )
-                paragraph_unicodes.append(paragraph.unicode)
-            if not inputs:
+            final_input = self._pre_translate_batch(batch, pbar, mp_id)
+            if final_input is None:
                 return
-            json_format_input = []
-
-            for id_, input_text in enumerate(inputs):
-                ti: il_translator.ILTranslator.TranslateInput = input_text[1]
-                tracker: ParagraphTranslateTracker = input_text[3]
-                tracker.record_multi_paragraph_index(id_)
-                placeholders_hint = ti.get_placeholders_hint()
-                obj = {
-                    "id": id_,
-                    "input": input_text[0],
-                    "layout_label": input_text[2].layout_label,
-                }
-                if (
-                    placeholders_hint
-                    and self.translation_config.add_formula_placehold_hint
-                ):
-                    obj["formula_placeholders_hint"] = placeholders_hint
-                json_format_input.append(obj)
-
-            json_format_input_str = json.dumps(
-                json_format_input, ensure_ascii=False, indent=2
-            )
-
-            batch_text_for_glossary_matching = "\n".join(
-                item.get("input", "") for item in json_format_input
+            llm_output = self.translate_engine.llm_translate(
+                final_input,
+                rate_limit_params={
+                    "paragraph_token_count": paragraph_token_count,
+                    "request_json_mode": True,
+                },
             )
+            self._post_translate_batch(batch, llm_output, pbar)
+        except Exception as e:
+            self._fallback_batch(batch, e, pbar)
 
-            final_input = self._build_llm_prompt(
-                json_input_str=json_format_input_str,
-                title_paragraph=title_paragraph,
-                local_title_paragraph=local_title_paragraph,
-                batch_text_for_glossary_matching=batch_text_for_glossary_matching,
+    async def atranslate_paragraph(
+        self,
+        batch_paragraph: BatchParagraph,
+        pbar: tqdm | None = None,
+        page_font_map: dict[str, PdfFont] = None,
+        xobj_font_map: dict[int, dict[str, PdfFont]] = None,
+        title_paragraph: PdfParagraph | None = None,
+        local_title_paragraph: PdfParagraph | None = None,
+        executor: PriorityThreadPoolExecutor | None = None,
+        paragraph_token_count: int = 0,
+        mp_id: int = 0,
+    ):
+        """Like translate_paragraph, but waits for the LLM without blocking a thread."""
+        self.translation_config.raise_if_cancelled()
+        batch = LLMTranslateBatch(
+            batch_paragraph,
+            page_font_map,
+            xobj_font_map,
+            title_paragraph,
+            local_title_paragraph,
+            executor,
+        )
+        try:
+            # Preparing and applying a batch reads and writes the translation
+            # memory, which blocks on SQLite or on the cache server
+            final_input = await asyncio.to_thread(
+                self._pre_translate_batch, batch, pbar, mp_id
             )
-
-            for llm_translate_tracker in llm_translate_trackers:
-                llm_translate_tracker.set_input(final_input)
-            llm_output = self.translate_engine.llm_translate(
+            if final_input is None:
+                return
+            llm_output = await self.translate_engine.allm_translate(
                 final_input,
                 rate_limit_params={
                     "paragraph_token_count": paragraph_token_count,
                     "request_json_mode": True,
                 },
             )
-            for llm_translate_tracker in llm_translate_trackers:
-                llm_translate_tracker.set_output(llm_output)
-            llm_output = llm_output.strip()
+            await asyncio.to_thread(self._post_translate_batch, batch, llm_output, pbar)
+        except Exception as e:
+            self._fallback_batch(batch, e, pbar)
 
-            llm_output = self._clean_json_output(llm_output)
+    def _pre_translate_batch(
+        self,
+        batch: LLMTranslateBatch,
+        pbar: tqdm | None,
+        mp_id: int,
+    ) -> str | None:
+        """Build the LLM prompt of a batch, None if nothing is left to translate."""
+        batch_paragraph = batch.batch_paragraph
+        inputs = batch.inputs
+        llm_translate_trackers = batch.llm_translate_trackers
+        paragraph_unicodes = batch.paragraph_unicodes
+        prepared = []
+        for i in range(len(batch_paragraph.paragraphs)):
+            paragraph = batch_paragraph.paragraphs[i]
+            tracker = batch_paragraph.trackers[i]
+            text, translate_input = self.il_translator.pre_translate_paragraph(
+                paragraph, tracker, batch.page_font_map, batch.xobj_font_map
+            )
+            if text is None:
+                pbar.advance(1)
+                continue
+            prepared.append((i, paragraph, tracker, text, translate_input))
 
-            parsed_output = json.loads(llm_output)
+        recalled = self._recall_translations([item[3] for item in prepared])
+        for (i, paragraph, tracker, text, translate_input), translation in zip(
+            prepared, recalled, strict=True
+        ):
+            if translation is not None:
+                tracker.record_translation_memory_hit()
+                self.il_translator.post_translate_paragraph(
+                    paragraph, tracker, translate_input, translation
+                )
+                batch.recalled_paragraph.append(i)
+                self.total_count += 1
+                self.ok_count += 1
+                self.translation_memory_hit_count += 1
+                if pbar:
+                    pbar.advance(1)
+                continue
 
-            if isinstance(parsed_output, dict) and parsed_output.get(
-                "output", parsed_output.get("input", False)
-            ):
-                parsed_output = [parsed_output]
+            tracker.record_multi_paragraph_id(mp_id)
 
-            translation_results = {
-                item["id"]: item.get("output", item.get("input"))
-                for item in parsed_output
+            llm_translate_tracker = tracker.new_llm_translate_tracker()
+            batch.should_translate_paragraph.append(i)
+            llm_translate_trackers.append(llm_translate_tracker)
+            inputs.append(
+                (
+                    text,
+                    translate_input,
+                    paragraph,
+                    tracker,
+                    llm_translate_tracker,
+                    paragraph_unicodes,
+                )
+            )
+            paragraph_unicodes.append(paragraph.unicode)
+        if not inputs:
+            return None
+        json_format_input = []
+
+        for id_, input_text in enumerate(inputs):
+            ti: il_translator.ILTranslator.TranslateInput = input_text[1]
+            tracker: ParagraphTranslateTracker = input_text[3]
+            tracker.record_multi_paragraph_index(id_)
+            placeholders_hint = ti.get_placeholders_hint()
+            obj = {
+                "id": id_,
+                "input": input_text[0],
+                "layout_label": input_text[2].layout_label,
             }
+            if placeholders_hint and self.translation_config.add_formula_placehold_hint:
+                obj["formula_placeholders_hint"] = placeholders_hint
+            json_format_input.append(obj)
 
-            if len(translation_results) != len(inputs):
-                raise Exception(
-                    f"Translation results length mismatch. Expected: {len(inputs)}, Got: {len(translation_results)}"
-                )
+        json_format_input_str = json.dumps(
+            json_format_input, ensure_ascii=False, indent=2
+        )
 
-            for id_, output in translation_results.items():
-                should_fallback = True
-                try:
-                    if not isinstance(output, str):
-                        logger.warning(
-                            f"Translation result is not a string. Output: {output}"
-                        )
-                        continue
+        batch_text_for_glossary_matching = "\n".join(
+            item.get("input", "") for item in json_format_input
+        )
 
-                    id_ = int(id_)  # Ensure id is an integer
-                    if id_ >= len(inputs):
-                        logger.warning(f"Invalid id {id_}, skipping")
-                        continue
+        final_input = self._build_llm_prompt(
+            json_input_str=json_format_input_str,
+            title_paragraph=batch.title_paragraph,
+            local_title_paragraph=batch.local_title_paragraph,
+            batch_text_for_glossary_matching=batch_text_for_glossary_matching,
+        )
 
-                    # Clean up any excessive punctuation in the translated text
-                    translated_text = re.sub(r"[. 。…，]{20,}", ".", output)
+        for llm_translate_tracker in llm_translate_trackers:
+            llm_translate_tracker.set_input(final_input)
+        return final_input
 
-                    # Get the original input for this translation
-                    translate_input = inputs[id_][1]
-                    llm_translate_tracker = inputs[id_][4]
+    def _post_translate_batch(
+        self,
+        batch: LLMTranslateBatch,
+        llm_output: str,
+        pbar: tqdm | None,
+    ):
+        """Apply the LLM output to the paragraphs of a batch, falling back to
+        simple translation for each paragraph it got wrong."""
+        inputs = batch.inputs
+        llm_translate_trackers = batch.llm_translate_trackers
+        memorized = []
+        for llm_translate_tracker in llm_translate_trackers:
+            llm_translate_tracker.set_output(llm_output)
+        llm_output = llm_output.strip()
 
-                    input_unicode = inputs[id_][0]
-                    output_unicode = translated_text
+        llm_output = self._clean_json_output(llm_output)
 
-                    trimed_input = re.sub(r"[. 。…，]{20,}", ".", input_unicode)
+        parsed_output = json.loads(llm_output)
 
-                    input_token_count = self.calc_token_count(trimed_input)
-                    output_token_count = self.calc_token_count(output_unicode)
+        if isinstance(parsed_output, dict) and parsed_output.get(
+            "output", parsed_output.get("input", False)
+        ):
+            parsed_output = [parsed_output]
 
-                    if trimed_input == output_unicode and input_token_count > 10:
-                        llm_translate_tracker.set_error_message(
-                            "Translation result is the same as input, fallback."
-                        )
-                        llm_translate_tracker.set_placeholder_full_match()
-                        logger.warning(
-                            "Translation result is the same as input, fallback."
-                        )
-                        continue
+        translation_results = {
+            item["id"]: item.get("output", item.get("input")) for item in parsed_output
+        }
 
-                    if not (0.3 < output_token_count / input_token_count < 3):
-                        llm_translate_tracker.set_error_message(
-                            f"Translation result is too long or too short. Input: {input_token_count}, Output: {output_token_count}"
-                        )
-                        logger.warning(
-                            f"Translation result is too long or too short. Input: {input_token_count}, Output: {output_token_count}"
-                        )
-                        llm_translate_tracker.set_placeholder_full_match()
-                        continue
+        if len(translation_results) != len(inputs):
+            raise Exception(
+                f"Translation results length mismatch. Expected: {len(inputs)}, Got: {len(translation_results)}"
+            )
 
-                    edit_distance = Levenshtein.distance(input_unicode, output_unicode)
-                    if edit_distance < 5 and input_token_count > 20:
-                        llm_translate_tracker.set_error_message(
-                            f"Translation result edit distance is too small. distance: {edit_distance}, input: {input_unicode}, output: {output_unicode}"
-                        )
-                        logger.warning(
-                            f"Translation result edit distance is too small. distance: {edit_distance}, input: {input_unicode}, output: {output_unicode}"
-                        )
-                        llm_translate_tracker.set_placeholder_full_match()
-                        continue
-                    # Apply the translation to the paragraph
-                    self.il_translator.post_translate_paragraph(
-                        inputs[id_][2],
-                        inputs[id_][3],
-                        translate_input,
-                        translated_text,
+        for id_, output in translation_results.items():
+            should_fallback = True
+            try:
+                if not isinstance(output, str):
+                    logger.warning(
+                        f"Translation result is not a string. Output: {output}"
                     )
-                    should_fallback = False
-                    if pbar:
-                        pbar.advance(1)
-                except Exception as e:
-                    error_message = f"Error translating paragraph. Error: {e}."
-                    logger.exception(error_message)
-                    # Ignore error and continue
-                    for llm_translate_tracker in llm_translate_trackers:
-                        llm_translate_tracker.set_error_message(error_message)
                     continue
-                finally:
-                    self.total_count += 1
-                    if should_fallback:
-                        self.fallback_count += 1
-                        inputs[id_][4].set_fallback_to_translate()
-                        logger.warning(
-                            f"Fallback to simple translation. paragraph id: {inputs[id_][2].debug_id}"
-                        )
-                        paragraph_token_count = self.calc_token_count(
-                            inputs[id_][2].unicode
-                        )
-                        paragraph_unicodes = inputs[id_][5]
-                        inputs[id_][2].unicode = paragraph_unicodes[id_]
-                        executor.submit(
-                            self.il_translator.translate_paragraph,
-                            inputs[id_][2],
-                            batch_paragraph.pages[id_],
-                            pbar,
-                            inputs[id_][3],
-                            page_font_map,
-                            xobj_font_map,
-                            priority=1048576 - paragraph_token_count,
-                            paragraph_token_count=paragraph_token_count,
-                            title_paragraph=title_paragraph,
-                            local_title_paragraph=local_title_paragraph,
-                        )
-                    else:
-                        self.ok_count += 1
 
-        except Exception as e:
-            error_message = f"Error {e} during translation. try fallback"
-            logger.warning(error_message)
-            for llm_translate_tracker in llm_translate_trackers:
-                llm_translate_tracker.set_error_message(error_message)
-                llm_translate_tracker.set_fallback_to_translate()
-            self.total_count += len(llm_translate_trackers)
-            self.fallback_count += len(llm_translate_trackers)
-            for input_ in inputs:
-                input_[2].unicode = input_[5]
-            if not should_translate_paragraph:
-                should_translate_paragraph = list(
-                    range(len(batch_paragraph.paragraphs))
-                )
-            for i in should_translate_paragraph:
-                paragraph = batch_paragraph.paragraphs[i]
-                tracker = batch_paragraph.trackers[i]
-                if paragraph.debug_id is None:
+                id_ = int(id_)  # Ensure id is an integer
+                if id_ >= len(inputs):
+                    logger.warning(f"Invalid id {id_}, skipping")
                     continue
-                paragraph_token_count = self.calc_token_count(paragraph.unicode)
-                executor.submit(
-                    self.il_translator.translate_paragraph,
-                    paragraph,
-                    batch_paragraph.pages[i],
-                    pbar,
-                    tracker,
-                    page_font_map,
-                    xobj_font_map,
-                    priority=1048576 - paragraph_token_count,
-                    paragraph_token_count=paragraph_token_count,
-                    title_paragraph=title_paragraph,
-                    local_title_paragraph=local_title_paragraph,
+
+                # Clean up any excessive punctuation in the translated text
+                translated_text = re.sub(r"[. 。…，]{20,}", ".", output)
+
+                # Get the original input for this translation
+                translate_input = inputs[id_][1]
+                llm_translate_tracker = inputs[id_][4]
+
+                input_unicode = inputs[id_][0]
+                output_unicode = translated_text
+
+                trimed_input = re.sub(r"[. 。…，]{20,}", ".", input_unicode)
+
+                input_token_count = self.calc_token_count(trimed_input)
+                output_token_count = self.calc_token_count(output_unicode)
+
+                if trimed_input == output_unicode and input_token_count > 10:
+                    llm_translate_tracker.set_error_message(
+                        "Translation result is the same as input, fallback."
+                    )
+                    llm_translate_tracker.set_placeholder_full_match()
+                    logger.warning("Translation result is the same as input, fallback.")
+                    continue
+
+                if not (0.3 < output_token_count / input_token_count < 3):
+                    llm_translate_tracker.set_error_message(
+                        f"Translation result is too long or too short. Input: {input_token_count}, Output: {output_token_count}"
+                    )
+                    logger.warning(
+                        f"Translation result is too long or too short. Input: {input_token_count}, Output: {output_token_count}"
+                    )
+                    llm_translate_tracker.set_placeholder_full_match()
+                    continue
+
+                edit_distance = Levenshtein.distance(input_unicode, output_unicode)
+                if edit_distance < 5 and input_token_count > 20:
+                    llm_translate_tracker.set_error_message(
+                        f"Translation result edit distance is too small. distance: {edit_distance}, input: {input_unicode}, output: {output_unicode}"
+                    )
+                    logger.warning(
+                        f"Translation result edit distance is too small. distance: {edit_distance}, input: {input_unicode}, output: {output_unicode}"
+                    )
+                    llm_translate_tracker.set_placeholder_full_match()
+                    continue
+                # Apply the translation to the paragraph
+                self.il_translator.post_translate_paragraph(
+                    inputs[id_][2],
+                    inputs[id_][3],
+                    translate_input,
+                    translated_text,
                 )
+                memorized.append((input_unicode, translated_text))
+                should_fallback = False
+                if pbar:
+                    pbar.advance(1)
+            except Exception as e:
+                error_message = f"Error translating paragraph. Error: {e}."
+                logger.exception(error_message)
+                # Ignore error and continue
+                for llm_translate_tracker in llm_translate_trackers:
+                    llm_translate_tracker.set_error_message(error_message)
+                continue
+            finally:
+                self.total_count += 1
+                if should_fallback:
+                    self.fallback_count += 1
+                    inputs[id_][4].set_fallback_to_translate()
+                    logger.warning(
+                        f"Fallback to simple translation. paragraph id: {inputs[id_][2].debug_id}"
+                    )
+                    paragraph_token_count = self.calc_token_count(
+                        inputs[id_][2].unicode
+                    )
+                    paragraph_unicodes = inputs[id_][5]
+                    inputs[id_][2].unicode = paragraph_unicodes[id_]
+                    batch.fallback_executor.submit(
+                        self.il_translator.translate_paragraph,
+                        inputs[id_][2],
+                        batch.batch_paragraph.pages[id_],
+                        pbar,
+                        inputs[id_][3],
+                        batch.page_font_map,
+                        batch.xobj_font_map,
+                        priority=1048576 - paragraph_token_count,
+                        paragraph_token_count=paragraph_token_count,
+                        title_paragraph=batch.title_paragraph,
+                        local_title_paragraph=batch.local_title_paragraph,
+                    )
+                else:
+                    self.ok_count += 1
+        self._memorize_translations(memorized)
+
+    def _fallback_batch(
+        self,
+        batch: LLMTranslateBatch,
+        e: Exception,
+        pbar: tqdm | None,
+    ):
+        """Translate the paragraphs of a failed batch one by one."""
+        batch_paragraph = batch.batch_paragraph
+        error_message = f"Error {e} during translation. try fallback"
+        logger.warning(error_message)
+        for llm_translate_tracker in batch.llm_translate_trackers:
+            llm_translate_tracker.set_error_message(error_message)
+            llm_translate_tracker.set_fallback_to_translate()
+        self.total_count += len(batch.llm_translate_trackers)
+        self.fallback_count += len(batch.llm_translate_trackers)
+        for input_ in batch.inputs:
+            input_[2].unicode = input_[5]
+        should_translate_paragraph = batch.should_translate_paragraph
+        if not should_translate_paragraph:
+            should_translate_paragraph = [
+                i
+                for i in range(len(batch_paragraph.paragraphs))
+                if i not in batch.recalled_paragraph
+            ]
+        for i in should_translate_paragraph:
+            paragraph = batch_paragraph.paragraphs[i]
+            tracker = batch_paragraph.trackers[i]
+            if paragraph.debug_id is None:
+                continue
+            paragraph_token_count = self.calc_token_count(paragraph.unicode)
+            batch.fallback_executor.submit(
+                self.il_translator.translate_paragraph,
+                paragraph,
+                batch_paragraph.pages[i],
+                pbar,
+                tracker,
+                batch.page_font_map,
+                batch.xobj_font_map,
+                priority=1048576 - paragraph_token_count,
+                paragraph_token_count=paragraph_token_count,
+                title_paragraph=batch.title_paragraph,
+                local_title_paragraph=batch.local_title_paragraph,
+            )
+
+    def _recall_translations(self, texts: list[str]) -> list[str | None]:
+        if self.translation_memory is None or not texts:
+            return [None] * len(texts)
+        try:
+            return self.translation_memory.get_many(texts)
+        except Exception as e:
+            logger.debug(f"try get translation memory failed, ignore it: {e}")
+            return [None] * len(texts)
+
+    def _memorize_translations(self, items: list[tuple[str, str]]):
+        if self.translation_memory is None or not items:
+            return
+        try:
+            self.translation_memory.set_many(items)
+        except Exception as e:
+            logger.debug(f"try set translation memory failed, ignore it: {e}")
 
     def _build_llm_prompt(
         self,
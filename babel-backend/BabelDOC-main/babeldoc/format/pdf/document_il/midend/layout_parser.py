@@ -1,3 +1,4 @@
+import contextlib
 import logging
 import math
 import os
@@ -120,6 +121,7 @@ class LayoutParser:
         """Generate layouts for all pages that need to be translated."""
         # Get pages that need to be translated
         total = len(docs.page)
+        model_lock = getattr(self.model, "lock", None) or contextlib.nullcontext()
         with self.translation_config.progress_monitor.stage_start(
             self.stage_name,
             total * 2,
@@ -132,6 +134,10 @@ class LayoutParser:
                 self._save_debug_image,
             ):
                 page_layouts = []
+                # The model may still be rendering the next pages of mupdf_doc
+                # in a background thread, and pymupdf is not thread safe
+                with model_lock:
+                    box = mupdf_doc[page.page_number].mediabox_size
                 for layout in layouts.boxes:
                     # Convert coordinate system from picture to il
                     # system to the il coordinate system
@@ -139,7 +145,6 @@ class LayoutParser:
                     # pix = get_no_rotation_img(mupdf_doc[page.page_number])
                     # pix = mupdf_doc[page.page_number].get_pixmap()
                     # h, w = pix.height, pix.width
-                    box = mupdf_doc[page.page_number].mediabox_size
                     b_h = math.ceil(box.y)
                     b_w = math.ceil(box.x)
                     # if b_h != h or b_w != w:
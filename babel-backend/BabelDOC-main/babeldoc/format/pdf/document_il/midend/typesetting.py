@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import concurrent.futures
 import copy
+import itertools
 import logging
+import math
 import re
 import statistics
 import unicodedata
@@ -11,7 +14,11 @@ import pymupdf
 import regex
 from rtree import index
 
+from babeldoc.const import TYPESETTING_POOL_NAME
 from babeldoc.const import WATERMARK_VERSION
+from babeldoc.const import close_worker_pool
+from babeldoc.const import get_worker_pool
+from babeldoc.const import split_for_workers
 from babeldoc.format.pdf.document_il import Box
 from babeldoc.format.pdf.document_il import PdfCharacter
 from babeldoc.format.pdf.document_il import PdfCurve
@@ -19,13 +26,16 @@ from babeldoc.format.pdf.document_il import PdfForm
 from babeldoc.format.pdf.document_il import PdfFormula
 from babeldoc.format.pdf.document_il import PdfParagraphComposition
 from babeldoc.format.pdf.document_il import PdfStyle
+from babeldoc.format.pdf.document_il import binary_codec
 from babeldoc.format.pdf.document_il import il_version_1
 from babeldoc.format.pdf.document_il.utils.fontmap import FontMapper
+from babeldoc.format.pdf.document_il.utils.fontmap import get_worker_font_mapper
 from babeldoc.format.pdf.document_il.utils.formular_helper import update_formula_data
 from babeldoc.format.pdf.document_il.utils.layout_helper import box_to_tuple
 from babeldoc.format.pdf.document_il.utils.layout_helper import get_char_unicode_string
 from babeldoc.format.pdf.translation_config import TranslationConfig
 from babeldoc.format.pdf.translation_config import WatermarkOutputMode
+from babeldoc.progress_monitor import RetryableStage
 
 logger = logging.getLogger(__name__)
 
@@ -87,6 +97,11 @@ LINE_BREAK_REGEX = regex.compile(
     r"]+$"
 )
 
+# 段落缩放因子的下限
+MIN_SCALE = 0.1
+# FreeSpaceIndex 查找阻挡元素时第一条搜索带的宽度（pt），之后每次乘 4
+FREE_SPACE_SEARCH_STEP = 16.0
+
 
 # ============================================================================
 # LAYOUT-AWARE FORMULA RELOCATION
@@ -955,11 +970,275 @@ class TypesettingUnit:
             return [], [], []
 
 
+class ParagraphMetrics:
+    """Scale-independent measurements of a paragraph's typesetting units.
+
+    Computed once per paragraph, they let the scale search break lines and
+    check the fit at any scale without touching the units again, and without
+    relocating them.
+    """
+
+    def __init__(self, typesetting_units: list[TypesettingUnit]):
+        self.units = typesetting_units
+        self.widths = [unit.width for unit in typesetting_units]
+        self.heights = [unit.height for unit in typesetting_units]
+        self.is_formula = [unit.formular is not None for unit in typesetting_units]
+        self.is_space = [unit.is_space for unit in typesetting_units]
+        self.is_cjk_char = [unit.is_cjk_char for unit in typesetting_units]
+        self.is_hung_punctuation = [
+            unit.is_hung_punctuation for unit in typesetting_units
+        ]
+        self.is_cannot_appear_in_line_end_punctuation = [
+            unit.is_cannot_appear_in_line_end_punctuation
+            for unit in typesetting_units
+        ]
+        font_sizes = [u.font_size for u in typesetting_units if u.font_size] or [
+            10.0
+        ]
+        self.average_font_size = sum(font_sizes) / len(font_sizes)
+        self.first_font_size = font_sizes[0]
+
+        # Bottom of each unit relative to the bottom of its line, at scale 1.
+        # Characters sit on the line; formulas keep their sub/superscripts,
+        # and an empty formula is relocated to y = 0 (None here).
+        self.bottom_offsets: list[float | None] = [0.0] * len(typesetting_units)
+        for i, unit in enumerate(typesetting_units):
+            if unit.formular is None:
+                continue
+            if unit.formular.pdf_character:
+                self.bottom_offsets[i] = unit.relocate(0, 0, 1.0).box.y
+            else:
+                self.bottom_offsets[i] = None
+        self.has_formula = any(self.is_formula)
+
+        # Width from each unit up to the next unit that can break the line,
+        # at scale 1, for the English line break lookahead: a difference of
+        # prefix sums of the widths, so each lookup is O(1).
+        prefix_widths = list(itertools.accumulate(self.widths, initial=0.0))
+        self.width_before_next_break = [0.0] * len(typesetting_units)
+        next_break = len(typesetting_units)
+        for i in range(len(typesetting_units) - 1, -1, -1):
+            if typesetting_units[i].can_break_line:
+                next_break = i
+            else:
+                self.width_before_next_break[i] = (
+                    prefix_widths[next_break] - prefix_widths[i]
+                )
+
+        self.total_width = sum(self.widths)
+        line_heights = [
+            height
+            for height, is_space in zip(self.heights, self.is_space, strict=True)
+            if not is_space
+        ]
+        self.line_height = statistics.mode(line_heights) if line_heights else 10.0
+
+    def estimate_scale(self, box: Box, line_skip: float) -> float:
+        """The scale at which the units would just fill ``box``.
+
+        At scale s the text takes about total_width * s / box width lines of
+        line_height * s * line_skip each, so the area of the box bounds s.
+        Lines are not filled completely, so this is an upper estimate.
+        """
+        area = (box.x2 - box.x) * (box.y2 - box.y)
+        needed = self.total_width * self.line_height * line_skip
+        if area <= 0 or needed <= 0:
+            return 1.0
+        return math.sqrt(area / needed)
+
+
+def _first_fitting_scale(
+    scales: list[float], fits, start: int = 0, guess: int | None = None
+) -> int | None:
+    """Index of the first of the descending ``scales[start:]`` that ``fits``.
+
+    Fitting is monotonic in the scale (a smaller font never needs more room),
+    so this is a binary search. ``scales[start]`` is tried first, as it
+    usually fits when it is a precomputed scale; then ``guess`` and its
+    neighbour, if given, which end the search when the guess is good.
+    """
+    if start >= len(scales):
+        return None
+    if fits(scales[start]):
+        return start
+    # scales[low] does not fit, scales[high] does (or high is past the end)
+    low, high = start, len(scales)
+    if guess is not None and low < guess < high:
+        if fits(scales[guess]):
+            high = guess
+            neighbour = guess - 1
+        else:
+            low = guess
+            neighbour = guess + 1
+        if low < neighbour < high:
+            if fits(scales[neighbour]):
+                high = neighbour
+            else:
+                low = neighbour
+    while high - low > 1:
+        middle = (low + high) // 2
+        if fits(scales[middle]):
+            high = middle
+        else:
+            low = middle
+    return high if high < len(scales) else None
+
+
+def _normalized(x: float, y: float, x2: float, y2: float):
+    return min(x, x2), min(y, y2), max(x, x2), max(y, y2)
+
+
+class FreeSpaceIndex:
+    """R-tree of the paragraphs, characters and figures of a page.
+
+    These are what stop a paragraph box from growing, so the free space
+    queries of Typesetting become range queries instead of scans of the
+    whole page. Paragraph boxes that grow must be reported with
+    move_paragraph.
+    """
+
+    def __init__(self, page: il_version_1.Page):
+        self.page = page
+        self.items: list[
+            il_version_1.PdfParagraph | PdfCharacter | il_version_1.PdfFigure
+        ] = []
+        self.paragraph_ids: dict[int, int] = {}
+        self.indexed_boxes: dict[int, tuple[float, float, float, float]] = {}
+
+        for item in (*page.pdf_paragraph, *page.pdf_character, *page.pdf_figure):
+            item_id = len(self.items)
+            self.items.append(item)
+            if isinstance(item, il_version_1.PdfParagraph):
+                self.paragraph_ids[id(item)] = item_id
+            if item.box is not None:
+                self.indexed_boxes[item_id] = _normalized(*box_to_tuple(item.box))
+
+        if self.indexed_boxes:
+            # Bulk loading is several times faster than inserting one by one,
+            # but doesn't accept an empty stream
+            self.index = index.Index(
+                (item_id, box, None) for item_id, box in self.indexed_boxes.items()
+            )
+        else:
+            self.index = index.Index()
+
+    def move_paragraph(self, paragraph: il_version_1.PdfParagraph):
+        """Re-index ``paragraph`` after its box was replaced."""
+        item_id = self.paragraph_ids.get(id(paragraph))
+        if item_id is None:
+            return
+        old_box = self.indexed_boxes.pop(item_id, None)
+        if old_box is not None:
+            self.index.delete(item_id, old_box)
+        if paragraph.box is not None:
+            new_box = _normalized(*box_to_tuple(paragraph.box))
+            self.indexed_boxes[item_id] = new_box
+            self.index.insert(item_id, new_box)
+
+    def _boxes_in(self, area: tuple[float, float, float, float], current_box: Box):
+        """Boxes that may intersect ``area``, except paragraphs at current_box."""
+        for item_id in self.index.intersection(_normalized(*area)):
+            item = self.items[item_id]
+            if isinstance(item, il_version_1.PdfParagraph) and (
+                item.box is None or item.box == current_box
+            ):
+                continue
+            yield item.box
+
+    def max_right_space(self, current_box: Box, max_x: float) -> float:
+        """The smallest x, up to max_x, of the boxes right of current_box.
+
+        Only boxes that overlap current_box vertically count. The search looks
+        at growing strips right of current_box, so it only visits the boxes
+        near the nearest one.
+        """
+        low = current_box.x
+        width = FREE_SPACE_SEARCH_STEP
+        while low < max_x:
+            high = min(low + width, max_x)
+            nearest = max_x
+            area = (low, current_box.y, high, current_box.y2)
+            for box in self._boxes_in(area, current_box):
+                if box.x > current_box.x and not (
+                    box.y >= current_box.y2 or box.y2 <= current_box.y
+                ):
+                    nearest = min(nearest, box.x)
+            # Boxes starting past high may not have been seen yet
+            if nearest <= high:
+                return nearest
+            low = high
+            width *= 4
+        return max_x
+
+    def max_bottom_space(self, current_box: Box, min_y: float) -> float:
+        """The largest y2, down to min_y, of the boxes below current_box.
+
+        Only boxes that overlap current_box horizontally count; searched like
+        max_right_space, in growing strips below current_box.
+        """
+        high = current_box.y
+        height = FREE_SPACE_SEARCH_STEP
+        while high > min_y:
+            low = max(high - height, min_y)
+            nearest = min_y
+            area = (current_box.x, low, current_box.x2, high)
+            for box in self._boxes_in(area, current_box):
+                if box.y2 < current_box.y and not (
+                    box.x >= current_box.x2 or box.x2 <= current_box.x
+                ):
+                    nearest = max(nearest, box.y2)
+            # Boxes ending below low may not have been seen yet
+            if nearest >= low:
+                return nearest
+            high = low
+            height *= 4
+        return min_y
+
+
+def _results(futures: list[concurrent.futures.Future], translation_config):
+    """按提交顺序逐个返回结果；取消翻译或出错时放弃尚未开始的任务"""
+    try:
+        for future in futures:
+            yield future.result()
+            translation_config.raise_if_cancelled()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _preprocess_pages_worker(translation_config: TranslationConfig, pages_data: bytes):
+    """进程池中预处理一组页面，返回每页各段落的最优缩放因子与字符数"""
+    typesetting = Typesetting(
+        translation_config, get_worker_font_mapper(translation_config)
+    )
+    results = []
+    for page in binary_codec.decode(pages_data):
+        unit_counts = typesetting.preprocess_page(page)
+        scales = [paragraph.optimal_scale for paragraph in page.pdf_paragraph]
+        results.append((scales, unit_counts))
+    return results
+
+
+def _render_pages_worker(translation_config: TranslationConfig, pages_data: bytes):
+    """进程池中排版一组页面，返回编码后的排版结果"""
+    typesetting = Typesetting(
+        translation_config, get_worker_font_mapper(translation_config)
+    )
+    pages = binary_codec.decode(pages_data)
+    for page in pages:
+        typesetting.render_page(page)
+    return binary_codec.encode_list(il_version_1.Page, pages)
+
+
 class Typesetting:
     stage_name = "Typesetting"
 
-    def __init__(self, translation_config: TranslationConfig):
-        self.font_mapper = FontMapper(translation_config)
+    def __init__(
+        self,
+        translation_config: TranslationConfig,
+        font_mapper: FontMapper | None = None,
+    ):
+        self.font_mapper = font_mapper or FontMapper(translation_config)
         self.translation_config = translation_config
         self.lang_code = self.translation_config.lang_out.upper()
         self.is_cjk = (
@@ -973,6 +1252,8 @@ class Typesetting:
             or ("HK" in self.lang_code)
             or ("TW" in self.lang_code)
         )
+        # 当前页面的 FreeSpaceIndex，见 get_free_space_index
+        self._free_space_index: FreeSpaceIndex | None = None
 
     def preprocess_document(self, document: il_version_1.Document, pbar):
         """预处理文档，获取每个段落的最优缩放因子，不执行实际排版"""
@@ -981,53 +1262,73 @@ class Typesetting:
 
         for page in document.page:
             pbar.advance()
-            # 准备字体信息（复制自 render_page 的逻辑）
-            fonts: dict[
-                str | int,
-                il_version_1.PdfFont | dict[str, il_version_1.PdfFont],
-            ] = {f.font_id: f for f in page.pdf_font if f.font_id}
-            page_fonts = {f.font_id: f for f in page.pdf_font if f.font_id}
-            for k, v in self.font_mapper.fontid2font.items():
-                fonts[k] = v
-            for xobj in page.pdf_xobject:
-                if xobj.xobj_id is not None:
-                    fonts[xobj.xobj_id] = page_fonts.copy()
-                    for font in xobj.pdf_font:
-                        if (
-                            xobj.xobj_id in fonts
-                            and isinstance(fonts[xobj.xobj_id], dict)
-                            and font.font_id
-                        ):
-                            fonts[xobj.xobj_id][font.font_id] = font
-
-            # 处理每个段落
-            for paragraph in page.pdf_paragraph:
+            unit_counts = self.preprocess_page(page)
+            for paragraph, unit_count in zip(
+                page.pdf_paragraph, unit_counts, strict=True
+            ):
                 all_paragraphs.append(paragraph)
-                unit_count = 0
-                try:
-                    typesetting_units = self.create_typesetting_units(paragraph, fonts)
-                    unit_count = len(typesetting_units)
-                    for unit in typesetting_units:
-                        if unit.formular:
-                            unit_count += len(unit.formular.pdf_character) - 1
-
-                    # 如果所有单元都可以直接传递，则 scale = 1.0
-                    if all(unit.can_passthrough for unit in typesetting_units):
-                        paragraph.optimal_scale = 1.0
-                    else:
-                        # 获取最优缩放因子
-                        optimal_scale = self._get_optimal_scale(
-                            paragraph, page, typesetting_units
-                        )
-                        paragraph.optimal_scale = optimal_scale
-                except Exception as e:
-                    # 如果预处理出错，默认使用 1.0 缩放因子
-                    logger.warning(f"预处理段落时出错：{e}")
-                    paragraph.optimal_scale = 1.0
-
                 if paragraph.optimal_scale is not None:
                     all_scales.extend([paragraph.optimal_scale] * unit_count)
 
+        self._limit_to_mode_scale(all_paragraphs, all_scales)
+
+    def preprocess_page(self, page: il_version_1.Page) -> list[int]:
+        """获取一页中每个段落的最优缩放因子，返回每个段落的字符数
+
+        字符数是段落在全文缩放因子众数中的权重。
+        """
+        # 准备字体信息（复制自 render_page 的逻辑）
+        fonts: dict[
+            str | int,
+            il_version_1.PdfFont | dict[str, il_version_1.PdfFont],
+        ] = {f.font_id: f for f in page.pdf_font if f.font_id}
+        page_fonts = {f.font_id: f for f in page.pdf_font if f.font_id}
+        for k, v in self.font_mapper.fontid2font.items():
+            fonts[k] = v
+        for xobj in page.pdf_xobject:
+            if xobj.xobj_id is not None:
+                fonts[xobj.xobj_id] = page_fonts.copy()
+                for font in xobj.pdf_font:
+                    if (
+                        xobj.xobj_id in fonts
+                        and isinstance(fonts[xobj.xobj_id], dict)
+                        and font.font_id
+                    ):
+                        fonts[xobj.xobj_id][font.font_id] = font
+
+        # 处理每个段落
+        unit_counts = []
+        self.reset_free_space_index()
+        for paragraph in page.pdf_paragraph:
+            unit_count = 0
+            try:
+                typesetting_units = self.create_typesetting_units(paragraph, fonts)
+                unit_count = len(typesetting_units)
+                for unit in typesetting_units:
+                    if unit.formular:
+                        unit_count += len(unit.formular.pdf_character) - 1
+
+                # 如果所有单元都可以直接传递，则 scale = 1.0
+                if all(unit.can_passthrough for unit in typesetting_units):
+                    paragraph.optimal_scale = 1.0
+                else:
+                    # 获取最优缩放因子
+                    optimal_scale = self._get_optimal_scale(
+                        paragraph, page, typesetting_units
+                    )
+                    paragraph.optimal_scale = optimal_scale
+            except Exception as e:
+                # 如果预处理出错，默认使用 1.0 缩放因子
+                logger.warning(f"预处理段落时出错：{e}")
+                paragraph.optimal_scale = 1.0
+            unit_counts.append(unit_count)
+        return unit_counts
+
+    def _limit_to_mode_scale(
+        self,
+        all_paragraphs: list[il_version_1.PdfParagraph],
+        all_scales: list[float],
+    ):
         # 获取缩放因子的众数
         if all_scales:
             try:
@@ -1061,6 +1362,9 @@ class Typesetting:
     ) -> tuple[float, list[TypesettingUnit] | None]:
         """查找最优缩放因子并可选择性地执行布局
 
+        缩放因子的候选值与扩展空间的顺序由 _scale_runs 给出；每一段候选值共用
+        同一个边界框，段内用二分查找，只排版测量而不重定位排版单元。
+
         Args:
             paragraph: 段落对象
             page: 页面对象
@@ -1075,28 +1379,68 @@ class Typesetting:
         if not paragraph.box:
             return initial_scale, None
 
-        box = paragraph.box
-        scale = initial_scale
         line_skip = 1.50 if self.is_cjk else 1.4
-        min_scale = 0.1
-        expand_space_flag = 0
-        final_typeset_units = None
+        try:
+            metrics = ParagraphMetrics(typesetting_units)
+        except Exception:
+            # 与逐个尝试时一样，排版出错即视为放不下
+            metrics = None
+
+        # 没有 debug_id 的段落只尝试初始缩放因子
+        has_debug_id = bool(getattr(paragraph, "debug_id", None))
+        english_line_break_modes = [use_english_line_break]
+        if use_english_line_break and has_debug_id:
+            # 如果仍然放不下，尝试去除英文换行限制
+            english_line_break_modes.append(False)
+
+        for english_line_break in english_line_break_modes:
+            if has_debug_id:
+                runs = self._scale_runs(paragraph, page, initial_scale, apply_layout)
+            else:
+                runs = [(paragraph.box, [initial_scale])]
 
-        while scale >= min_scale:
-            try:
-                # 尝试布局排版单元
-                typeset_units, all_units_fit = self._layout_typesetting_units(
-                    typesetting_units,
-                    box,
-                    scale,
-                    line_skip,
-                    paragraph,
-                    use_english_line_break,
-                )
+            for box, scales in runs:
 
-                # 如果所有单元都放得下
-                if all_units_fit:
-                    if apply_layout:
+                def fits(scale, box=box, english_line_break=english_line_break):
+                    if metrics is None:
+                        return False
+                    try:
+                        return self._measure_layout(
+                            metrics,
+                            box,
+                            scale,
+                            line_skip,
+                            paragraph.first_line_indent,
+                            english_line_break,
+                        )
+                    except Exception:
+                        return False
+
+                guess = None
+                if metrics is not None:
+                    estimate = metrics.estimate_scale(box, line_skip)
+                    guess = next(
+                        (i for i, scale in enumerate(scales) if scale <= estimate),
+                        None,
+                    )
+                index = _first_fitting_scale(scales, fits, guess=guess)
+                while index is not None:
+                    scale = scales[index]
+                    if not apply_layout:
+                        return scale, None
+                    try:
+                        typeset_units, all_units_fit = self._layout_typesetting_units(
+                            typesetting_units,
+                            box,
+                            scale,
+                            line_skip,
+                            paragraph,
+                            english_line_break,
+                            metrics,
+                        )
+                    except Exception:
+                        all_units_fit = False
+                    if all_units_fit:
                         # 实际应用排版结果
                         paragraph.scale = scale
                         paragraph.pdf_paragraph_composition = []
@@ -1110,82 +1454,74 @@ class Typesetting:
                                 page.pdf_curve.append(curve)
                             for form in forms:
                                 page.pdf_form.append(form)
-                        final_typeset_units = typeset_units
-                    return scale, final_typeset_units
-            except Exception:
-                # 如果布局检查出错，继续尝试下一个缩放因子
-                pass
+                        return scale, typeset_units
+                    # 如果布局出错，继续尝试更小的缩放因子
+                    index = _first_fitting_scale(scales, fits, index + 1)
 
-            # 添加与原 retypeset 一致的逻辑检查
-            if not hasattr(paragraph, "debug_id") or not paragraph.debug_id:
-                return scale, final_typeset_units
+        if not has_debug_id:
+            return initial_scale, None
+        # 最后返回最小缩放因子
+        return MIN_SCALE, None
 
+    def _scale_runs(
+        self,
+        paragraph: il_version_1.PdfParagraph,
+        page: il_version_1.Page,
+        initial_scale: float,
+        apply_layout: bool,
+    ):
+        """按顺序生成要尝试的 (边界框，缩放因子列表)
+
+        缩放因子从 initial_scale 开始，大于 0.6 时每次减 0.05，否则减 0.1。
+        缩放因子小于 0.7 时先尝试向下扩展空间，再尝试向右扩展；向下扩展失败时
+        从 1.0 重新开始。每段缩放因子递减且共用一个边界框，只有前面的段都放不下
+        时才会扩展空间。
+        """
+        box = paragraph.box
+        scale = initial_scale
+        expand_space_flag = 0
+        scales = []
+
+        while scale >= MIN_SCALE:
+            scales.append(scale)
             # 减小缩放因子
             if scale > 0.6:
                 scale -= 0.05
             else:
                 scale -= 0.1
 
-            if scale < 0.7:
-                space_expanded = False  # 标记是否成功扩展了空间
+            if scale < 0.7 and expand_space_flag < 2:
+                yield box, scales
+                scales = []
 
-                if expand_space_flag == 0:
-                    # 尝试向下扩展
-                    try:
+                expanded_box = None
+                try:
+                    if expand_space_flag == 0:
+                        # 尝试向下扩展
                         min_y = self.get_max_bottom_space(box, page) + 2
                         if min_y < box.y:
                             expanded_box = Box(x=box.x, y=min_y, x2=box.x2, y2=box.y2)
-                            box = expanded_box
-                            if apply_layout:
-                                # 更新段落的边界框
-                                paragraph.box = expanded_box
-                            space_expanded = True
-                    except Exception:
-                        pass
-                    expand_space_flag = 1
-
-                    # 只有成功扩展空间时才 continue，否则继续减小 scale
-                    if space_expanded:
-                        continue
-
-                elif expand_space_flag == 1:
-                    # 尝试向右扩展
-                    try:
+                    else:
+                        # 尝试向右扩展
                         max_x = self.get_max_right_space(box, page) - 5
                         if max_x > box.x2:
                             expanded_box = Box(x=box.x, y=box.y, x2=max_x, y2=box.y2)
-                            box = expanded_box
-                            if apply_layout:
-                                # 更新段落的边界框
-                                paragraph.box = expanded_box
-                            space_expanded = True
-                    except Exception:
-                        pass
-                    expand_space_flag = 2
-
-                    # 只有成功扩展空间时才 continue，否则继续减小 scale
-                    if space_expanded:
-                        continue
+                except Exception:
+                    pass
+                expand_space_flag += 1
 
-                # 只有在扩展尝试阶段 (expand_space_flag < 2) 且扩展失败时才重置 scale
-                # 当 expand_space_flag >= 2 时，说明已经尝试过所有扩展，应该继续正常的 scale 减小
-                if expand_space_flag < 2:
-                    # 如果无法扩展空间，重置 scale 并继续循环
+                if expanded_box is not None:
+                    box = expanded_box
+                    if apply_layout:
+                        # 更新段落的边界框
+                        paragraph.box = expanded_box
+                        self.get_free_space_index(page).move_paragraph(paragraph)
+                elif expand_space_flag == 1:
+                    # 无法向下扩展时，重置 scale，在尝试向右扩展前重新来过
                     scale = 1.0
 
-        # 如果仍然放不下，尝试去除英文换行限制
-        if use_english_line_break:
-            return self._find_optimal_scale_and_layout(
-                paragraph,
-                page,
-                typesetting_units,
-                initial_scale,
-                use_english_line_break=False,
-                apply_layout=apply_layout,
-            )
-
-        # 最后返回最小缩放因子
-        return min_scale, final_typeset_units
+        if scales:
+            yield box, scales
 
     def _get_optimal_scale(
         self,
@@ -1228,23 +1564,90 @@ class Typesetting:
         )
 
     def typesetting_document(self, document: il_version_1.Document):
-        # 原有的排版逻辑
         if self.translation_config.progress_monitor:
             with self.translation_config.progress_monitor.stage_start(
                 self.stage_name,
                 len(document.page) * 2,
             ) as pbar:
-                # 预处理：获取所有段落的最优缩放因子
-                self.preprocess_document(document, pbar)
-
-                for page in document.page:
-                    self.translation_config.raise_if_cancelled()
-                    self.render_page(page)
-                    pbar.advance()
+                self._typesetting_pages(document, pbar)
         else:
-            for page in document.page:
-                self.translation_config.raise_if_cancelled()
-                self.render_page(page)
+            self._typesetting_pages(document, None)
+
+    def _typesetting_pages(self, document: il_version_1.Document, pbar):
+        workers = self.translation_config.typesetting_workers or 1
+        if workers > 1 and len(document.page) > 1:
+            if pbar is not None:
+                # 回退到串行排版时不重复计入进程池已完成的进度
+                pbar = RetryableStage(pbar)
+            try:
+                self._typesetting_pages_in_pool(document, pbar, workers)
+                return
+            except concurrent.futures.BrokenExecutor as e:
+                close_worker_pool(TYPESETTING_POOL_NAME)
+                logger.warning(f"Parallel typesetting failed, falling back to serial: {e}")
+                if pbar is not None:
+                    pbar.restart()
+
+        # 原有的排版逻辑
+        if pbar is not None:
+            # 预处理：获取所有段落的最优缩放因子
+            self.preprocess_document(document, pbar)
+        for page in document.page:
+            self.translation_config.raise_if_cancelled()
+            self.render_page(page)
+            if pbar is not None:
+                pbar.advance()
+
+    def _typesetting_pages_in_pool(
+        self, document: il_version_1.Document, pbar, workers: int
+    ):
+        """在进程池中排版，每个工作进程使用自己的 FontMapper
+
+        各页之间只共享缩放因子的众数：先并行预处理各页，由主进程汇总众数，
+        再并行排版。页面以 binary_codec 编码在进程间传递，排版后的页面替换
+        document.page 中的原页面。
+        """
+        config = self.translation_config
+        executor = get_worker_pool(TYPESETTING_POOL_NAME, workers)
+        chunks = split_for_workers(document.page, workers)
+
+        if pbar is not None:
+            all_scales: list[float] = []
+            all_paragraphs: list[il_version_1.PdfParagraph] = []
+            futures = [
+                executor.submit(
+                    _preprocess_pages_worker,
+                    config,
+                    binary_codec.encode_list(il_version_1.Page, chunk),
+                )
+                for chunk in chunks
+            ]
+            for chunk, results in zip(chunks, _results(futures, config), strict=True):
+                for page, (scales, unit_counts) in zip(chunk, results, strict=True):
+                    for paragraph, scale, unit_count in zip(
+                        page.pdf_paragraph, scales, unit_counts, strict=True
+                    ):
+                        paragraph.optimal_scale = scale
+                        all_paragraphs.append(paragraph)
+                        if scale is not None:
+                            all_scales.extend([scale] * unit_count)
+                pbar.advance(len(chunk))
+            self._limit_to_mode_scale(all_paragraphs, all_scales)
+
+        futures = [
+            executor.submit(
+                _render_pages_worker,
+                config,
+                binary_codec.encode_list(il_version_1.Page, chunk),
+            )
+            for chunk in chunks
+        ]
+        typeset_pages = []
+        for chunk, pages_data in zip(chunks, _results(futures, config), strict=True):
+            typeset_pages.extend(binary_codec.decode(pages_data))
+            if pbar is not None:
+                pbar.advance(len(chunk))
+        document.page[:] = typeset_pages
 
     def render_page(self, page: il_version_1.Page):
         fonts: dict[
@@ -1325,7 +1728,8 @@ class Typesetting:
             logger.warning(
                 f"Failed to adjust paragraph positions on page {page.page_number}: {e}"
             )
-        # 开始实际的渲染过程
+        # 开始实际的渲染过程，段落的边界框在上面可能已被调整
+        self.reset_free_space_index()
         for paragraph in page.pdf_paragraph:
             self.render_paragraph(paragraph, page, fonts)
 
@@ -1541,21 +1945,6 @@ class Typesetting:
             debug_info=getattr(char, 'debug_info', False),
         )
 
-    def _get_width_before_next_break_point(
-        self, typesetting_units: list[TypesettingUnit], scale: float
-    ) -> float:
-        if not typesetting_units:
-            return 0
-        if typesetting_units[0].can_break_line:
-            return 0
-
-        total_width = 0
-        for unit in typesetting_units:
-            if unit.can_break_line:
-                return total_width * scale
-            total_width += unit.width
-        return total_width * scale
-
     def _layout_typesetting_units(
         self,
         typesetting_units: list[TypesettingUnit],
@@ -1564,6 +1953,7 @@ class Typesetting:
         line_skip: float,
         paragraph: il_version_1.PdfParagraph,
         use_english_line_break: bool = True,
+        metrics: ParagraphMetrics | None = None,
     ) -> tuple[list[TypesettingUnit], bool]:
         """布局排版单元 (Refactored with Line Buffering)。
 
@@ -1571,193 +1961,207 @@ class Typesetting:
             typesetting_units: 要布局的排版单元列表
             box: 布局边界框
             scale: 缩放因子
+            metrics: typesetting_units 的 ParagraphMetrics，不传时现算
 
         Returns:
             tuple[list[TypesettingUnit], bool]: (已布局的排版单元列表，是否所有单元都放得下)
         """
         if not typesetting_units:
             return [], True
+        if metrics is None:
+            metrics = ParagraphMetrics(typesetting_units)
 
         # Constants
         FORMULA_PADDING = 3.0 * scale
-        
+
         # Initialize
         current_y_top = box.y2  # Start from top of box
-        
-        # Buffers
-        line_units = []
-        current_line_width = 0.0
-        if paragraph.first_line_indent:
-             # Space width estimation
-             font_sizes = [u.font_size for u in typesetting_units if u.font_size] or [10.0]
-             avg_fs = sum(font_sizes)/len(font_sizes) if font_sizes else 10.0
-             indent_width = (avg_fs * scale * 0.5) * 4
-             current_line_width += indent_width
-        
         typeset_units = []
         all_units_fit = True
-        
-        # Calculate space width for estimation
-        base_font_size = 10.0
-        if typesetting_units:
-             sizes = [u.font_size for u in typesetting_units if u.font_size]
-             if sizes:
-                 base_font_size = sizes[0] # Approximation
-        
-        space_width = (
-            self.font_mapper.base_font.char_lengths(" ", base_font_size * scale)[0]
+
+        lines = self._break_lines(
+            metrics, box, scale, paragraph.first_line_indent, use_english_line_break
         )
+        for line_number, (start, end) in enumerate(lines):
+            processed_units, next_y_top = self._flush_line(
+                typesetting_units[start:end],
+                box,
+                current_y_top,
+                scale,
+                line_skip,
+                FORMULA_PADDING,
+                paragraph.first_line_indent and line_number == 0,
+            )
+            typeset_units.extend(processed_units)
+
+            # Check vertical overflow
+            # Logic: next_y_top is the TOP of the NEXT line.
+            # If the BOTTOM of the CURRENT line was below box.y, we have an issue.
+            if processed_units:
+                lowest_y = min(u.box.y for u in processed_units)
+                if lowest_y < box.y:
+                    all_units_fit = False
+
+            current_y_top = next_y_top
+
+        return typeset_units, all_units_fit
+
+    def _measure_layout(
+        self,
+        metrics: ParagraphMetrics,
+        box: Box,
+        scale: float,
+        line_skip: float,
+        first_line_indent: bool | None,
+        use_english_line_break: bool = True,
+    ) -> bool:
+        """Whether the units fit in ``box`` at ``scale``.
+
+        Breaks lines and places them exactly like _layout_typesetting_units,
+        but doesn't relocate the units: only the vertical position of each
+        line is needed to tell whether it overflows the box.
+        """
+        if not metrics.units:
+            return True
+
+        current_y_top = box.y2
+        lines = self._break_lines(
+            metrics, box, scale, first_line_indent, use_english_line_break
+        )
+        for line_number, (start, end) in enumerate(lines):
+            heights = [
+                metrics.heights[i] * scale
+                for i in range(start, end)
+                if not metrics.is_space[i]
+            ]
+            current_y_top = self._line_bottom(
+                heights,
+                current_y_top,
+                scale,
+                line_skip,
+                first_line_indent and line_number == 0,
+            )
+            lowest_y = current_y_top
+            if metrics.has_formula:
+                lowest_y = min(
+                    0.0 if offset is None else current_y_top + offset * scale
+                    for offset in metrics.bottom_offsets[start:end]
+                )
+            if lowest_y < box.y:
+                return False
+        return True
+
+    def _break_lines(
+        self,
+        metrics: ParagraphMetrics,
+        box: Box,
+        scale: float,
+        first_line_indent: bool | None,
+        use_english_line_break: bool = True,
+    ) -> list[tuple[int, int]]:
+        """把排版单元分行
+
+        Returns:
+            每一行的 (起始下标，结束下标)
+        """
+        typesetting_units = metrics.units
+        box_width = box.x2 - box.x
+        formula_padding = 3.0 * scale
+
+        lines = []
+        line_start = 0
+        current_line_width = 0.0
+        if first_line_indent:
+            # Space width estimation
+            indent_width = (metrics.average_font_size * scale * 0.5) * 4
+            current_line_width += indent_width
+
+        # Calculate space width for estimation
+        space_width = self.font_mapper.base_font.char_lengths(
+            " ", metrics.first_font_size * scale
+        )[0]
 
-        
-        # 1. Main Layout Loop (Buffering)
         idx = 0
         while idx < len(typesetting_units):
-            unit = typesetting_units[idx]
-            
-            # Calculate unit dimensions
-            unit_width = unit.width * scale
-            unit_height = unit.height * scale
-            
-            # Add padding for formulas
-            extra_width = 0.0
-            if unit.formular:
-                extra_width = FORMULA_PADDING * 2
-            
-            total_unit_width = unit_width + extra_width
-            
+            # Calculate unit dimensions, with padding for formulas
+            total_unit_width = metrics.widths[idx] * scale
+            if metrics.is_formula[idx]:
+                total_unit_width += formula_padding * 2
+
             # Check for English line break lookahead
             width_lookahead = 0.0
             if use_english_line_break:
-                width_lookahead = self._get_width_before_next_break_point(
-                    typesetting_units[idx:], scale
-                )
-            
-            # Check mixed char spacing (simplified for lookahead)
-            # strictly, we should check previous unit in buffer, but simplified here
-            
-            # 2. Determine Line Break
+                width_lookahead = metrics.width_before_next_break[idx] * scale
+
             # If adding this unit (plus lookahead) exceeds box width...
             # OR if logic enforces break
-            should_break = False
-            
-            if not unit.is_hung_punctuation and (
-                (current_line_width + total_unit_width > (box.x2 - box.x))
-                or (use_english_line_break and current_line_width + total_unit_width + width_lookahead > (box.x2 - box.x))
-                or (unit.is_cannot_appear_in_line_end_punctuation and current_line_width + total_unit_width * 2 > (box.x2 - box.x))
-            ):
-                 should_break = True
-            
-            if should_break:
-                # 3. Process the Buffered Line
-                if not line_units and not paragraph.first_line_indent:
-                     # Determine if single unit is too wide to fit at all? 
-                     # For now, if line is empty, we force at least one unit unless it's huge
-                     pass
-                
-                if not line_units:
-                     # Force at least one unit to prevent infinite loop if a word is too long
-                     line_units.append(unit)
-                     current_line_width += total_unit_width
-                     idx += 1
-                
-                # FLUSH LINE
-                processed_units, next_y_top = self._flush_line(
-                    line_units, box, current_y_top, scale, line_skip, FORMULA_PADDING, paragraph.first_line_indent and len(typeset_units)==0
+            if not metrics.is_hung_punctuation[idx] and (
+                (current_line_width + total_unit_width > box_width)
+                or (
+                    use_english_line_break
+                    and current_line_width + total_unit_width + width_lookahead
+                    > box_width
                 )
-                
-                typeset_units.extend(processed_units)
-                
-                # Check vertical overflow
-                # Logic: next_y_top is the TOP of the NEXT line.
-                # If the BOTTOM of the CURRENT line was below box.y, we have an issue.
-                # But _flush_line calculates positions.
-                # Let's verify processed_units positions.
-                if processed_units:
-                    lowest_y = min(u.box.y for u in processed_units)
-                    if lowest_y < box.y:
-                        all_units_fit = False
-                
-                # Reset for next line
-                current_y_top = next_y_top
-                line_units = []
+                or (
+                    metrics.is_cannot_appear_in_line_end_punctuation[idx]
+                    and current_line_width + total_unit_width * 2 > box_width
+                )
+            ):
+                if idx == line_start:
+                    # Force at least one unit to prevent infinite loop if a word is too long
+                    idx += 1
+                lines.append((line_start, idx))
+                line_start = idx
                 current_line_width = 0.0
-                
-                # Note: If we forced the unit into the line, idx was incremented.
-                # If we broke BEFORE the unit, idx is valid for next line.
             else:
-                # Add to buffer
-                line_units.append(unit)
                 current_line_width += total_unit_width
-                
                 # Add mixed-char spacing approximation
-                if len(line_units) > 1:
-                     last = line_units[-2]
-                     curr = line_units[-1]
-                     if last.is_cjk_char ^ curr.is_cjk_char and not last.is_space and not curr.is_space: # Simplified
-                          current_line_width += space_width * 0.5
-                
+                if (
+                    idx > line_start
+                    and metrics.is_cjk_char[idx - 1] ^ metrics.is_cjk_char[idx]
+                    and not metrics.is_space[idx - 1]
+                    and not metrics.is_space[idx]
+                ):
+                    current_line_width += space_width * 0.5
                 idx += 1
 
-        # 4. Flush Remaining Units (Last Line)
-        if line_units:
-             processed_units, next_y_top = self._flush_line(
-                    line_units, box, current_y_top, scale, line_skip, FORMULA_PADDING, paragraph.first_line_indent and len(typeset_units)==0
-                )
-             typeset_units.extend(processed_units)
-             if processed_units:
-                lowest_y = min(u.box.y for u in processed_units)
-                if lowest_y < box.y:
-                    all_units_fit = False
-
-        return typeset_units, all_units_fit
-
-    def _flush_line(self, line_units, box, y_top, scale, line_skip, formula_padding, is_first_line):
-        """Helper to position units in a single line and calculate next Y position."""
-        if not line_units:
-            return [], y_top
+        # Remaining units (last line)
+        if line_start < len(typesetting_units):
+            lines.append((line_start, len(typesetting_units)))
+        return lines
 
-        # Calculate line stats
-        heights = [u.height * scale for u in line_units if not u.is_space]
+    def _line_bottom(self, heights, y_top, scale, line_skip, is_first_line) -> float:
+        """Y of the bottom of a line whose units (without spaces) have ``heights``."""
         if not heights:
-             heights = [10.0 * scale] # Fallback
-        
+            heights = [10.0 * scale]  # Fallback
+
         max_height = max(heights)
         try:
             mode_height = statistics.mode(heights)
         except:
             mode_height = sum(heights)/len(heights)
-            
-        # Determine Baseline Y for this line
-        # We align text to the bottom-left.
-        # But symbols might go lower (descent).
-        # Standard approach: y_bottom = y_top - max_height.
-        # But we want consistent line spacing.
-        
+
         # Let's say y_top is the ascender line of the previous line (or box top).
         # We want to place the current line such that its CONTENT fits below y_top.
-        # current_y_bottom = y_top - max_height
-        
-        # HOWEVER, the surrounding logic expects strict line spacing.
-        # Gap = max(mode_height * line_skip, max_height * 1.05)
-        # We need to subtract this gap from the PREVIOUS BASELINE to get CURRENT BASELINE?
-        # Or subtract height from y_top?
-        
-        # Let's use the line_skip logic to determine the separation from the PREVIOUS line.
-        # But for the FIRST line, we just drop by max_height.
-        
+        # For the FIRST line, we just drop by max_height; the next ones are
+        # separated from the previous line by the line_skip.
         if is_first_line:
-             current_y_bottom = y_top - max_height
-        else:
-             # Calculate gap based on this line's content (to accommodate tall formulas) including the previous line?
-             # No, standard leading is based on current font size.
-             spacing = max(mode_height * line_skip, max_height * 1.05)
-             # Wait, y_top passed here is the TOP of the *available space*? 
-             # No, in the loop: current_y_top = next_y_top.
-             # Ideally y_top is the Y-coordinate of the BASELINE of the previous line?
-             # The original code maintained `current_y` as the baseline position.
-             
-             # If `y_top` is the previous baseline:
-             current_y_bottom = y_top - spacing
+            return y_top - max_height
+        # Gap based on this line's content (to accommodate tall formulas).
+        # y_top is the baseline of the previous line here.
+        spacing = max(mode_height * line_skip, max_height * 1.05)
+        return y_top - spacing
+
+    def _flush_line(self, line_units, box, y_top, scale, line_skip, formula_padding, is_first_line):
+        """Helper to position units in a single line and calculate next Y position."""
+        if not line_units:
+            return [], y_top
+
+        # Determine Baseline Y for this line
+        heights = [u.height * scale for u in line_units if not u.is_space]
+        current_y_bottom = self._line_bottom(
+            heights, y_top, scale, line_skip, is_first_line
+        )
         
         # Place units
         current_x = box.x
@@ -1925,6 +2329,18 @@ class Typesetting:
                 )
         return composition
 
+    def get_free_space_index(self, page: il_version_1.Page) -> FreeSpaceIndex:
+        """页面的 FreeSpaceIndex，每页只建一次
+
+        开始处理一页（或改动了其中段落的边界框）时要先调用 reset_free_space_index
+        """
+        if self._free_space_index is None or self._free_space_index.page is not page:
+            self._free_space_index = FreeSpaceIndex(page)
+        return self._free_space_index
+
+    def reset_free_space_index(self):
+        self._free_space_index = None
+
     def get_max_right_space(self, current_box: Box, page) -> float:
         """获取段落右侧最大可用空间
 
@@ -1938,28 +2354,9 @@ class Typesetting:
         # 获取页面的裁剪框作为初始最大限制
         max_x = page.cropbox.box.x2 * 0.9
 
-        # 检查所有可能的阻挡元素
-        for para in page.pdf_paragraph:
-            if para.box == current_box or para.box is None:  # 跳过当前段落
-                continue
-            # 只考虑在当前段落右侧且有垂直重叠的元素
-            if para.box.x > current_box.x and not (
-                para.box.y >= current_box.y2 or para.box.y2 <= current_box.y
-            ):
-                max_x = min(max_x, para.box.x)
-        for char in page.pdf_character:
-            if char.box.x > current_box.x and not (
-                char.box.y >= current_box.y2 or char.box.y2 <= current_box.y
-            ):
-                max_x = min(max_x, char.box.x)
-        # 检查图形
-        for figure in page.pdf_figure:
-            if figure.box.x > current_box.x and not (
-                figure.box.y >= current_box.y2 or figure.box.y2 <= current_box.y
-            ):
-                max_x = min(max_x, figure.box.x)
-
-        return max_x
+        # 检查所有可能的阻挡元素：段落、字符和图形
+        # 只考虑在当前段落右侧且有垂直重叠的元素
+        return self.get_free_space_index(page).max_right_space(current_box, max_x)
 
     def get_max_bottom_space(self, current_box: Box, page: il_version_1.Page) -> float:
         """获取段落下方最大可用空间
@@ -1974,28 +2371,9 @@ class Typesetting:
         # 获取页面的裁剪框作为初始最小限制
         min_y = page.cropbox.box.y * 1.1
 
-        # 检查所有可能的阻挡元素
-        for para in page.pdf_paragraph:
-            if para.box == current_box or para.box is None:  # 跳过当前段落
-                continue
-            # 只考虑在当前段落下方且有水平重叠的元素
-            if para.box.y2 < current_box.y and not (
-                para.box.x >= current_box.x2 or para.box.x2 <= current_box.x
-            ):
-                min_y = max(min_y, para.box.y2)
-        for char in page.pdf_character:
-            if char.box.y2 < current_box.y and not (
-                char.box.x >= current_box.x2 or char.box.x2 <= current_box.x
-            ):
-                min_y = max(min_y, char.box.y2)
-        # 检查图形
-        for figure in page.pdf_figure:
-            if figure.box.y2 < current_box.y and not (
-                figure.box.x >= current_box.x2 or figure.box.x2 <= current_box.x
-            ):
-                min_y = max(min_y, figure.box.y2)
-
-        return min_y
+        # 检查所有可能的阻挡元素：段落、字符和图形
+        # 只考虑在当前段落下方且有水平重叠的元素
+        return self.get_free_space_index(page).max_bottom_space(current_box, min_y)
 
     def _update_paragraph_render_order(self, paragraph: il_version_1.PdfParagraph):
         """
@@ -32,6 +32,38 @@ class PrimaryFontFamily(enum.IntEnum):
             return cls.NONE
 
 
+@functools.cache
+def load_font(font_file_name: str) -> pymupdf.Font:
+    """Load an embedded font once per process.
+
+    Verifying and opening the font files dominates FontMapper construction,
+    and every pipeline stage builds its own FontMapper, so the loaded
+    ``pymupdf.Font`` objects are shared between instances.
+    """
+    font_path, font_metadata = assets.get_font_and_metadata(font_file_name)
+    pymupdf_font = pymupdf.Font(fontfile=str(font_path))
+    pymupdf_font.has_glyph = functools.lru_cache(maxsize=10240, typed=True)(
+        pymupdf_font.has_glyph,
+    )
+    pymupdf_font.char_lengths = functools.lru_cache(maxsize=10240, typed=True)(
+        pymupdf_font.char_lengths,
+    )
+    pymupdf_font.font_id = font_file_name
+    pymupdf_font.font_path = font_path
+    pymupdf_font.ascent_fontmap = font_metadata["ascent"]
+    pymupdf_font.descent_fontmap = font_metadata["descent"]
+    pymupdf_font.encoding_length = font_metadata["encoding_length"]
+    return pymupdf_font
+
+
+def preload_font_family(lang_code: str):
+    """Load every font used for ``lang_code`` into the process-wide cache."""
+    font_family = assets.get_font_family(lang_code)
+    for k in ("normal", "script", "fallback", "base"):
+        for font_file_name in font_family[k]:
+            load_font(font_file_name)
+
+
 class FontMapper:
     stage_name = "Add Fonts"
 
@@ -62,23 +94,9 @@ class FontMapper:
         for font_file_name in self.font_file_names:
             if font_file_name in self.fontid2fontpath:
                 continue
-            font_path, font_metadata = assets.get_font_and_metadata(font_file_name)
-            pymupdf_font = pymupdf.Font(fontfile=str(font_path))
-            pymupdf_font.has_glyph = functools.lru_cache(maxsize=10240, typed=True)(
-                pymupdf_font.has_glyph,
-            )
-            pymupdf_font.char_lengths = functools.lru_cache(maxsize=10240, typed=True)(
-                pymupdf_font.char_lengths,
-            )
+            pymupdf_font = load_font(font_file_name)
             self.fonts[font_file_name] = pymupdf_font
-            self.fontid2fontpath[font_file_name] = font_path
-            self.fonts[font_file_name].font_id = font_file_name
-            self.fonts[font_file_name].font_path = font_path
-            self.fonts[font_file_name].ascent_fontmap = font_metadata["ascent"]
-            self.fonts[font_file_name].descent_fontmap = font_metadata["descent"]
-            self.fonts[font_file_name].encoding_length = font_metadata[
-                "encoding_length"
-            ]
+            self.fontid2fontpath[font_file_name] = pymupdf_font.font_path
 
         self.normal_font_ids: list[str] = font_family["normal"]
         self.script_font_ids: list[str] = font_family["script"]
@@ -322,3 +340,33 @@ class FontMapper:
                 for xobj in page.pdf_xobject:
                     xobj.pdf_font.extend(pdf_fonts)
                 pbar.advance(1)
+
+
+# The FontMappers of a pool worker process, kept with their glyph caches for
+# the later pages and documents the worker gets
+_worker_font_mappers: dict[tuple[str, str | None], FontMapper] = {}
+
+
+def get_worker_font_mapper(translation_config: TranslationConfig) -> FontMapper:
+    """The FontMapper this process keeps for the fonts of ``translation_config``.
+
+    Only for typesetting and rendering; ``add_font`` reports progress to the
+    config the mapper was first created with.
+    """
+    key = (translation_config.lang_out, translation_config.primary_font_family)
+    font_mapper = _worker_font_mappers.get(key)
+    if font_mapper is None:
+        font_mapper = FontMapper(translation_config)
+        _worker_font_mappers[key] = font_mapper
+    return font_mapper
+
+
+def set_worker_font_mapper(
+    translation_config: TranslationConfig, font_mapper: FontMapper
+):
+    """Use ``font_mapper`` for the fonts of ``translation_config`` in this process.
+
+    Pool workers forked after this call inherit it.
+    """
+    key = (translation_config.lang_out, translation_config.primary_font_family)
+    _worker_font_mappers[key] = font_mapper
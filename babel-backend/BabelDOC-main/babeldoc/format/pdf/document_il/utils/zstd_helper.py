@@ -19,3 +19,13 @@ def zstd_decompress(data) -> str:
         raise TypeError(f"data must be str or bytes, not {type(data)}")
 
     return pyzstd.decompress(base64.b85decode(data)).decode()
+
+
+def zstd_decompress_bytes(data) -> bytes:
+    """Like zstd_decompress, without decoding the result."""
+    if isinstance(data, str):
+        data = data.encode()
+    if not isinstance(data, bytes):
+        raise TypeError(f"data must be str or bytes, not {type(data)}")
+
+    return pyzstd.decompress(base64.b85decode(data))
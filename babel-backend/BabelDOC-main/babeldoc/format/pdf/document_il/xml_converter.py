@@ -7,6 +7,7 @@ from xsdata.formats.dataclass.parsers import XmlParser
 from xsdata.formats.dataclass.serializers import XmlSerializer
 from xsdata.formats.dataclass.serializers.config import SerializerConfig
 
+from babeldoc.format.pdf.document_il import binary_codec
 from babeldoc.format.pdf.document_il import il_version_1
 
 
@@ -49,3 +50,10 @@ class XMLConverter:
     def write_json(self, document: il_version_1.Document, path: str):
         with Path(path).open("w", encoding="utf-8") as f:
             f.write(self.to_json(document))
+
+    def write_binary(self, document: il_version_1.Document, path: str):
+        """Write the compact zstd-compressed msgpack form, see binary_codec."""
+        binary_codec.write_document(document, path)
+
+    def read_binary(self, path: str) -> il_version_1.Document:
+        return binary_codec.read_document(path)
@@ -1,16 +1,19 @@
 import asyncio
 import concurrent.futures
+import contextlib
 import copy
 import hashlib
 import io
 import os
 import logging
+import mmap
 import pathlib
 import re
 import shutil
 import threading
 import time
 from asyncio import CancelledError
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 from typing import BinaryIO
@@ -28,7 +31,12 @@ from babeldoc.babeldoc_exception.BabelDOCException import (
 from babeldoc.const import CACHE_FOLDER
 from babeldoc.const import WATERMARK_VERSION
 from babeldoc.const import close_process_pool
+from babeldoc.const import close_worker_pool
+from babeldoc.const import get_worker_pool
+from babeldoc.format.pdf import il_cache
+from babeldoc.format.pdf.checkpoint import StageCheckpoint
 from babeldoc.format.pdf.converter import TranslateConverter
+from babeldoc.format.pdf.document_il import binary_codec
 from babeldoc.format.pdf.document_il import il_version_1
 from babeldoc.format.pdf.document_il.backend.pdf_creater import SAVE_PDF_STAGE_NAME
 from babeldoc.format.pdf.document_il.backend.pdf_creater import SUBSET_FONT_STAGE_NAME
@@ -64,6 +72,11 @@ from babeldoc.pdfminer.pdfinterp import PDFResourceManager
 from babeldoc.pdfminer.pdfpage import PDFPage
 from babeldoc.pdfminer.pdfparser import PDFParser
 from babeldoc.progress_monitor import ProgressMonitor
+from babeldoc.progress_monitor import ScopedProgressMonitor
+from babeldoc.translator.cache import get_cache_backend
+from babeldoc.translator.cache import set_cache_backend
+from babeldoc.translator.translator import get_translate_rate_limiter
+from babeldoc.translator.translator import install_translate_rate_limiter
 from babeldoc.utils import memory
 
 logger = logging.getLogger(__name__)
@@ -85,6 +98,20 @@ TRANSLATE_STAGES = [
     (SAVE_PDF_STAGE_NAME, 6.34),  # Save PDF
 ]
 
+# Stages that do not depend on the target language; a multi-target run does
+# them once and forks the IL per language afterwards.
+MULTI_TARGET_SHARED_STAGES = {
+    ILCreater.stage_name,
+    DetectScannedFile.stage_name,
+    LayoutParser.stage_name,
+    TableParser.stage_name,
+    ParagraphFinder.stage_name,
+    StylesAndFormulas.stage_name,
+}
+
+# Serializes pymupdf work (typesetting, PDF generation) between target languages
+_render_lock = threading.Lock()
+
 resfont_map = {
     "zh-cn": "china-ss",
     "zh-tw": "china-ts",
@@ -96,6 +123,16 @@ resfont_map = {
 }
 
 
+@dataclass
+class ParsedDocument:
+    """The IL of a document together with the working PDF it was parsed from."""
+
+    docs: il_version_1.Document
+    temp_pdf_path: Path
+    mupdf: Document
+    mediabox_data: dict[int, Any]
+
+
 def safe_save(doc, *args, **kwargs):
     try:
         # first try, saving without options
@@ -366,9 +403,7 @@ def start_parse_il(
     
     parser = PDFParser(inf)
     doc = PDFDocument(parser)
-    all_pages = list(PDFPage.create_pages(doc))
-    
-    total_pages = len(all_pages)
+    total_pages = PDFPage.count_pages(doc)
     il_creater.on_total_pages(total_pages)
     
     # Logic to filter pages
@@ -388,10 +423,7 @@ def start_parse_il(
     # Parallelize parsing if we have multiple pages and workers
     # If we are already in a sub-process (part processing), we might still want some parallelism
     # but we should be careful. 
-    inf.seek(0)  # Reset file position after initial parsing
-    pdf_bytes = inf.read()
-    
-    if max_workers > 1 and len(page_indices) > 2:
+    if max_workers > 1 and len(page_indices) > 2 and not _in_part_worker:
         logger.info(f"Parallel parsing {len(page_indices)} pages with {max_workers} processes")
         
         # Store results in a dict to merge later
@@ -403,57 +435,61 @@ def start_parse_il(
         chunks = [page_indices[i:i + chunk_size] for i in range(0, len(page_indices), chunk_size)]
         
         try:
-            with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
-                # We pass pdf_bytes once for each chunk. 
-                # To ensure unique xobj_ids and render_orders, we use offsets based on page index.
-                # Assuming max 10,000 xobjects per page and 1,000,000 render items per page.
-                futures = {}
-                for chunk in chunks:
-                    start_page_idx = chunk[0]
-                    # This offset strategy ensures that workers create disjoint sets of IDs
-                    start_xobj_id = start_page_idx * 10000
-                    start_render_order = start_page_idx * 1000000
-                    
-                    f = executor.submit(
-                        _parse_pages_worker, 
-                        pdf_bytes, 
-                        chunk, 
-                        translation_config,
-                        start_xobj_id,
-                        start_render_order
-                    )
-                    futures[f] = chunk
+            # Workers map the PDF file instead of receiving a copy of it
+            source_path = _get_parse_source_path(inf, translation_config)
+            executor = get_worker_pool("parse", max_workers)
+            # To ensure unique xobj_ids and render_orders, we use offsets based on page index.
+            # Assuming max 10,000 xobjects per page and 1,000,000 render items per page.
+            futures = {}
+            for chunk in chunks:
+                start_page_idx = chunk[0]
+                # This offset strategy ensures that workers create disjoint sets of IDs
+                start_xobj_id = start_page_idx * 10000
+                start_render_order = start_page_idx * 1000000
                 
-                for future in concurrent.futures.as_completed(futures):
-                    chunk_indices = futures[future]
-                    try:
-                        pages_list, x_map, p_patch, s_context, err = future.result()
-                        if err:
-                            logger.error(f"Error in parallel parsing chunk {chunk_indices}: {err}")
-                            raise Exception(err)
-                        
-                        logger.info(f"Received {len(pages_list) if pages_list else 0} pages from chunk {chunk_indices}")
-                        if pages_list:
-                            for p in pages_list:
-                                logger.info(f"  Page {p.page_number}: {len(p.pdf_character)} chars")
-                        
-                        # Store pages with their indices
-                        for idx, p_obj in zip(chunk_indices, pages_list):
-                            results_dict[idx] = p_obj
-                            
-                        # Merge xobj_map and obj_patch
-                        if x_map:
-                            il_creater.xobj_map.update(x_map)
-                        if p_patch:
-                            obj_patch.update(p_patch)
+                f = executor.submit(
+                    _parse_pages_worker, 
+                    source_path, 
+                    chunk, 
+                    translation_config,
+                    start_xobj_id,
+                    start_render_order
+                )
+                futures[f] = chunk
+            
+            for future in concurrent.futures.as_completed(futures):
+                chunk_indices = futures[future]
+                try:
+                    pages_data, x_map, p_patch, s_context, err = future.result()
+                    if err:
+                        logger.error(f"Error in parallel parsing chunk {chunk_indices}: {err}")
+                        raise Exception(err)
+                    pages_list = binary_codec.decode(pages_data)
+                    
+                    logger.info(f"Received {len(pages_list) if pages_list else 0} pages from chunk {chunk_indices}")
+                    if pages_list:
+                        for p in pages_list:
+                            logger.info(f"  Page {p.page_number}: {len(p.pdf_character)} chars")
+                    
+                    # Store pages with their indices
+                    for p_obj in pages_list:
+                        results_dict[p_obj.page_number] = p_obj
                         
-                        # Merge shared context (statistics)
-                        if s_context and translation_config.shared_context_cross_split_part:
-                            translation_config.shared_context_cross_split_part.merge(s_context)
-
-                    except Exception as e:
-                        logger.error(f"Failed to parse chunk {chunk_indices}: {e}")
-                        raise
+                    # Merge xobj_map and obj_patch
+                    if x_map:
+                        il_creater.xobj_map.update(x_map)
+                    if p_patch:
+                        obj_patch.update(p_patch)
+                    
+                    # Merge shared context (statistics)
+                    if s_context and translation_config.shared_context_cross_split_part:
+                        translation_config.shared_context_cross_split_part.merge(s_context)
+
+                except Exception as e:
+                    logger.error(f"Failed to parse chunk {chunk_indices}: {e}")
+                    for other in futures:
+                        other.cancel()
+                    raise
             
             # Merge results in order
             for idx in sorted(page_indices):
@@ -470,16 +506,15 @@ def start_parse_il(
             il_creater.on_finish()
             return
         except Exception as e:
+            if isinstance(e, concurrent.futures.BrokenExecutor):
+                close_worker_pool("parse")
             logger.error(f"Parallel parsing failed, falling back to serial: {e}")
             # fall through to serial logic
-            inf.seek(0)
-            pdf_bytes = inf.read() # refresh maybe?
     
     # Original serial logic as fallback
     inf.seek(0)
     parser = PDFParser(inf)
     doc = PDFDocument(parser)
-    all_pages = list(PDFPage.create_pages(doc))
     
     device = TranslateConverter(
         rsrcmgr, vfont, vchar, thread, layout, lang_in, lang_out,
@@ -488,30 +523,41 @@ def start_parse_il(
     )
     interpreter = PDFPageInterpreterEx(rsrcmgr, device, obj_patch, il_creater)
 
-    for pageno in page_indices:
-        page = all_pages[pageno]
+    for pageno, page in PDFPage.create_pages_by_index(doc, page_indices):
         if cancellation_event and cancellation_event.is_set():
             raise CancelledError("task cancelled")
-            
-        page.pageno = pageno
-        il_creater.on_page_start()
-        il_creater.on_page_number(pageno)
-        
-        mediabox = page.mediabox
-        if mediabox:
-            il_creater.on_page_media_box(mediabox[0], mediabox[1], mediabox[2], mediabox[3])
-        cropbox = page.cropbox
-        if cropbox:
-            il_creater.on_page_crop_box(cropbox[0], cropbox[1], cropbox[2], cropbox[3])
-            
-        ops_base = interpreter.process_page(page)
-        il_creater.on_page_base_operation(ops_base)
-        il_creater.on_page_end()
+        _parse_page(interpreter, il_creater, page, pageno)
     
     il_creater.on_finish()
     device.close()
 
 
+def _parse_page(
+    interpreter: PDFPageInterpreterEx, il_creater: ILCreater, page: PDFPage, pageno: int
+):
+    """Add the IL page of one PDF page to ``il_creater``."""
+    page.pageno = pageno
+    # process_page starts the IL page and sets its (rotated) crop box
+    ops_base = interpreter.process_page(page)
+    il_creater.on_page_number(pageno)
+    mediabox = page.mediabox
+    if mediabox:
+        il_creater.on_page_media_box(mediabox[0], mediabox[1], mediabox[2], mediabox[3])
+    il_creater.on_page_base_operation(ops_base)
+    il_creater.on_page_end()
+
+
+def _get_parse_source_path(inf: BinaryIO, translation_config: TranslationConfig) -> str:
+    """A file with the content of ``inf`` that parse workers can map."""
+    name = getattr(inf, "name", None)
+    if isinstance(name, str) and Path(name).is_file():
+        return name
+    path = translation_config.get_working_file_path("parse_source.pdf")
+    inf.seek(0)
+    with path.open("wb") as f:
+        shutil.copyfileobj(inf, f)
+    return str(path)
+
 
 def translate(translation_config: TranslationConfig) -> TranslateResult:
     with ProgressMonitor(get_translation_stage(translation_config)) as pm:
@@ -601,21 +647,32 @@ async def async_translate(translation_config: TranslationConfig):
         CancelledError: If the translation is cancelled
         Exception: Any other errors during translation
     """
+    async for event in _async_run_translation(
+        get_translation_stage(translation_config),
+        do_translate,
+        translation_config,
+        translation_config.report_interval,
+    ):
+        yield event
+
+
+async def _async_run_translation(stages, do_translate_fn, config_arg, report_interval):
+    """Run ``do_translate_fn(pm, config_arg)`` in an executor, yielding its events."""
     loop = asyncio.get_running_loop()
     callback = asynchronize.AsyncCallback()
 
     finish_event = asyncio.Event()
     cancel_event = threading.Event()
     with ProgressMonitor(
-        get_translation_stage(translation_config),
+        stages,
         progress_change_callback=callback.step_callback,
         finish_callback=callback.finished_callback,
         finish_event=finish_event,
         cancel_event=cancel_event,
         loop=loop,
-        report_interval=translation_config.report_interval,
+        report_interval=report_interval,
     ) as pm:
-        future = loop.run_in_executor(None, do_translate, pm, translation_config)
+        future = loop.run_in_executor(None, do_translate_fn, pm, config_arg)
         try:
             async for event in callback:
                 event = event.kwargs
@@ -781,6 +838,23 @@ def update_page_bbox(doc, page, box, key):
         doc.xref_set_key(page.xref, key, f"[{box.x0} {box.y0} {box.x1} {box.y1}]")
 
 
+# Set in part worker processes: the parts already run in parallel, so they
+# parse and typeset serially instead of each starting process pools of their own
+_in_part_worker = False
+
+
+def _init_part_worker(rate_limiter, layout_model, cache_backend):
+    """Initializer of the part worker processes."""
+    global _in_part_worker
+    _in_part_worker = True
+    install_translate_rate_limiter(rate_limiter)
+    set_cache_backend(cache_backend)
+    # Load the layout model once per worker instead of once per part; the
+    # instances sent with each part reuse the loaded session
+    if layout_model is not None:
+        layout_model.warm_up()
+
+
 def _translate_part_worker(i, split_point, part_config, translator, term_translator, layout_model):
     """Worker function for parallel part translation."""
     try:
@@ -792,6 +866,7 @@ def _translate_part_worker(i, split_point, part_config, translator, term_transla
         part_config.translator = translator
         part_config.term_extraction_translator = term_translator
         part_config.doc_layout_model = layout_model
+        part_config.typesetting_workers = None
         
         # We need a progress monitor, but we can't easily sync it back to parent.
         # So we use a silent one or a mock.
@@ -802,78 +877,70 @@ def _translate_part_worker(i, split_point, part_config, translator, term_transla
         return i, result, part_config.shared_context_cross_split_part, None
     except Exception as e:
         logger.exception(f"Error in worker process for part {i}")
-        return i, None, str(e)
+        return i, None, None, str(e)
+
+
+@contextlib.contextmanager
+def _open_parse_source(source_path: str):
+    """Open the source PDF for one chunk of pages.
+
+    The documents are closed when the chunk is done: the persistent parse
+    workers outlive the parse, and the file may be in a temporary working
+    dir that is deleted afterwards.
+    """
+    with (
+        Path(source_path).open("rb") as f,
+        # The page cache is shared by all workers; pdfminer reads objects
+        # lazily through the xref, so each worker only touches its own pages
+        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+    ):
+        # ILCreater uses the mupdf document for font extraction
+        mupdf_doc = pymupdf.open(source_path)
+        try:
+            yield PDFDocument(PDFParser(mapped)), mupdf_doc
+        finally:
+            mupdf_doc.close()
 
 
-def _parse_pages_worker(pdf_bytes, page_indices, translation_config, start_xobj_id=0, start_render_order=0):
+def _parse_pages_worker(source_path, page_indices, translation_config, start_xobj_id=0, start_render_order=0):
     """Worker function for parallel page parsing."""
     try:
-        import io
-        import pymupdf
-        from babeldoc.pdfminer.pdfinterp import PDFResourceManager
-        from babeldoc.pdfminer.pdfpage import PDFPage
-        from babeldoc.pdfminer.pdfparser import PDFParser
-        from babeldoc.pdfminer.pdfdocument import PDFDocument
-        from babeldoc.format.pdf.pdfinterp import PDFPageInterpreterEx
-        from babeldoc.format.pdf.converter import TranslateConverter
-        from babeldoc.format.pdf.document_il.frontend.il_creater import ILCreater
-        from babeldoc.progress_monitor import ProgressMonitor
-        
-        # Open mupdf document for ILCreater which uses it for font extraction
-        mupdf_doc = pymupdf.open(stream=pdf_bytes, filetype="pdf")
-        
-        # We need a fresh ILCreater for this set of pages
-        temp_il_creater = ILCreater(translation_config)
-        temp_il_creater.mupdf = mupdf_doc
-        # Initialize unique IDs to avoid collisions during merge
-        temp_il_creater.xobj_inc = start_xobj_id
-        temp_il_creater.render_order = start_render_order
+        with _open_parse_source(source_path) as (doc, mupdf_doc):
+            # We need a fresh ILCreater for this set of pages
+            temp_il_creater = ILCreater(translation_config)
+            temp_il_creater.mupdf = mupdf_doc
+            # Initialize unique IDs to avoid collisions during merge
+            temp_il_creater.xobj_inc = start_xobj_id
+            temp_il_creater.render_order = start_render_order
         
-        # Dummy progress monitor to avoid pickling/sharing issues in sub-sub-process
-        temp_il_creater.progress = ProgressMonitor([]) 
-        temp_il_creater.progress.disable = True
+            # Dummy progress monitor to avoid pickling/sharing issues in sub-sub-process
+            temp_il_creater.progress = ProgressMonitor([]) 
+            temp_il_creater.progress.disable = True
         
-        rsrcmgr = PDFResourceManager()
-        # For parsing, we don't need full TranslateConverter params usually
-        device = TranslateConverter(rsrcmgr, il_creater=temp_il_creater)
-        obj_patch = {} 
+            rsrcmgr = PDFResourceManager()
+            # For parsing, we don't need full TranslateConverter params usually
+            device = TranslateConverter(rsrcmgr, il_creater=temp_il_creater)
+            obj_patch = {} 
         
-        interpreter = PDFPageInterpreterEx(rsrcmgr, device, obj_patch, temp_il_creater)
+            interpreter = PDFPageInterpreterEx(rsrcmgr, device, obj_patch, temp_il_creater)
         
-        inf = io.BytesIO(pdf_bytes)
-        parser = PDFParser(inf)
-        doc = PDFDocument(parser)
-        
-        all_pdf_pages = list(PDFPage.create_pages(doc))
-        parsed_pages = []
-        for idx in page_indices:
-            if idx >= len(all_pdf_pages):
-                continue
-            page = all_pdf_pages[idx]
-            page.pageno = idx
-            
-            # process_page handles on_page_start, on_page_crop_box, on_page_media_box, on_page_number internally
-            ops_base = interpreter.process_page(page)
-            temp_il_creater.on_page_base_operation(ops_base)
-            temp_il_creater.on_page_end()
-            
-            # Extract the last created page object
-            page_obj = temp_il_creater.docs.page[-1]
-            parsed_pages.append(page_obj)
+            for idx, page in PDFPage.create_pages_by_index(doc, page_indices):
+                _parse_page(interpreter, temp_il_creater, page, idx)
+            parsed_pages = temp_il_creater.docs.page
             
-        mupdf_doc.close()
-        # Return everything needed to reconstruction the state
-        return parsed_pages, temp_il_creater.xobj_map, obj_patch, translation_config.shared_context_cross_split_part, None
+            # Return everything needed to reconstruction the state; pages are sent
+            # in the columnar IL encoding, which is much cheaper than pickling them
+            pages_data = binary_codec.encode_list(il_version_1.Page, parsed_pages)
+            return pages_data, temp_il_creater.xobj_map, obj_patch, translation_config.shared_context_cross_split_part, None
     except Exception as e:
         import traceback
         return None, None, None, None, f"Error in worker parsing pages {page_indices}: {str(e)}\n{traceback.format_exc()}"
 
 
-
-
 def do_translate(
     pm: ProgressMonitor, translation_config: TranslationConfig
 ) -> TranslateResult:
+    succeeded = False
     try:
         translation_config.progress_monitor = pm
         original_pdf_path = translation_config.input_file
@@ -918,6 +985,8 @@ def do_translate(
                         )
                         original_doc = Document(original_pdf_path)
                         
+                        results: dict[int, TranslateResult | None] = {}
+                        part_checkpoints: dict[int, StageCheckpoint] = {}
                         part_tasks = []
                         for i, split_point in enumerate(split_points):
                             # Create a copy of config for this part
@@ -963,30 +1032,53 @@ def do_translate(
                             )
                             part_config.input_file = part_temp_input_path
 
-                            temp_doc = Document()
-                            for x in range(
-                                split_point.start_page, split_point.end_page + 1
+                            # A resumed part must keep the input its checkpoints
+                            # were made for
+                            if not (
+                                translation_config.resume
+                                and part_temp_input_path.exists()
                             ):
-                                xref = original_doc[x].xref
-                                if (
-                                    original_doc.xref_get_key(xref, "Annots")[0]
-                                    != "null"
+                                temp_doc = Document()
+                                for x in range(
+                                    split_point.start_page, split_point.end_page + 1
                                 ):
-                                    original_doc.xref_set_key(
-                                        xref, "Annots", "null"
-                                    )
-                            temp_doc.insert_pdf(
-                                original_doc,
-                                from_page=split_point.start_page,
-                                to_page=split_point.end_page,
-                            )
-                            safe_save(temp_doc, part_temp_input_path)
+                                    xref = original_doc[x].xref
+                                    if (
+                                        original_doc.xref_get_key(xref, "Annots")[0]
+                                        != "null"
+                                    ):
+                                        original_doc.xref_set_key(
+                                            xref, "Annots", "null"
+                                        )
+                                temp_doc.insert_pdf(
+                                    original_doc,
+                                    from_page=split_point.start_page,
+                                    to_page=split_point.end_page,
+                                )
+                                safe_save(temp_doc, part_temp_input_path)
                             
                             # Only first part should have watermark
                             if i > 0:
                                 part_config.watermark_output_mode = (
                                     WatermarkOutputMode.NoWatermark
                                 )
+
+                            part_checkpoint = StageCheckpoint.for_config(part_config)
+                            if part_checkpoint is not None:
+                                part_checkpoints[i] = part_checkpoint
+                                finished = (
+                                    part_checkpoint.load_part_result()
+                                    if translation_config.resume
+                                    else None
+                                )
+                                if finished is not None:
+                                    logger.info(f"part {i} already translated, skip")
+                                    results[i], s_context = finished
+                                    if s_context:
+                                        translation_config.shared_context_cross_split_part.merge(
+                                            s_context
+                                        )
+                                    continue
                             
                             part_tasks.append((i, split_point, part_config))
 
@@ -994,40 +1086,60 @@ def do_translate(
                         
                         # Process parts in parallel
                         max_workers = translation_config.pool_max_workers or 4
-                        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
-                            # Submit all parts
-                            future_to_part = {
-                                executor.submit(
-                                    _translate_part_worker, 
-                                    i, 
-                                    sp, 
-                                    pc, 
-                                    translation_config.translator,
-                                    translation_config.term_extraction_translator,
-                                    translation_config.doc_layout_model
-                                ): i 
-                                for i, sp, pc in part_tasks
-                            }
-                            
-                            for future in concurrent.futures.as_completed(future_to_part):
-                                part_idx = future_to_part[future]
-                                try:
-                                    idx, result, s_context, err = future.result()
-                                    if err:
-                                        raise Exception(err)
-                                    results[idx] = result
+                        # A persistent pool: its workers keep the layout model loaded, and
+                        # share this process's rate limiter so that --qps and --tpm hold
+                        # for the whole document
+                        executor = get_worker_pool(
+                            "translate_part",
+                            max_workers,
+                            initializer=_init_part_worker,
+                            initargs=(
+                                get_translate_rate_limiter(),
+                                translation_config.doc_layout_model,
+                                get_cache_backend(),
+                            ),
+                        )
+                        # Submit all parts
+                        future_to_part = {
+                            executor.submit(
+                                _translate_part_worker, 
+                                i, 
+                                sp, 
+                                pc, 
+                                translation_config.translator,
+                                translation_config.term_extraction_translator,
+                                translation_config.doc_layout_model
+                            ): i 
+                            for i, sp, pc in part_tasks
+                        }
+                        
+                        for future in concurrent.futures.as_completed(future_to_part):
+                            part_idx = future_to_part[future]
+                            try:
+                                idx, result, s_context, err = future.result()
+                                if err:
+                                    raise Exception(err)
+                                results[idx] = result
+                                if idx in part_checkpoints:
+                                    part_checkpoints[idx].save_part_result(
+                                        result, s_context
+                                    )
+                                
+                                # Merge shared context (statistics) from part worker
+                                if s_context and translation_config.shared_context_cross_split_part:
+                                    translation_config.shared_context_cross_split_part.merge(s_context)
                                     
-                                    # Merge shared context (statistics) from part worker
-                                    if s_context and translation_config.shared_context_cross_split_part:
-                                        translation_config.shared_context_cross_split_part.merge(s_context)
-                                        
-                                    # Update main progress monitor for finished part
-                                    pm.stage_update("Part Translation", 1) 
-                                except Exception as e:
-                                    logger.error(f"Error in parallel part {part_idx}: {e}")
-                                    pm.translate_error(e)
-                                    raise
-                            
+                                # Update main progress monitor for finished part
+                                pm.stage_update("Part Translation", 1) 
+                            except Exception as e:
+                                logger.error(f"Error in parallel part {part_idx}: {e}")
+                                pm.translate_error(e)
+                                for other in future_to_part:
+                                    other.cancel()
+                                if isinstance(e, concurrent.futures.BrokenExecutor):
+                                    close_worker_pool("translate_part")
+                                raise
+                        
                         # Restore original watermark mode
                         translation_config.watermark_output_mode = (
                             original_watermark_mode
@@ -1040,46 +1152,258 @@ def do_translate(
                         logger.info("finish merge results")
             peak_memory_usage = memory_monitor.peak_memory_usage
 
-        finish_time = time.time()
-        result.total_seconds = finish_time - start_time
+        _finalize_result(result, translation_config, start_time, peak_memory_usage)
+        pm.translate_done(result)
+        succeeded = True
+        return result
+
+    except Exception as e:
+        if translation_config.debug:
+            logger.exception("translate error:")
+        else:
+            logger.error(f"translate error: {e}")
+        pm.disable = False
+        pm.translate_error(e)
+        raise
+    finally:
+        logger.debug("do_translate finally")
+        pm.on_finish()
+        # Keep the checkpoints of a failed run for --resume
+        translation_config.cleanup_temp_files(keep_checkpoints=not succeeded)
+
+
+def _finalize_result(
+    result: TranslateResult,
+    translation_config: TranslationConfig,
+    start_time: float,
+    peak_memory_usage: int,
+):
+    """Fill in run statistics and post-process the output PDFs of one result."""
+    finish_time = time.time()
+    result.total_seconds = finish_time - start_time
 
-        logger.info(
-            f"finish translate: {original_pdf_path}, cost: {finish_time - start_time} s",
+    logger.info(
+        f"finish translate: {translation_config.input_file}, cost: {finish_time - start_time} s",
+    )
+    # Populate aggregate valid text statistics into result
+    try:
+        sc = translation_config.shared_context_cross_split_part
+        result.total_valid_character_count = getattr(sc, "valid_char_count_total", 0)
+        token_total = getattr(sc, "total_valid_text_token_count", None)
+        result.total_valid_text_token_count = (
+            token_total if isinstance(token_total, int) else 0
         )
-        # Populate aggregate valid text statistics into result
+    except Exception as e:
+        logger.warning("Failed to populate valid text statistics: %s", e)
         try:
-            sc = translation_config.shared_context_cross_split_part
-            result.total_valid_character_count = getattr(
-                sc, "valid_char_count_total", 0
-            )
-            token_total = getattr(sc, "total_valid_text_token_count", None)
-            result.total_valid_text_token_count = (
-                token_total if isinstance(token_total, int) else 0
+            result.total_valid_character_count = 0
+            result.total_valid_text_token_count = 0
+        except Exception:
+            pass
+    result.original_pdf_path = translation_config.input_file
+    result.peak_memory_usage = peak_memory_usage
+
+    fix_cmap(result, translation_config)
+    add_metadata(result, translation_config)
+    add_watermark(result, translation_config)
+    try:
+        migrate_toc(translation_config, result)
+    except Exception as e:
+        logger.error(f"Failed to migrate TOC from {translation_config.input_file}: {e}")
+
+
+def get_multi_target_translation_stage(
+    translation_configs: list[TranslationConfig],
+) -> list[tuple[str, float]]:
+    """Stages of a multi-target run: shared parse stages, then each language's."""
+    stages = get_translation_stage(translation_configs[0])
+    result = [x for x in stages if x[0] in MULTI_TARGET_SHARED_STAGES]
+    for config in translation_configs:
+        result.extend(
+            (ScopedProgressMonitor.scoped_stage_name(name, config.lang_out), weight)
+            for name, weight in stages
+            if name not in MULTI_TARGET_SHARED_STAGES
+        )
+    return result
+
+
+def translate_multi_target(
+    translation_configs: list[TranslationConfig],
+) -> dict[str, TranslateResult]:
+    with ProgressMonitor(
+        get_multi_target_translation_stage(translation_configs)
+    ) as pm:
+        return do_translate_multi_target(pm, translation_configs)
+
+
+async def async_translate_multi_target(translation_configs: list[TranslationConfig]):
+    """Asynchronously translate one PDF into several target languages.
+
+    ``translation_configs`` holds one config per target language for the same
+    input file; the first one's parse settings are used for all of them. Yields
+    the same events as :func:`async_translate`. Stage names of the per-language
+    stages carry the language, e.g. ``"Translate Paragraphs (fr)"``, and the
+    ``finish`` event additionally has ``translate_results``, a dict of
+    TranslateResult keyed by ``lang_out``, and ``translate_errors``, the
+    exceptions of the languages that failed, see
+    :func:`do_translate_multi_target`.
+    """
+    async for event in _async_run_translation(
+        get_multi_target_translation_stage(translation_configs),
+        do_translate_multi_target,
+        translation_configs,
+        translation_configs[0].report_interval,
+    ):
+        yield event
+
+
+def _check_multi_target_configs(translation_configs: list[TranslationConfig]):
+    if not translation_configs:
+        raise ValueError("at least one target language is required")
+    primary = translation_configs[0]
+    lang_outs = [config.lang_out for config in translation_configs]
+    if len(set(lang_outs)) != len(lang_outs):
+        raise ValueError(f"duplicate target languages: {lang_outs}")
+    for config in translation_configs:
+        if Path(config.input_file) != Path(primary.input_file):
+            raise ValueError("all target languages must translate the same input file")
+        if config.split_strategy:
+            raise ValueError("multi-target translation does not support split_strategy")
+        if config.only_parse_generate_pdf:
+            raise ValueError(
+                "multi-target translation does not support only_parse_generate_pdf"
             )
-        except Exception as e:
-            logger.warning("Failed to populate valid text statistics: %s", e)
-            try:
-                result.total_valid_character_count = 0
-                result.total_valid_text_token_count = 0
-            except Exception:
-                pass
-        result.original_pdf_path = translation_config.input_file
-        result.peak_memory_usage = peak_memory_usage
 
-        fix_cmap(result, translation_config)
-        add_metadata(result, translation_config)
-        add_watermark(result, translation_config)
+
+def _inherit_parse_state(primary: TranslationConfig, config: TranslationConfig):
+    """Copy what the shared parse stages decided on the primary config to a fork."""
+    for attr in (
+        "ocr_workaround",
+        "skip_scanned_detection",
+        "disable_rich_text_translate",
+        "remove_non_formula_lines",
+    ):
+        setattr(config, attr, getattr(primary, attr))
+    source = primary.shared_context_cross_split_part
+    target = config.shared_context_cross_split_part
+    target.auto_enabled_ocr_workaround = source.auto_enabled_ocr_workaround
+    target.valid_char_count_total = source.valid_char_count_total
+    target.total_valid_text_token_count = source.total_valid_text_token_count
+    if config is not primary and Path(config.working_dir) == Path(primary.working_dir):
+        # Languages write temporary files with the same names
+        config.working_dir = Path(primary.working_dir) / f"lang_{config.lang_out}"
+        Path(config.working_dir).mkdir(parents=True, exist_ok=True)
+
+
+def _translate_fork(
+    pm: ProgressMonitor, config: TranslationConfig, parsed: ParsedDocument
+) -> TranslateResult:
+    """Translate and render one target language from a private copy of the IL."""
+    config.progress_monitor = ScopedProgressMonitor(pm, config.lang_out)
+    with _render_lock:
+        fork = ParsedDocument(
+            copy.deepcopy(parsed.docs),
+            parsed.temp_pdf_path,
+            Document(parsed.temp_pdf_path),
+            parsed.mediabox_data,
+        )
+    try:
+        _translate_parsed_document(config, fork)
+        # Typesetting and PDF generation are CPU bound and use pymupdf, which is
+        # not thread safe; only the LLM stages of the languages overlap.
+        with _render_lock:
+            return _render_parsed_document(config, fork)
+    finally:
+        with _render_lock:
+            fork.mupdf.close()
+
+
+def do_translate_multi_target(
+    pm: ProgressMonitor,
+    translation_configs: list[TranslationConfig],
+    max_parallel_languages: int = 4,
+) -> dict[str, TranslateResult]:
+    """Translate one PDF into several languages, parsing it only once.
+
+    The IL is built and analysed (layout, paragraphs, styles and formulas) with
+    the first config. After StylesAndFormulas it is copied for each language,
+    which then runs term extraction, translation, typesetting and PDF
+    generation with its own config. Up to ``max_parallel_languages`` languages
+    run at the same time; their LLM requests share the rate limiter set by
+    ``set_translate_rate_limiter``.
+
+    A language that fails does not stop the others: the result has only the
+    languages that succeeded, and the ``finish`` event lists the exceptions
+    of the others in ``translate_errors``, keyed by ``lang_out``. If every
+    language fails, the first error is raised.
+    """
+    primary = translation_configs[0]
+    try:
+        _check_multi_target_configs(translation_configs)
+        primary.progress_monitor = pm
+        original_pdf_path = primary.input_file
+        lang_outs = [config.lang_out for config in translation_configs]
+        logger.info(f"start to translate: {original_pdf_path} into {lang_outs}")
         try:
-            migrate_toc(translation_config, result)
-        except Exception as e:
+            check_metadata(Document(original_pdf_path))
+        except InputFileGeneratedByBabelDOCError as e:
             logger.error(
-                f"Failed to migrate TOC from {translation_config.input_file}: {e}"
+                f"input file {original_pdf_path} is generated by BabelDOC, Cannot translate files that have already been translated."
             )
-        pm.translate_done(result)
-        return result
+            raise e
+        except Exception as e:
+            logger.warning(f"Error in check metadata, continue: {e}")
+        start_time = time.time()
+        with MemoryMonitor() as memory_monitor:
+            if primary.shared_context_cross_split_part.auto_enabled_ocr_workaround:
+                primary.ocr_workaround = True
+                primary.skip_scanned_detection = True
+            parsed = _parse_and_analyze_document(primary)
+            if parsed is None:
+                raise ExtractTextError("No page left to translate.")
+            for config in translation_configs:
+                _inherit_parse_state(primary, config)
+
+            max_workers = max(1, min(max_parallel_languages, len(translation_configs)))
+            results = {}
+            translate_errors = {}
+            try:
+                with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+                    futures = {
+                        config.lang_out: executor.submit(
+                            _translate_fork, pm, config, parsed
+                        )
+                        for config in translation_configs
+                    }
+                    for lang_out, future in futures.items():
+                        try:
+                            results[lang_out] = future.result()
+                        except Exception as e:
+                            logger.error(f"translate error ({lang_out}): {e}")
+                            translate_errors[lang_out] = e
+            finally:
+                parsed.mupdf.close()
+            peak_memory_usage = memory_monitor.peak_memory_usage
+
+        if not results:
+            raise next(iter(translate_errors.values()))
+        translate_results = {}
+        for config in translation_configs:
+            result = results.get(config.lang_out)
+            if result is None:
+                continue
+            config.progress_monitor = pm
+            _finalize_result(result, config, start_time, peak_memory_usage)
+            translate_results[config.lang_out] = result
+        pm.translate_done(
+            next(iter(translate_results.values())),
+            translate_results=translate_results,
+            translate_errors=translate_errors,
+        )
+        return translate_results
 
     except Exception as e:
-        if translation_config.debug:
+        if primary.debug:
             logger.exception("translate error:")
         else:
             logger.error(f"translate error: {e}")
@@ -1087,9 +1411,10 @@ def do_translate(
         pm.translate_error(e)
         raise
     finally:
-        logger.debug("do_translate finally")
+        logger.debug("do_translate_multi_target finally")
         pm.on_finish()
-        translation_config.cleanup_temp_files()
+        for config in translation_configs:
+            config.cleanup_temp_files()
 
 
 def migrate_toc(
@@ -1203,6 +1528,51 @@ def _do_translate_single(
         translation_config.ocr_workaround = True
         translation_config.skip_scanned_detection = True
 
+    # Skip all translation processing if only_parse_generate_pdf is enabled
+    if translation_config.only_parse_generate_pdf:
+        logger.debug("only_parse_generate_pdf enabled, skipping translation processing")
+        parsed = _parse_document(translation_config)
+        if parsed is None:
+            return None
+        # Skip directly to PDF generation
+        pdf_creater = PDFCreater(
+            parsed.temp_pdf_path,
+            parsed.docs,
+            translation_config,
+            parsed.mediabox_data,
+        )
+        result = pdf_creater.write(translation_config)
+        result.original_pdf_path = translation_config.input_file
+        return result
+
+    checkpoint = StageCheckpoint.for_config(translation_config)
+    resumed = None
+    if translation_config.resume and checkpoint is not None:
+        resumed = checkpoint.load()
+
+    if resumed is not None:
+        completed_stage, docs = resumed
+        parsed = ParsedDocument(docs, *_prepare_input_pdf(translation_config))
+        _skip_stages(pm, [ILCreater.stage_name])
+        _analyze_document(translation_config, parsed, checkpoint, completed_stage)
+    else:
+        completed_stage = None
+        parsed = _parse_and_analyze_document(translation_config, checkpoint)
+        if parsed is None:
+            return None
+    _translate_parsed_document(translation_config, parsed, checkpoint, completed_stage)
+    # Typesetting changes the IL in place, so later stages are always redone
+    # from the translated IL
+    result = _render_parsed_document(translation_config, parsed)
+    if checkpoint is not None:
+        checkpoint.clear()
+    return result
+
+
+def _prepare_input_pdf(
+    translation_config: TranslationConfig,
+) -> tuple[str, Document, dict]:
+    """Copy the input PDF into the working dir and repair it for parsing."""
     original_pdf_path = translation_config.input_file
     if translation_config.debug:
         doc_input = Document(original_pdf_path)
@@ -1239,8 +1609,17 @@ def _do_translate_single(
     # for page in doc_pdf2zh:
     #     page.insert_font(resfont, None)
 
-    resfont = None
     safe_save(doc_pdf2zh, temp_pdf_path)
+    return temp_pdf_path, doc_pdf2zh, mediabox_data
+
+
+def _parse_document(translation_config: TranslationConfig) -> ParsedDocument | None:
+    """Create the IL from the input PDF.
+
+    Returns None if ``only_include_translated_page`` leaves no page to translate.
+    """
+    temp_pdf_path, doc_pdf2zh, mediabox_data = _prepare_input_pdf(translation_config)
+    resfont = None
 
     # if not translation_config.skip_scanned_detection and DetectScannedFile(
     #     translation_config
@@ -1286,102 +1665,252 @@ def _do_translate_single(
     if check_cid_char(docs):
         raise ExtractTextError("The document contains too many CID chars.")
 
-    # Skip all translation processing if only_parse_generate_pdf is enabled
-    if translation_config.only_parse_generate_pdf:
-        logger.debug("only_parse_generate_pdf enabled, skipping translation processing")
-        # Skip directly to PDF generation
-        pdf_creater = PDFCreater(temp_pdf_path, docs, translation_config, mediabox_data)
-        result = pdf_creater.write(translation_config)
-        result.original_pdf_path = translation_config.input_file
-        return result
+    return ParsedDocument(docs, temp_pdf_path, doc_pdf2zh, mediabox_data)
 
-    # Rest of the original translation logic...
-    # [Previous implementation of do_translate continues here]
 
-    # 检测是否为扫描文件
-    if translation_config.skip_scanned_detection:
-        logger.debug("skipping scanned file detection")
-    else:
-        logger.debug("start detect scanned file")
-        DetectScannedFile(translation_config).process(
-            docs, temp_pdf_path, mediabox_data
-        )
-        logger.debug("finish detect scanned file")
-        if translation_config.debug:
-            xml_converter.write_json(
-                docs,
-                translation_config.get_working_file_path("detect_scanned_file.json"),
+def _parse_and_analyze_document(
+    translation_config: TranslationConfig,
+    checkpoint: StageCheckpoint | None = None,
+) -> ParsedDocument | None:
+    """Run the language-independent stages, reusing the IL cache when possible.
+
+    Returns None if ``only_include_translated_page`` leaves no page to translate.
+    """
+    cache_key = None
+    if translation_config.use_il_cache:
+        cache_key = il_cache.parse_cache_key(translation_config)
+        cached = il_cache.ILCache().get(cache_key)
+        if cached is not None:
+            docs, state = cached
+            logger.info(
+                f"IL cache hit for {translation_config.input_file}, skip parsing"
             )
+            il_cache.restore_parse_state(translation_config, state)
+            temp_pdf_path, doc_pdf2zh, mediabox_data = _prepare_input_pdf(
+                translation_config
+            )
+            _skip_stages(translation_config.progress_monitor, MULTI_TARGET_SHARED_STAGES)
+            return ParsedDocument(docs, temp_pdf_path, doc_pdf2zh, mediabox_data)
+
+    parsed = _parse_document(translation_config)
+    if parsed is None:
+        return None
+    if checkpoint is not None:
+        checkpoint.save(ILCreater.stage_name, parsed.docs)
+    _analyze_document(translation_config, parsed, checkpoint)
+    if cache_key is not None:
+        try:
+            il_cache.ILCache().set(
+                cache_key, parsed.docs, il_cache.get_parse_state(translation_config)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to write IL cache: {e}")
+    return parsed
+
+
+def _skip_stages(pm: ProgressMonitor, stage_names):
+    """Report stages that were not run (e.g. served from a cache) as done."""
+    for stage_name in stage_names:
+        if stage_name in pm.stage:
+            with pm.stage_start(stage_name, 1) as stage:
+                stage.advance(1)
+
+
+def _detect_scanned_file(
+    translation_config: TranslationConfig, parsed: ParsedDocument
+):
+    logger.debug("start detect scanned file")
+    DetectScannedFile(translation_config).process(
+        parsed.docs, parsed.temp_pdf_path, parsed.mediabox_data
+    )
+    logger.debug("finish detect scanned file")
+    if translation_config.debug:
+        XMLConverter().write_json(
+            parsed.docs,
+            translation_config.get_working_file_path("detect_scanned_file.json"),
+        )
+
 
+def _parse_layout(translation_config: TranslationConfig, parsed: ParsedDocument):
     # Generate layouts for all pages
     logger.debug("start generating layouts")
-    docs = LayoutParser(translation_config).process(docs, doc_pdf2zh)
+    parsed.docs = LayoutParser(translation_config).process(parsed.docs, parsed.mupdf)
     logger.debug("finish generating layouts")
     close_process_pool()
     if translation_config.debug:
-        xml_converter.write_json(
-            docs,
+        XMLConverter().write_json(
+            parsed.docs,
             translation_config.get_working_file_path("layout_generator.json"),
         )
 
-    if translation_config.table_model:
-        docs = TableParser(translation_config).process(docs, doc_pdf2zh)
-        logger.debug("finish table parser")
-        if translation_config.debug:
-            xml_converter.write_json(
-                docs,
-                translation_config.get_working_file_path("table_parser.json"),
-            )
-    ParagraphFinder(translation_config).process(docs)
-    logger.debug(f"finish paragraph finder from {temp_pdf_path}")
+
+def _parse_tables(translation_config: TranslationConfig, parsed: ParsedDocument):
+    parsed.docs = TableParser(translation_config).process(parsed.docs, parsed.mupdf)
+    logger.debug("finish table parser")
     if translation_config.debug:
-        xml_converter.write_json(
-            docs,
+        XMLConverter().write_json(
+            parsed.docs,
+            translation_config.get_working_file_path("table_parser.json"),
+        )
+
+
+def _find_paragraphs(translation_config: TranslationConfig, parsed: ParsedDocument):
+    ParagraphFinder(translation_config).process(parsed.docs)
+    logger.debug(f"finish paragraph finder from {parsed.temp_pdf_path}")
+    if translation_config.debug:
+        XMLConverter().write_json(
+            parsed.docs,
             translation_config.get_working_file_path("paragraph_finder.json"),
         )
-    StylesAndFormulas(translation_config).process(docs)
-    logger.debug(f"finish styles and formulas from {temp_pdf_path}")
+
+
+def _find_styles_and_formulas(
+    translation_config: TranslationConfig, parsed: ParsedDocument
+):
+    StylesAndFormulas(translation_config).process(parsed.docs)
+    logger.debug(f"finish styles and formulas from {parsed.temp_pdf_path}")
     if translation_config.debug:
-        xml_converter.write_json(
-            docs,
+        XMLConverter().write_json(
+            parsed.docs,
             translation_config.get_working_file_path("styles_and_formulas.json"),
         )
 
-    translate_engine = translation_config.translator
-    term_extraction_engine = translation_config.get_term_extraction_translator()
-
-    support_llm_translate = translator_supports_llm(translate_engine)
-    support_llm_term_extraction = translator_supports_llm(term_extraction_engine)
 
-    if support_llm_term_extraction and translation_config.auto_extract_glossary:
+def _extract_terms(translation_config: TranslationConfig, parsed: ParsedDocument):
+    term_extraction_engine = translation_config.get_term_extraction_translator()
+    if translator_supports_llm(term_extraction_engine):
         AutomaticTermExtractor(term_extraction_engine, translation_config).procress(
-            docs
+            parsed.docs
         )
 
-    if not translation_config.skip_translation:
-        if support_llm_translate:
-            il_translator = ILTranslatorLLMOnly(translate_engine, translation_config)
-        else:
-            il_translator = ILTranslator(translate_engine, translation_config)
 
-        il_translator.translate(docs)
-        del il_translator
-        logger.debug(f"finish ILTranslator from {temp_pdf_path}")
+def _translate_paragraphs(
+    translation_config: TranslationConfig, parsed: ParsedDocument
+):
+    translate_engine = translation_config.translator
+    if translator_supports_llm(translate_engine):
+        il_translator = ILTranslatorLLMOnly(translate_engine, translation_config)
+    else:
+        il_translator = ILTranslator(translate_engine, translation_config)
+
+    if (
+        isinstance(il_translator, ILTranslatorLLMOnly)
+        and translation_config.max_concurrent_requests
+    ):
+        asyncio.run(il_translator.atranslate(parsed.docs))
     else:
+        il_translator.translate(parsed.docs)
+    del il_translator
+    logger.debug(f"finish ILTranslator from {parsed.temp_pdf_path}")
+
+
+def _analysis_stages(translation_config: TranslationConfig):
+    """The language-independent stages after ILCreater, in order."""
+    stages = []
+    if translation_config.skip_scanned_detection:
+        logger.debug("skipping scanned file detection")
+    else:
+        stages.append((DetectScannedFile.stage_name, _detect_scanned_file))
+    stages.append((LayoutParser.stage_name, _parse_layout))
+    if translation_config.table_model:
+        stages.append((TableParser.stage_name, _parse_tables))
+    stages.append((ParagraphFinder.stage_name, _find_paragraphs))
+    stages.append((StylesAndFormulas.stage_name, _find_styles_and_formulas))
+    return stages
+
+
+def _translation_stages(translation_config: TranslationConfig):
+    """Term extraction and translation of the analysed IL, in order."""
+    stages = []
+    if translation_config.auto_extract_glossary:
+        stages.append((AutomaticTermExtractor.stage_name, _extract_terms))
+    if translation_config.skip_translation:
         logger.info("skip ILTranslator")
+    else:
+        stages.append((ILTranslator.stage_name, _translate_paragraphs))
+    return stages
+
+
+def _stage_order(stage_name: str) -> int:
+    return [name for name, _ in TRANSLATE_STAGES].index(stage_name)
+
+
+def _run_stages(
+    translation_config: TranslationConfig,
+    parsed: ParsedDocument,
+    stages,
+    checkpoint: StageCheckpoint | None = None,
+    completed_stage: str | None = None,
+):
+    """Run ``stages`` on the IL, skipping those up to ``completed_stage``.
+
+    The IL is written to ``checkpoint`` after each stage that runs.
+    """
+    for stage_name, process in stages:
+        if completed_stage is not None and _stage_order(stage_name) <= _stage_order(
+            completed_stage
+        ):
+            _skip_stages(translation_config.progress_monitor, [stage_name])
+            continue
+        process(translation_config, parsed)
+        if checkpoint is not None:
+            checkpoint.save(stage_name, parsed.docs)
+
+
+def _analyze_document(
+    translation_config: TranslationConfig,
+    parsed: ParsedDocument,
+    checkpoint: StageCheckpoint | None = None,
+    completed_stage: str | None = None,
+):
+    """Run the language-independent stages, up to and including StylesAndFormulas."""
+    _run_stages(
+        translation_config,
+        parsed,
+        _analysis_stages(translation_config),
+        checkpoint,
+        completed_stage,
+    )
+
+
+def _translate_parsed_document(
+    translation_config: TranslationConfig,
+    parsed: ParsedDocument,
+    checkpoint: StageCheckpoint | None = None,
+    completed_stage: str | None = None,
+):
+    """Extract terms and translate the paragraphs of the IL in place."""
+    _run_stages(
+        translation_config,
+        parsed,
+        _translation_stages(translation_config),
+        checkpoint,
+        completed_stage,
+    )
 
     if translation_config.debug:
+        xml_converter = XMLConverter()
         xml_converter.write_json(
-            docs,
+            parsed.docs,
             translation_config.get_working_file_path("il_translated.json"),
         )
-
-    if translation_config.debug:
-        AddDebugInformation(translation_config).process(docs)
+        AddDebugInformation(translation_config).process(parsed.docs)
         xml_converter.write_json(
-            docs,
+            parsed.docs,
             translation_config.get_working_file_path("add_debug_information.json"),
         )
+
+
+def _render_parsed_document(
+    translation_config: TranslationConfig, parsed: ParsedDocument
+) -> TranslateResult:
+    """Typeset the translated IL and write the output PDFs."""
+    docs = parsed.docs
+    doc_pdf2zh = parsed.mupdf
+    temp_pdf_path = parsed.temp_pdf_path
+    mediabox_data = parsed.mediabox_data
+    xml_converter = XMLConverter()
+
     mono_watermark_first_page_doc_bytes = None
     dual_watermark_first_page_doc_bytes = None
     try:
@@ -0,0 +1,205 @@
+"""On-disk cache of analysed IL documents.
+
+The stages from ILCreater up to and including StylesAndFormulas depend only on
+the input PDF and a handful of parse options, not on the translator, prompt or
+target language. Their result is stored here, keyed by the SHA-256 of the PDF
+and those options, so that a re-run with another model or language starts
+directly at translation.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from pathlib import Path
+
+import pyzstd
+
+from babeldoc.const import CACHE_FOLDER
+from babeldoc.const import __version__
+from babeldoc.format.pdf.document_il import binary_codec
+from babeldoc.format.pdf.document_il import il_version_1
+from babeldoc.format.pdf.translation_config import TranslationConfig
+
+logger = logging.getLogger(__name__)
+
+IL_CACHE_FOLDER = CACHE_FOLDER / "il_cache"
+
+# Bump when the stored format or the meaning of the cached stages changes
+IL_CACHE_VERSION = 3
+
+# Keep only the most recently used entries; a large book is tens of MB
+MAX_CACHE_ENTRIES = 32
+
+# TranslationConfig fields read by the cached stages
+PARSE_CONFIG_FIELDS = (
+    "pages",
+    "formular_font_pattern",
+    "formular_char_pattern",
+    "split_short_lines",
+    "short_line_split_factor",
+    "skip_scanned_detection",
+    "ocr_workaround",
+    "auto_enable_ocr_workaround",
+    "disable_rich_text_translate",
+    "enable_graphic_element_process",
+    "remove_non_formula_lines",
+    "non_formula_line_iou_threshold",
+    "figure_table_protection_threshold",
+    "skip_formula_offset_calculation",
+    "merge_alternating_line_numbers",
+    "only_include_translated_page",
+    "skip_form_render",
+    "skip_curve_render",
+    "show_char_box",
+)
+
+# Settings the cached stages may change on the config, e.g. when
+# DetectScannedFile turns on the OCR workaround
+PARSE_STATE_FIELDS = (
+    "ocr_workaround",
+    "skip_scanned_detection",
+    "disable_rich_text_translate",
+    "remove_non_formula_lines",
+)
+
+# What the cached stages record in the shared context, e.g. the valid
+# character count reported in the TranslateResult
+PARSE_SHARED_CONTEXT_FIELDS = (
+    "auto_enabled_ocr_workaround",
+    "valid_char_count_total",
+    "total_valid_text_token_count",
+)
+
+_cleanup_lock = threading.Lock()
+
+
+def file_sha256(path: str | Path) -> str:
+    sha256_hash = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for byte_block in iter(lambda: f.read(1024 * 1024), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
+def _model_name(model) -> str | None:
+    if model is None:
+        return None
+    return f"{type(model).__module__}.{type(model).__qualname__}"
+
+
+def parse_cache_key(translation_config: TranslationConfig) -> str:
+    """Cache key for the analysed IL of ``translation_config.input_file``.
+
+    Must be computed before parsing starts, since the parse stages may change
+    some of the fields it covers.
+    """
+    key = {
+        "version": IL_CACHE_VERSION,
+        "babeldoc": __version__,
+        "input": file_sha256(translation_config.input_file),
+        "doc_layout_model": _model_name(translation_config.doc_layout_model),
+        "table_model": _model_name(translation_config.table_model),
+    }
+    for field in PARSE_CONFIG_FIELDS:
+        key[field] = getattr(translation_config, field)
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+def dump_document(path: str | Path, document: il_version_1.Document, **extra):
+    """Atomically write an IL document (and picklable extras) to ``path``."""
+    path = Path(path)
+    data = pyzstd.compress(
+        pickle.dumps(
+            {
+                "version": IL_CACHE_VERSION,
+                "document": binary_codec.encode(document),
+                **extra,
+            },
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    )
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        Path(temp_path).replace(path)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+
+def load_document(path: str | Path) -> dict:
+    """Read what :func:`dump_document` wrote; raises ValueError if outdated."""
+    # Only files written by this process's user under the cache folder are read
+    payload = pickle.loads(pyzstd.decompress(Path(path).read_bytes()))  # noqa: S301
+    if payload.get("version") != IL_CACHE_VERSION:
+        raise ValueError(f"unsupported IL cache version {payload.get('version')}")
+    payload["document"] = binary_codec.decode(payload["document"])
+    return payload
+
+
+class ILCache:
+    def __init__(self, folder: Path = IL_CACHE_FOLDER):
+        self.folder = Path(folder)
+
+    def _path(self, key: str) -> Path:
+        return self.folder / f"{key}.il.zst"
+
+    def get(self, key: str) -> tuple[il_version_1.Document, dict[str, object]] | None:
+        """Return the cached document and parse state, or None on a miss."""
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            payload = load_document(path)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable IL cache entry {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+        # The mtime orders entries for cleanup
+        path.touch()
+        return payload["document"], payload["state"]
+
+    def set(self, key: str, document: il_version_1.Document, state: dict[str, object]):
+        self.folder.mkdir(parents=True, exist_ok=True)
+        dump_document(self._path(key), document, state=state)
+        self._cleanup()
+
+    def _cleanup(self) -> None:
+        """Remove the least recently used entries beyond MAX_CACHE_ENTRIES."""
+        if not _cleanup_lock.acquire(blocking=False):
+            return
+        try:
+            entries = []
+            for path in self.folder.glob("*.il.zst"):
+                try:
+                    entries.append((path.stat().st_mtime, path))
+                except FileNotFoundError:
+                    continue
+            entries.sort(reverse=True)
+            for _, path in entries[MAX_CACHE_ENTRIES:]:
+                path.unlink(missing_ok=True)
+        finally:
+            _cleanup_lock.release()
+
+
+def get_parse_state(translation_config: TranslationConfig) -> dict[str, object]:
+    state = {field: getattr(translation_config, field) for field in PARSE_STATE_FIELDS}
+    shared_context = translation_config.shared_context_cross_split_part
+    for field in PARSE_SHARED_CONTEXT_FIELDS:
+        state[field] = getattr(shared_context, field)
+    return state
+
+
+def restore_parse_state(
+    translation_config: TranslationConfig, state: dict[str, object]
+):
+    for field in PARSE_STATE_FIELDS:
+        setattr(translation_config, field, state[field])
+    shared_context = translation_config.shared_context_cross_split_part
+    for field in PARSE_SHARED_CONTEXT_FIELDS:
+        setattr(shared_context, field, state[field])
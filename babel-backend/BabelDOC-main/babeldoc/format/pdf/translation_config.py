@@ -223,6 +223,11 @@ class TranslationConfig:
         term_extraction_translator: BaseTranslator | None = None,
         metadata_extra_data: str | None = None,
         term_pool_max_workers: int | None = None,
+        use_il_cache: bool = True,
+        resume: bool = False,
+        use_layout_cache: bool = True,
+        max_concurrent_requests: int | None = None,
+        typesetting_workers: int | None = None,
     ):
         self.translator = translator
         self.term_extraction_translator = term_extraction_translator or translator
@@ -371,6 +376,18 @@ class TranslationConfig:
         self.skip_formula_offset_calculation = skip_formula_offset_calculation
 
         self.metadata_extra_data = metadata_extra_data
+        # Reuse the analysed IL of an earlier run on the same PDF and parse options
+        self.use_il_cache = use_il_cache
+        # Continue from the stage checkpoints left in working_dir by a failed run
+        self.resume = resume
+        # Reuse layout detection results of pages rendered the same way before
+        self.use_layout_cache = use_layout_cache
+        # With a limit, LLM translation requests are sent from asyncio tasks
+        # instead of one thread each
+        self.max_concurrent_requests = max_concurrent_requests
+        # With more than one worker, pages are typeset and rendered to content
+        # streams in a process pool
+        self.typesetting_workers = typesetting_workers
 
         self.term_extraction_token_usage: dict[str, int] = {
             "total_tokens": 0,
@@ -483,11 +500,21 @@ class TranslationConfig:
                 shutil.rmtree(part_dir, ignore_errors=True)
             del self._part_working_dirs[part_index]
 
-    def cleanup_temp_files(self):
-        """Clean up all temporary files including part working directories"""
+    def keeps_working_dir(self) -> bool:
+        """Whether working_dir outlives the run, so checkpoints in it are useful"""
+        return not self._is_temp_dir
+
+    def cleanup_temp_files(self, keep_checkpoints: bool = False):
+        """Clean up all temporary files including part working directories
+
+        Args:
+            keep_checkpoints: Keep part working directories, which hold the
+                checkpoints of a failed run, if working_dir is kept.
+        """
         try:
-            for part_index in list(self._part_working_dirs.keys()):
-                self.cleanup_part_working_dir(part_index)
+            if not (keep_checkpoints and self.keeps_working_dir()):
+                for part_index in list(self._part_working_dirs.keys()):
+                    self.cleanup_part_working_dir(part_index)
             if self._is_temp_dir:
                 logger.info(f"cleanup temp files: {self.working_dir}")
                 shutil.rmtree(self.working_dir, ignore_errors=True)
@@ -1,6 +1,7 @@
 import asyncio
 import logging
 import multiprocessing as mp
+import os
 import queue
 import random
 import sys
@@ -22,6 +23,10 @@ from babeldoc.const import enable_process_pool
 from babeldoc.format.pdf.translation_config import TranslationConfig
 from babeldoc.format.pdf.translation_config import WatermarkOutputMode
 from babeldoc.glossary import Glossary
+from babeldoc.progress_monitor import ProgressEventWriter
+from babeldoc.translator import cache_cli
+from babeldoc.translator.cache import set_cache_backend
+from babeldoc.translator.cache_server import RemoteCacheBackend
 from babeldoc.translator.translator import OpenAITranslator
 from babeldoc.translator.translator import set_translate_rate_limiter
 
@@ -102,6 +107,13 @@ def create_parser():
         default=None,
         help="Working directory for translation. If not set, use temp directory.",
     )
+    parser.add_argument(
+        "--resume",
+        default=None,
+        metavar="WORKING_DIR",
+        help="Resume a failed translation from the checkpoints it left in its "
+        "--working-dir, skipping the stages (and split parts) that finished.",
+    )
     parser.add_argument(
         "--metadata-extra-data",
         default=None,
@@ -112,6 +124,12 @@ def create_parser():
         action="store_true",
         help="DEBUG ONLY",
     )
+    parser.add_argument(
+        "--progress-fd",
+        type=int,
+        default=None,
+        help="Write progress events as JSON lines to this inherited file descriptor (e.g. the write end of a pipe).",
+    )
     # translation option argument group
     translation_group = parser.add_argument_group(
         "Translation",
@@ -138,7 +156,8 @@ def create_parser():
         "--lang-out",
         "-lo",
         default="zh",
-        help="The code of target language.",
+        help="The code of target language. Several comma-separated codes "
+        "(e.g. es,fr,de) parse the PDF once and translate it into each language.",
     )
     translation_group.add_argument(
         "--output",
@@ -152,11 +171,37 @@ def create_parser():
         default=4,
         help="QPS limit of translation service",
     )
+    translation_group.add_argument(
+        "--tpm",
+        type=int,
+        default=None,
+        help="Tokens per minute limit of translation service, counted from the "
+        "paragraphs sent. Like --qps, it holds across all processes of a run.",
+    )
     translation_group.add_argument(
         "--ignore-cache",
         action="store_true",
         help="Ignore translation cache.",
     )
+    translation_group.add_argument(
+        "--cache-server",
+        metavar="HOST:PORT",
+        default=None,
+        help="Keep translation results in the cache served by `babeldoc cache "
+        "serve` on HOST:PORT instead of the local cache, to share them between hosts.",
+    )
+    translation_group.add_argument(
+        "--ignore-il-cache",
+        action="store_true",
+        help="Always parse the PDF instead of reusing the parsed document cached "
+        "by an earlier run on the same file with the same parse options.",
+    )
+    translation_group.add_argument(
+        "--ignore-layout-cache",
+        action="store_true",
+        help="Always run layout detection instead of reusing the results cached "
+        "for identical pages by an earlier run with the same layout model.",
+    )
     translation_group.add_argument(
         "--no-dual",
         action="store_true",
@@ -280,6 +325,21 @@ def create_parser():
         type=int,
         help="Maximum number of worker threads for internal task processing pools. If not specified, defaults to QPS value. This parameter directly sets the worker count, replacing previous QPS-based dynamic calculations.",
     )
+    translation_group.add_argument(
+        "--max-concurrent-requests",
+        type=int,
+        default=None,
+        help="Send LLM translation requests from asyncio tasks, with up to this many "
+        "in flight at once, instead of one worker thread per request. The OpenAI "
+        "translator then uses HTTP/2 with keep-alive connections.",
+    )
+    translation_group.add_argument(
+        "--typesetting-workers",
+        type=int,
+        default=None,
+        help="Typeset pages and generate their drawing instructions in this many "
+        "worker processes (default: 1, in the main process).",
+    )
     translation_group.add_argument(
         "--term-pool-max-workers",
         type=int,
@@ -489,51 +549,19 @@ async def main():
     if args.enable_process_pool:
         enable_process_pool()
 
-    # 实例化翻译器
-    if args.openai:
-        translator_kwargs: dict[str, Any] = {}
-        if args.openai_reasoning is not None:
-            translator_kwargs["reasoning"] = args.openai_reasoning
-        translator = OpenAITranslator(
-            lang_in=args.lang_in,
-            lang_out=args.lang_out,
-            model=args.openai_model,
-            base_url=args.openai_base_url,
-            api_key=args.openai_api_key,
-            ignore_cache=args.ignore_cache,
-            enable_json_mode_if_requested=args.enable_json_mode_if_requested,
-            send_dashscope_header=args.send_dashscope_header,
-            send_temperature=not args.no_send_temperature,
-            **translator_kwargs,
-        )
-        term_extraction_translator = translator
-        if (
-            args.openai_term_extraction_model
-            or args.openai_term_extraction_base_url
-            or args.openai_term_extraction_api_key
-        ):
-            term_translator_kwargs: dict[str, Any] = {}
-            if args.openai_term_extraction_reasoning is not None:
-                term_translator_kwargs["reasoning"] = (
-                    args.openai_term_extraction_reasoning
-                )
-            term_extraction_translator = OpenAITranslator(
-                lang_in=args.lang_in,
-                lang_out=args.lang_out,
-                model=args.openai_term_extraction_model or args.openai_model,
-                base_url=(args.openai_term_extraction_base_url or args.openai_base_url),
-                api_key=args.openai_term_extraction_api_key or args.openai_api_key,
-                ignore_cache=args.ignore_cache,
-                enable_json_mode_if_requested=args.enable_json_mode_if_requested,
-                send_dashscope_header=args.send_dashscope_header,
-                send_temperature=not args.no_send_temperature,
-                **term_translator_kwargs,
-            )
-    else:
-        raise ValueError("Invalid translator type")
+    lang_outs = parse_lang_outs(args.lang_out)
+    if not lang_outs:
+        parser.error("--lang-out must name at least one language")
+
+    # 实例化翻译器, one per target language
+    translators = {
+        lang_out: create_translators(args, lang_out) for lang_out in lang_outs
+    }
 
     # 设置翻译速率限制
-    set_translate_rate_limiter(args.qps)
+    set_translate_rate_limiter(args.qps, args.tpm)
+    if args.cache_server:
+        set_cache_backend(RemoteCacheBackend.from_address(args.cache_server))
     # 初始化文档布局模型
     if args.rpc_doclayout:
         from babeldoc.docvision.rpc_doclayout import RpcDocLayoutModel
@@ -576,30 +604,10 @@ async def main():
         table_model = None
 
     # Load glossaries
-    loaded_glossaries: list[Glossary] = []
-    if args.glossary_files:
-        paths_str = args.glossary_files.split(",")
-        for p_str in paths_str:
-            file_path = Path(p_str.strip())
-            if not file_path.exists():
-                logger.error(f"Glossary file not found: {file_path}")
-                continue
-            if not file_path.is_file():
-                logger.error(f"Glossary path is not a file: {file_path}")
-                continue
-            try:
-                glossary_obj = Glossary.from_csv(file_path, args.lang_out)
-                if glossary_obj.entries:
-                    loaded_glossaries.append(glossary_obj)
-                    logger.info(
-                        f"Loaded glossary '{glossary_obj.name}' with {len(glossary_obj.entries)} entries."
-                    )
-                else:
-                    logger.info(
-                        f"Glossary '{file_path.stem}' loaded with no applicable entries for lang_out '{args.lang_out}'."
-                    )
-            except Exception as e:
-                logger.error(f"Failed to load glossary from {file_path}: {e}")
+    loaded_glossaries = {
+        lang_out: load_glossaries(args.glossary_files, lang_out)
+        for lang_out in lang_outs
+    }
 
     pending_files = []
     for file in args.files:
@@ -629,6 +637,13 @@ async def main():
     else:
         args.output = None
 
+    if args.resume:
+        if args.working_dir and Path(args.working_dir) != Path(args.resume):
+            parser.error("--resume and --working-dir must name the same directory")
+        if not Path(args.resume).is_dir():
+            parser.error(f"--resume: working directory {args.resume} does not exist")
+        args.working_dir = args.resume
+
     if args.working_dir:
         working_dir = Path(args.working_dir)
         if not working_dir.exists():
@@ -660,16 +675,20 @@ async def main():
             args.max_pages_per_part
         )
 
+    progress_event_stream = None
+    if args.progress_fd is not None:
+        progress_event_stream = os.fdopen(
+            args.progress_fd, "wb", buffering=0, closefd=False
+        )
+
     total_term_extraction_total_tokens = 0
     total_term_extraction_prompt_tokens = 0
     total_term_extraction_completion_tokens = 0
     total_term_extraction_cache_hit_prompt_tokens = 0
 
-    for file in pending_files:
-        # 清理文件路径，去除两端的引号
-        file = file.strip("\"'")
-        # 创建配置对象
-        config = TranslationConfig(
+    def create_config(file: str, lang_out: str) -> TranslationConfig:
+        translator, term_extraction_translator = translators[lang_out]
+        return TranslationConfig(
             input_file=file,
             font=None,
             pages=args.pages,
@@ -678,7 +697,7 @@ async def main():
             term_extraction_translator=term_extraction_translator,
             debug=args.debug,
             lang_in=args.lang_in,
-            lang_out=args.lang_out,
+            lang_out=lang_out,
             no_dual=args.no_dual,
             no_mono=args.no_mono,
             qps=args.qps,
@@ -703,7 +722,7 @@ async def main():
             custom_system_prompt=args.custom_system_prompt,
             working_dir=working_dir,
             add_formula_placehold_hint=args.add_formula_placehold_hint,
-            glossaries=loaded_glossaries,
+            glossaries=loaded_glossaries[lang_out],
             pool_max_workers=args.pool_max_workers,
             auto_extract_glossary=args.auto_extract_glossary,
             auto_enable_ocr_workaround=args.auto_enable_ocr_workaround,
@@ -722,42 +741,52 @@ async def main():
             skip_formula_offset_calculation=args.skip_formula_offset_calculation,
             metadata_extra_data=args.metadata_extra_data,
             term_pool_max_workers=args.term_pool_max_workers,
+            use_il_cache=not args.ignore_il_cache,
+            resume=bool(args.resume),
+            use_layout_cache=not args.ignore_layout_cache,
+            max_concurrent_requests=args.max_concurrent_requests,
+            typesetting_workers=args.typesetting_workers,
         )
 
-        def nop(_x):
-            pass
+    def nop(_x):
+        pass
 
-        getattr(doc_layout_model, "init_font_mapper", nop)(config)
-        # Create progress handler
-        progress_context, progress_handler = create_progress_handler(
-            config, show_log=False
-        )
+    for file in pending_files:
+        # 清理文件路径，去除两端的引号
+        file = file.strip("\"'")
+        # 创建配置对象
+        configs = [create_config(file, lang_out) for lang_out in lang_outs]
+        for config in configs:
+            getattr(doc_layout_model, "init_font_mapper", nop)(config)
 
-        # 开始翻译
-        with progress_context:
-            async for event in babeldoc.format.pdf.high_level.async_translate(config):
-                progress_handler(event)
-                if config.debug:
-                    logger.debug(event)
-                if event["type"] == "error":
-                    logger.error(f"Error: {event['error']}")
-                    break
-                if event["type"] == "finish":
-                    result = event["translate_result"]
-                    logger.info(str(result))
-                    break
-        usage = config.term_extraction_token_usage
-        total_term_extraction_total_tokens += usage["total_tokens"]
-        total_term_extraction_prompt_tokens += usage["prompt_tokens"]
-        total_term_extraction_completion_tokens += usage["completion_tokens"]
-        total_term_extraction_cache_hit_prompt_tokens += usage[
-            "cache_hit_prompt_tokens"
-        ]
-    logger.info(f"Total tokens: {translator.token_count.value}")
-    logger.info(f"Prompt tokens: {translator.prompt_token_count.value}")
-    logger.info(f"Completion tokens: {translator.completion_token_count.value}")
+        # All languages share one parse; split translation handles each part
+        # separately, so with a split strategy each language gets its own run.
+        if split_strategy and len(configs) > 1:
+            runs = [[config] for config in configs]
+        else:
+            runs = [configs]
+
+        for run_configs in runs:
+            await translate_file(run_configs, file, progress_event_stream)
+
+        for config in configs:
+            usage = config.term_extraction_token_usage
+            total_term_extraction_total_tokens += usage["total_tokens"]
+            total_term_extraction_prompt_tokens += usage["prompt_tokens"]
+            total_term_extraction_completion_tokens += usage["completion_tokens"]
+            total_term_extraction_cache_hit_prompt_tokens += usage[
+                "cache_hit_prompt_tokens"
+            ]
+    main_translators = [translator for translator, _ in translators.values()]
+    logger.info(f"Total tokens: {sum_token_count(main_translators, 'token_count')}")
     logger.info(
-        f"Cache hit prompt tokens: {translator.cache_hit_prompt_token_count.value}"
+        f"Prompt tokens: {sum_token_count(main_translators, 'prompt_token_count')}"
+    )
+    logger.info(
+        f"Completion tokens: {sum_token_count(main_translators, 'completion_token_count')}"
+    )
+    logger.info(
+        f"Cache hit prompt tokens: {sum_token_count(main_translators, 'cache_hit_prompt_token_count')}"
     )
     logger.info(
         "Term extraction tokens: total=%s prompt=%s completion=%s cache_hit_prompt=%s",
@@ -766,14 +795,149 @@ async def main():
         total_term_extraction_completion_tokens,
         total_term_extraction_cache_hit_prompt_tokens,
     )
-    if term_extraction_translator is not translator:
+    term_translators = [
+        term_extraction_translator
+        for translator, term_extraction_translator in translators.values()
+        if term_extraction_translator is not translator
+    ]
+    if term_translators:
         logger.info(
             "Term extraction translator raw tokens: total=%s prompt=%s completion=%s cache_hit_prompt=%s",
-            term_extraction_translator.token_count.value,
-            term_extraction_translator.prompt_token_count.value,
-            term_extraction_translator.completion_token_count.value,
-            term_extraction_translator.cache_hit_prompt_token_count.value,
+            sum_token_count(term_translators, "token_count"),
+            sum_token_count(term_translators, "prompt_token_count"),
+            sum_token_count(term_translators, "completion_token_count"),
+            sum_token_count(term_translators, "cache_hit_prompt_token_count"),
+        )
+
+
+def parse_lang_outs(lang_out: str) -> list[str]:
+    """Split a ``--lang-out`` value such as ``es,fr,de`` into language codes."""
+    lang_outs = []
+    for code in lang_out.split(","):
+        code = code.strip()
+        if code and code not in lang_outs:
+            lang_outs.append(code)
+    return lang_outs
+
+
+def sum_token_count(translators, counter: str) -> int:
+    return sum(getattr(translator, counter).value for translator in translators)
+
+
+def create_translators(args, lang_out: str):
+    """Create the translator and term extraction translator for one language."""
+    if args.openai:
+        translator_kwargs: dict[str, Any] = {}
+        if args.openai_reasoning is not None:
+            translator_kwargs["reasoning"] = args.openai_reasoning
+        translator = OpenAITranslator(
+            lang_in=args.lang_in,
+            lang_out=lang_out,
+            model=args.openai_model,
+            base_url=args.openai_base_url,
+            api_key=args.openai_api_key,
+            ignore_cache=args.ignore_cache,
+            enable_json_mode_if_requested=args.enable_json_mode_if_requested,
+            send_dashscope_header=args.send_dashscope_header,
+            send_temperature=not args.no_send_temperature,
+            **translator_kwargs,
+        )
+        term_extraction_translator = translator
+        if (
+            args.openai_term_extraction_model
+            or args.openai_term_extraction_base_url
+            or args.openai_term_extraction_api_key
+        ):
+            term_translator_kwargs: dict[str, Any] = {}
+            if args.openai_term_extraction_reasoning is not None:
+                term_translator_kwargs["reasoning"] = (
+                    args.openai_term_extraction_reasoning
+                )
+            term_extraction_translator = OpenAITranslator(
+                lang_in=args.lang_in,
+                lang_out=lang_out,
+                model=args.openai_term_extraction_model or args.openai_model,
+                base_url=(args.openai_term_extraction_base_url or args.openai_base_url),
+                api_key=args.openai_term_extraction_api_key or args.openai_api_key,
+                ignore_cache=args.ignore_cache,
+                enable_json_mode_if_requested=args.enable_json_mode_if_requested,
+                send_dashscope_header=args.send_dashscope_header,
+                send_temperature=not args.no_send_temperature,
+                **term_translator_kwargs,
+            )
+    else:
+        raise ValueError("Invalid translator type")
+    return translator, term_extraction_translator
+
+
+def load_glossaries(glossary_files: str | None, lang_out: str) -> list[Glossary]:
+    """Load the glossary entries that apply to ``lang_out``."""
+    loaded_glossaries: list[Glossary] = []
+    if not glossary_files:
+        return loaded_glossaries
+    for p_str in glossary_files.split(","):
+        file_path = Path(p_str.strip())
+        if not file_path.exists():
+            logger.error(f"Glossary file not found: {file_path}")
+            continue
+        if not file_path.is_file():
+            logger.error(f"Glossary path is not a file: {file_path}")
+            continue
+        try:
+            glossary_obj = Glossary.from_csv(file_path, lang_out)
+            if glossary_obj.entries:
+                loaded_glossaries.append(glossary_obj)
+                logger.info(
+                    f"Loaded glossary '{glossary_obj.name}' with {len(glossary_obj.entries)} entries."
+                )
+            else:
+                logger.info(
+                    f"Glossary '{file_path.stem}' loaded with no applicable entries for lang_out '{lang_out}'."
+                )
+        except Exception as e:
+            logger.error(f"Failed to load glossary from {file_path}: {e}")
+    return loaded_glossaries
+
+
+async def translate_file(
+    configs: list[TranslationConfig], file: str, progress_event_stream=None
+):
+    """Translate one file into the languages of ``configs``, showing progress."""
+    config = configs[0]
+    # Create progress handler
+    progress_context, progress_handler = create_progress_handler(
+        config, show_log=False
+    )
+    progress_event_writer = None
+    if progress_event_stream:
+        progress_event_writer = ProgressEventWriter(
+            progress_event_stream, input_file=file
         )
+    if len(configs) == 1:
+        events = babeldoc.format.pdf.high_level.async_translate(config)
+    else:
+        events = babeldoc.format.pdf.high_level.async_translate_multi_target(configs)
+
+    # 开始翻译
+    with progress_context:
+        async for event in events:
+            progress_handler(event)
+            if progress_event_writer:
+                progress_event_writer.write(event)
+            if config.debug:
+                logger.debug(event)
+            if event["type"] == "error":
+                logger.error(f"Error: {event['error']}")
+                break
+            if event["type"] == "finish":
+                results = event.get("translate_results") or {
+                    config.lang_out: event["translate_result"]
+                }
+                for result in results.values():
+                    logger.info(str(result))
+                for lang_out, error in event.get("translate_errors", {}).items():
+                    logger.error(f"Error ({lang_out}): {error}")
+                break
 
 
 def create_progress_handler(
@@ -925,6 +1089,9 @@ def cli():
             v.disabled = True
             v.propagate = False
 
+    if sys.argv[1:2] == ["cache"]:
+        sys.exit(cache_cli.main(sys.argv[2:]))
+
     speed_up_logs()
     babeldoc.format.pdf.high_level.init()
     asyncio.run(main())
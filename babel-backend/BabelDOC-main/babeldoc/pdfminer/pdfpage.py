@@ -1,6 +1,8 @@
+import bisect
 import itertools
 import logging
 from collections.abc import Container
+from collections.abc import Iterable
 from collections.abc import Iterator
 from typing import Any
 from typing import BinaryIO
@@ -157,6 +159,114 @@ class PDFPage:
                     except PDFObjectNotFound:
                         pass
 
+    @classmethod
+    def count_pages(cls, document: PDFDocument) -> int:
+        """Return the number of pages without creating them.
+
+        The /Count of the page tree root is used when it is valid.
+        """
+        if "Pages" in document.catalog:
+            try:
+                count = resolve1(dict_value(document.catalog["Pages"]).get("Count"))
+            except Exception:
+                count = None
+            if isinstance(count, int) and count > 0:
+                return count
+        return sum(1 for _ in cls.create_pages(document))
+
+    @classmethod
+    def create_pages_by_index(
+        cls,
+        document: PDFDocument,
+        page_indices: Iterable[int],
+    ) -> Iterator[tuple[int, "PDFPage"]]:
+        """Yield (index, page) for the given zero-based page indices, in order.
+
+        Unlike create_pages, page tree nodes holding none of the wanted pages
+        are skipped using their /Count, so only the objects on the way to the
+        wanted pages are read. Indices past the last page are ignored.
+        """
+        wanted = sorted(set(page_indices))
+        if not wanted:
+            return
+        if "Pages" not in document.catalog:
+            for index, page in enumerate(cls.create_pages(document)):
+                if index > wanted[-1]:
+                    break
+                if index in wanted:
+                    yield index, page
+            return
+
+        try:
+            labels = list(itertools.islice(document.get_page_labels(), wanted[-1] + 1))
+        except PDFNoPageLabels:
+            labels = []
+
+        def wants_range(start: int, end: int) -> bool:
+            i = bisect.bisect_left(wanted, start)
+            return i < len(wanted) and wanted[i] < end
+
+        def resolve(
+            obj: Any, parent: dict[str, Any]
+        ) -> tuple[Any, dict[str, Any], Any]:
+            if isinstance(obj, int):
+                object_id = obj
+                object_properties = dict_value(document.getobj(object_id)).copy()
+            else:
+                object_id = obj.objid  # type: ignore[attr-defined]
+                object_properties = dict_value(obj).copy()
+            for k, v in parent.items():
+                if k in cls.INHERITABLE_ATTRS and k not in object_properties:
+                    object_properties[k] = v
+            object_type = object_properties.get("Type")
+            if object_type is None and not settings.STRICT:
+                object_type = object_properties.get("type")
+            return object_id, object_properties, object_type
+
+        def node_count(properties: dict[str, Any]) -> int | None:
+            count = resolve1(properties.get("Count"))
+            return count if isinstance(count, int) and count >= 0 else None
+
+        def walk(
+            object_id: Any,
+            properties: dict[str, Any],
+            object_type: Any,
+            start: int,
+            visited: set[Any],
+        ) -> Iterator[tuple[int, "PDFPage"]]:
+            """Walk the subtree whose first page has index start.
+
+            Returns the index following its last page.
+            """
+            if object_id in visited:
+                return start
+            visited.add(object_id)
+            if object_type is LITERAL_PAGE:
+                if wants_range(start, start + 1):
+                    label = labels[start] if start < len(labels) else None
+                    yield start, cls(document, object_id, properties, label)
+                return start + 1
+            if object_type is not LITERAL_PAGES or "Kids" not in properties:
+                return start
+            for kid in list_value(properties["Kids"]):
+                if start > wanted[-1]:
+                    break
+                kid_id, kid_properties, kid_type = resolve(kid, properties)
+                count = node_count(kid_properties)
+                if (
+                    kid_type is LITERAL_PAGES
+                    and count is not None
+                    and not wants_range(start, start + count)
+                ):
+                    start += count
+                    continue
+                start = yield from walk(
+                    kid_id, kid_properties, kid_type, start, visited
+                )
+            return start
+
+        yield from walk(*resolve(document.catalog["Pages"], document.catalog), 0, set())
+
     @classmethod
     def get_pages(
         cls,
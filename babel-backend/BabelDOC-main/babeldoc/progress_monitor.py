@@ -1,13 +1,22 @@
 import asyncio
 import logging
+import select
 import threading
 import time
 from asyncio import CancelledError
 from collections.abc import Callable
+from pathlib import Path
+from typing import BinaryIO
 from typing import Optional
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
+# Writes to a pipe are atomic only up to PIPE_BUF bytes
+MAX_EVENT_BYTES = getattr(select, "PIPE_BUF", 4096)
+_TRUNCATED = "... [truncated]"
+
 
 class ProgressMonitor:
     def __init__(
@@ -268,11 +277,13 @@ class ProgressMonitor:
             )
             self.last_report_time = time.time()
 
-    def translate_done(self, translate_result):
+    def translate_done(self, translate_result, **extra):
         if self.disable or self.parent_monitor and self.parent_monitor.disable:
             return
         if self.finish_callback:
-            self.finish_callback(type="finish", translate_result=translate_result)
+            self.finish_callback(
+                type="finish", translate_result=translate_result, **extra
+            )
 
     def translate_error(self, error):
         if self.disable or self.parent_monitor and self.parent_monitor.disable:
@@ -293,6 +304,34 @@ class ProgressMonitor:
             self.cancel_event.set()
 
 
+class ScopedProgressMonitor:
+    """A view of a ProgressMonitor that reports its stages under a scope.
+
+    Used when one monitor tracks the same stages several times, e.g. once per
+    target language: ``stage_start("Typesetting")`` starts the monitor's
+    ``"Typesetting (fr)"`` stage. Everything else is delegated.
+    """
+
+    def __init__(self, monitor: ProgressMonitor, scope: str):
+        self.monitor = monitor
+        self.scope = scope
+        self.disable = False
+
+    @staticmethod
+    def scoped_stage_name(stage_name: str, scope: str) -> str:
+        return f"{stage_name} ({scope})"
+
+    def stage_start(self, stage_name: str, total: int):
+        if self.disable:
+            return DummyTranslationStage(stage_name, total, self.monitor, 0)
+        return self.monitor.stage_start(
+            self.scoped_stage_name(stage_name, self.scope), total
+        )
+
+    def __getattr__(self, name):
+        return getattr(self.monitor, name)
+
+
 class TranslationStage:
     def __init__(
         self,
@@ -361,3 +400,133 @@ class DummyTranslationStage:
 
     def advance(self, n: int = 1):
         pass
+
+
+class RetryableStage:
+    """Wraps a stage whose work may be redone from the start.
+
+    After ``restart()`` the stage is only advanced again once the redone work
+    gets past what was already counted, so a serial fallback after a failed
+    parallel attempt does not push the stage beyond its total.
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.counted = 0
+        self.position = 0
+
+    def restart(self):
+        self.position = 0
+
+    def advance(self, n: int = 1):
+        self.position += n
+        if self.position > self.counted:
+            self.stage.advance(self.position - self.counted)
+            self.counted = self.position
+
+
+def _serialize_translate_result(translate_result) -> dict | None:
+    if translate_result is None:
+        return None
+    return {
+        k: str(v) if isinstance(v, Path) else v
+        for k, v in vars(translate_result).items()
+        if v is None or isinstance(v, str | int | float | bool | Path)
+    }
+
+
+def serialize_progress_event(event: dict) -> dict:
+    """Convert a progress event into a JSON-serializable dict.
+
+    ``finish`` events carry a TranslateResult (multi-target runs also carry
+    ``translate_results`` and ``translate_errors`` dicts keyed by target
+    language) and ``error`` events
+    carry an exception; both are flattened so the event can cross a process
+    boundary.
+    """
+    result = dict(event)
+    if "translate_result" in result:
+        result["translate_result"] = _serialize_translate_result(
+            result["translate_result"]
+        )
+    if "translate_results" in result:
+        result["translate_results"] = {
+            lang_out: _serialize_translate_result(translate_result)
+            for lang_out, translate_result in result["translate_results"].items()
+        }
+    if "translate_errors" in result:
+        result["translate_errors"] = {
+            lang_out: {"error_type": type(error).__name__, "error": str(error)}
+            for lang_out, error in result["translate_errors"].items()
+        }
+    if "error" in result:
+        error = result["error"]
+        if isinstance(error, type):
+            result["error_type"] = error.__name__
+            result["error"] = error.__name__
+        else:
+            result["error_type"] = type(error).__name__
+            result["error"] = str(error)
+    return result
+
+
+class ProgressEventWriter:
+    """Publish progress events as JSON lines, one event per write.
+
+    Each line is written with a single ``write`` call on an unbuffered
+    stream, so several processes can share one pipe without interleaving.
+    That needs lines of at most ``MAX_EVENT_BYTES``; the longest strings of a
+    larger event, usually an error message, are truncated to fit.
+    """
+
+    def __init__(self, stream: BinaryIO, **extra_fields):
+        self.stream = stream
+        self.extra_fields = extra_fields
+
+    @staticmethod
+    def _dumps(event: dict) -> bytes:
+        return orjson.dumps(
+            event,
+            default=str,
+            option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY,
+        )
+
+    def write(self, event: dict):
+        event = serialize_progress_event(event)
+        event.update(self.extra_fields)
+        line = self._dumps(event)
+        while len(line) > MAX_EVENT_BYTES:
+            # The error messages of a multi-target finish event are nested
+            fields = [(event, k) for k in event]
+            for value in event.values():
+                if isinstance(value, dict):
+                    fields.extend(
+                        (v, k) for v in value.values() if isinstance(v, dict) for k in v
+                    )
+            container, key = max(
+                ((c, k) for c, k in fields if isinstance(c[k], str)),
+                key=lambda field: len(field[0][field[1]]),
+                default=(event, None),
+            )
+            value = container.get(key)
+            if key is None or len(value) <= len(_TRUNCATED):
+                logger.warning(
+                    "progress event of %d bytes cannot be shortened to %d bytes",
+                    len(line),
+                    MAX_EVENT_BYTES,
+                )
+                break
+            # Escaping makes the JSON longer than the UTF-8 of the value, so
+            # this can take more than one round
+            excess = len(line) - MAX_EVENT_BYTES
+            keep = value.encode()[: max(0, len(value.encode()) - excess - 16)]
+            container[key] = keep.decode(errors="ignore") + _TRUNCATED
+            line = self._dumps(event)
+        try:
+            self.stream.write(line)
+            self.stream.flush()
+        except (BrokenPipeError, ValueError):
+            logger.debug("progress event stream closed, dropping event")
+
+    def close(self):
+        self.stream.close()
@@ -0,0 +1,157 @@
+# Measure the cost per character of rendering a page of text to a content
+# stream: the former renderer, which appended one BT ... ET block per
+# character to a bitstring.BitStream, against ContentStreamWriter.
+
+import argparse
+import functools
+import random
+import time
+
+import pymupdf
+from babeldoc.format.pdf.document_il import il_version_1
+from babeldoc.format.pdf.document_il.backend.content_stream import ContentStreamWriter
+from babeldoc.format.pdf.document_il.backend.pdf_creater import CharacterRenderUnit
+from babeldoc.format.pdf.document_il.backend.pdf_creater import PDFCreater
+from babeldoc.format.pdf.document_il.backend.pdf_creater import RenderContext
+from bitstring import BitStream
+from rich.console import Console
+from rich.table import Table
+
+WORDS = (
+    "the translation of a scientific article is usually longer than the "
+    "original and still has to fit into the same box so that figures tables "
+    "and formulas stay where they are"
+).split()
+
+
+class _Config:
+    """The part of TranslationConfig that PDFCreater uses for rendering."""
+
+    font = None
+    skip_form_render = False
+    skip_curve_render = False
+    ocr_workaround = False
+    debug = False
+
+
+class _FontMapper:
+    """The part of FontMapper that PDFCreater uses for rendering."""
+
+    def __init__(self):
+        # Cached like the fonts of fontmap.load_font
+        font = pymupdf.Font("helv")
+        font.has_glyph = functools.lru_cache(maxsize=10240, typed=True)(font.has_glyph)
+        font.char_lengths = functools.lru_cache(maxsize=10240, typed=True)(
+            font.char_lengths
+        )
+        self.fontid2font = {"base": font}
+
+
+class BitStreamCharacterRenderUnit(CharacterRenderUnit):
+    """The former character renderer: one text object per character."""
+
+    def render(self, draw_op: BitStream, context: RenderContext) -> None:
+        char = self.char
+        char_size = char.pdf_style.font_size
+        font_id = char.pdf_style.font_id
+        encoding_length = context.page_encoding_length_map[font_id]
+        draw_op.append(b"q ")
+        context.pdf_creator.render_graphic_state(draw_op, char.pdf_style.graphic_state)
+        draw_op.append(
+            f"BT /{font_id} {char_size:f} Tf 1 0 0 1 {char.box.x:f} {char.box.y:f} Tm ".encode(),
+        )
+        draw_op.append(
+            f"<{char.pdf_character_id:0{encoding_length * 2}x}>".upper().encode(),
+        )
+        draw_op.append(b" Tj ET Q \n")
+
+
+def text_page(font: pymupdf.Font, seed: int = 0) -> il_version_1.Page:
+    """A page of typeset 9pt text in two columns."""
+    rng = random.Random(seed)  # noqa: S311
+    style = il_version_1.PdfStyle(
+        font_id="base",
+        font_size=9,
+        graphic_state=il_version_1.GraphicState(
+            passthrough_per_char_instruction="0 g 0 G"
+        ),
+    )
+    page = il_version_1.Page(
+        page_number=0,
+        cropbox=il_version_1.Cropbox(box=il_version_1.Box(0, 0, 612, 792)),
+        pdf_font=[il_version_1.PdfFont(font_id="base", encoding_length=2)],
+    )
+    for column_x in (54, 318):
+        for y in range(740, 60, -11):
+            x = column_x
+            while True:
+                word = rng.choice(WORDS) + " "
+                widths = font.char_lengths(word, 9)
+                if x + sum(widths) > column_x + 240:
+                    break
+                for char, width in zip(word, widths, strict=True):
+                    page.pdf_character.append(
+                        il_version_1.PdfCharacter(
+                            char_unicode=char,
+                            pdf_character_id=font.has_glyph(ord(char)),
+                            box=il_version_1.Box(x, y, x + width, y + 9),
+                            pdf_style=style,
+                        )
+                    )
+                    x += width
+    return page
+
+
+def run(unit_class, writer_class, page, pdf_creater, repeat):
+    context = RenderContext(
+        pdf_creator=pdf_creater,
+        page=page,
+        available_font_list={"base"},
+        page_encoding_length_map={"base": 2},
+        all_encoding_length_map={"base": 2},
+        xobj_available_fonts={},
+        xobj_encoding_length_map={},
+        ctm_for_ops=b"",
+    )
+    units = [unit_class(char, 100, i) for i, char in enumerate(page.pdf_character)]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        draw_op = writer_class()
+        for unit in units:
+            unit.render(draw_op, context)
+        stream = draw_op.tobytes()
+    elapsed = time.perf_counter() - start
+    return elapsed / repeat / len(units), len(stream)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark content streams.")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    font_mapper = _FontMapper()
+    pdf_creater = PDFCreater(None, None, _Config(), None, font_mapper=font_mapper)
+    page = text_page(font_mapper.fontid2font["base"], args.seed)
+    # Warm up the glyph caches
+    run(CharacterRenderUnit, ContentStreamWriter, page, pdf_creater, 1)
+
+    table = Table(title=f"Content stream of {len(page.pdf_character)} characters")
+    table.add_column("Writer")
+    table.add_column("µs per character", justify="right")
+    table.add_column("Stream bytes", justify="right")
+    for name, unit_class, writer_class in (
+        (
+            "BitStream, one text object per character",
+            BitStreamCharacterRenderUnit,
+            BitStream,
+        ),
+        ("ContentStreamWriter", CharacterRenderUnit, ContentStreamWriter),
+    ):
+        seconds, size = run(unit_class, writer_class, page, pdf_creater, args.repeat)
+        table.add_row(name, f"{seconds * 1e6:.2f}", str(size))
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    main()
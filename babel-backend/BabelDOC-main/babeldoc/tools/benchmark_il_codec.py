@@ -0,0 +1,188 @@
+# Compare the size and speed of the IL serializations: JSON debug dumps,
+# pickle (used between processes) and the columnar msgpack binary codec.
+
+import argparse
+import dataclasses
+import pickle
+import random
+import time
+import types
+import typing
+from pathlib import Path
+
+import orjson
+import pyzstd
+from babeldoc.format.pdf.document_il import binary_codec
+from babeldoc.format.pdf.document_il import il_version_1
+from babeldoc.format.pdf.document_il.xml_converter import XMLConverter
+from rich.console import Console
+from rich.table import Table
+
+
+def from_dict(cls: type, data: dict):
+    """Rebuild an IL object from the dicts of an XMLConverter.to_json dump."""
+    kwargs = {}
+    for field in dataclasses.fields(cls):
+        if field.name not in data:
+            continue
+        value = data[field.name]
+        field_type = field.type
+        if typing.get_origin(field_type) in (typing.Union, types.UnionType):
+            (field_type,) = [
+                arg for arg in typing.get_args(field_type) if arg is not type(None)
+            ]
+        if value is not None:
+            if typing.get_origin(field_type) is list:
+                (item_type,) = typing.get_args(field_type)
+                if dataclasses.is_dataclass(item_type):
+                    value = [from_dict(item_type, item) for item in value]
+            elif dataclasses.is_dataclass(field_type):
+                value = from_dict(field_type, value)
+        kwargs[field.name] = value
+    return cls(**kwargs)
+
+
+def synthetic_document(pages: int, chars_per_page: int) -> il_version_1.Document:
+    """A document shaped like ILCreater output after paragraph finding."""
+    rng = random.Random(0)  # noqa: S311
+    style = il_version_1.PdfStyle(
+        graphic_state=il_version_1.GraphicState(
+            passthrough_per_char_instruction="0 g /GS1 gs"
+        ),
+        font_id="F1",
+        font_size=10.0,
+    )
+
+    def box() -> il_version_1.Box:
+        x = round(rng.uniform(50, 550), 3)
+        y = round(rng.uniform(50, 750), 3)
+        return il_version_1.Box(x=x, y=y, x2=x + 5.2, y2=y + 10.0)
+
+    result = []
+    for page_number in range(pages):
+        chars = [
+            il_version_1.PdfCharacter(
+                pdf_style=style,
+                box=box(),
+                visual_bbox=il_version_1.VisualBbox(box=box()),
+                vertical=False,
+                pdf_character_id=rng.randrange(32, 127),
+                char_unicode=chr(rng.randrange(97, 123)),
+                advance=5.2,
+                render_order=page_number * 1000000 + i,
+                sub_render_order=0,
+            )
+            for i in range(chars_per_page)
+        ]
+        lines = [
+            il_version_1.PdfLine(box=box(), pdf_character=chars[i : i + 80])
+            for i in range(0, chars_per_page, 80)
+        ]
+        paragraph = il_version_1.PdfParagraph(
+            box=box(),
+            pdf_style=style,
+            pdf_paragraph_composition=[
+                il_version_1.PdfParagraphComposition(pdf_line=line) for line in lines
+            ],
+            unicode="".join(c.char_unicode for c in chars),
+            layout_label="plain text",
+        )
+        curve = il_version_1.PdfCurve(
+            box=box(),
+            pdf_path=[
+                il_version_1.PdfPath(x=1.0, y=2.0, op="l", has_xy=True)
+                for _ in range(8)
+            ],
+            ctm=[1.0, 0.0, 0.0, 1.0, 0.0, 0.0],
+        )
+        result.append(
+            il_version_1.Page(
+                mediabox=il_version_1.Mediabox(
+                    box=il_version_1.Box(x=0.0, y=0.0, x2=612.0, y2=792.0)
+                ),
+                pdf_paragraph=[paragraph],
+                pdf_curve=[curve] * 20,
+                page_number=page_number,
+                unit="point",
+                base_operations=il_version_1.BaseOperations(value="q 1 0 0 1 0 0 cm Q"),
+            )
+        )
+    return il_version_1.Document(page=result, total_pages=pages)
+
+
+def measure(encode, decode, repeat: int) -> tuple[int, float, float]:
+    best_encode = best_decode = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = encode()
+        best_encode = min(best_encode, time.perf_counter() - start)
+        start = time.perf_counter()
+        decode(data)
+        best_decode = min(best_decode, time.perf_counter() - start)
+    return len(data), best_encode, best_decode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark IL serializations.")
+    parser.add_argument(
+        "--json",
+        help="IL debug dump to load (e.g. styles_and_formulas.json from a "
+        "--debug run); a synthetic document is used if not given",
+    )
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--chars-per-page", type=int, default=2500)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--skip-json", action="store_true", help="Do not time the slow JSON path"
+    )
+    args = parser.parse_args()
+
+    if args.json:
+        document = from_dict(
+            il_version_1.Document, orjson.loads(Path(args.json).read_bytes())
+        )
+    else:
+        document = synthetic_document(args.pages, args.chars_per_page)
+
+    converter = XMLConverter()
+    candidates = {
+        "pickle": (
+            lambda: pickle.dumps(document, protocol=pickle.HIGHEST_PROTOCOL),
+            pickle.loads,
+        ),
+        "pickle + zstd": (
+            lambda: pyzstd.compress(
+                pickle.dumps(document, protocol=pickle.HIGHEST_PROTOCOL)
+            ),
+            lambda data: pickle.loads(pyzstd.decompress(data)),  # noqa: S301
+        ),
+        "binary_codec": (
+            lambda: binary_codec.encode(document),
+            binary_codec.decode,
+        ),
+        "binary_codec + zstd": (
+            lambda: pyzstd.compress(binary_codec.encode(document)),
+            lambda data: binary_codec.decode(pyzstd.decompress(data)),
+        ),
+    }
+    if not args.skip_json:
+        candidates["json (debug dump)"] = (
+            lambda: converter.to_json(document).encode(),
+            lambda data: from_dict(il_version_1.Document, orjson.loads(data)),
+        )
+
+    table = Table(title=f"IL serialization, {len(document.page)} pages")
+    table.add_column("Format")
+    table.add_column("Size (MiB)", justify="right")
+    table.add_column("Encode (s)", justify="right")
+    table.add_column("Decode (s)", justify="right")
+    for name, (encode, decode) in candidates.items():
+        size, encode_time, decode_time = measure(encode, decode, args.repeat)
+        table.add_row(
+            name, f"{size / 2**20:.2f}", f"{encode_time:.3f}", f"{decode_time:.3f}"
+        )
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# Measure layout detection throughput (pages/sec on CPU): the page-at-a-time
+# path (render, then infer one page) against the pipelined, batched
+# OnnxModel.handle_document at several batch sizes.
+
+import argparse
+import time
+
+import numpy as np
+import pymupdf
+from babeldoc.assets.assets import get_doclayout_onnx_model_path
+from babeldoc.docvision.doclayout import OnnxModel
+from babeldoc.format.pdf.document_il import il_version_1
+from babeldoc.format.pdf.document_il.utils.mupdf_helper import get_no_rotation_img
+from rich.console import Console
+from rich.table import Table
+
+
+class _Config:
+    """The part of TranslationConfig that handle_document uses."""
+
+    use_layout_cache = False
+
+    def raise_if_cancelled(self):
+        pass
+
+
+def synthetic_pdf(pages: int) -> pymupdf.Document:
+    doc = pymupdf.open()
+    for page_number in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Chapter {page_number}", fontsize=20)
+        for line in range(40):
+            page.insert_text(
+                (72, 110 + line * 16),
+                f"Line {line} of page {page_number}, lorem ipsum dolor sit amet.",
+            )
+    return doc
+
+
+def page_at_a_time(model: OnnxModel, doc: pymupdf.Document, pages: list) -> list:
+    results = []
+    for page in pages:
+        pix = get_no_rotation_img(doc[page.page_number])
+        image = np.frombuffer(pix.samples, np.uint8).reshape(pix.height, pix.width, 3)[
+            :, :, ::-1
+        ]
+        results.extend(model.predict(image, batch_size=1))
+    return results
+
+
+def pipelined(
+    model: OnnxModel, doc: pymupdf.Document, pages: list, batch_size: int
+) -> list:
+    model.batch_size = batch_size
+    return [
+        result
+        for _, result in model.handle_document(pages, doc, _Config(), lambda *_: None)
+    ]
+
+
+def same_results(expected: list, actual: list) -> bool:
+    return len(expected) == len(actual) and all(
+        len(a.boxes) == len(b.boxes)
+        and all(
+            np.allclose(x.xyxy, y.xyxy, atol=1e-2)
+            for x, y in zip(a.boxes, b.boxes, strict=True)
+        )
+        for a, b in zip(expected, actual, strict=True)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark layout detection.")
+    parser.add_argument("--pdf", help="PDF to run on; a synthetic one if not given")
+    parser.add_argument("--pages", type=int, default=32)
+    parser.add_argument("--model", help="ONNX layout model, default: the bundled one")
+    parser.add_argument(
+        "--batch-sizes",
+        default="1,2,4,8",
+        help="Comma separated batch sizes of the pipelined runs",
+    )
+    args = parser.parse_args()
+
+    model = OnnxModel(args.model or get_doclayout_onnx_model_path())
+    doc = pymupdf.open(args.pdf) if args.pdf else synthetic_pdf(args.pages)
+    pages = [il_version_1.Page(page_number=i) for i in range(min(args.pages, len(doc)))]
+    # Warm up the session and the allocator
+    page_at_a_time(model, doc, pages[:2])
+
+    table = Table(title=f"Layout detection, {len(pages)} pages")
+    table.add_column("Mode")
+    table.add_column("Seconds", justify="right")
+    table.add_column("Pages/sec", justify="right")
+    table.add_column("Same boxes", justify="right")
+
+    start = time.perf_counter()
+    expected = page_at_a_time(model, doc, pages)
+    elapsed = time.perf_counter() - start
+    table.add_row("page at a time", f"{elapsed:.2f}", f"{len(pages) / elapsed:.2f}", "")
+    for batch_size in (int(size) for size in args.batch_sizes.split(",")):
+        start = time.perf_counter()
+        results = pipelined(model, doc, pages, batch_size)
+        elapsed = time.perf_counter() - start
+        table.add_row(
+            f"pipelined, batch {batch_size}",
+            f"{elapsed:.2f}",
+            f"{len(pages) / elapsed:.2f}",
+            str(same_results(expected, results)),
+        )
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    main()
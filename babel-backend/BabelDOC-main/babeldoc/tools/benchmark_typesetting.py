@@ -0,0 +1,263 @@
+# Measure the paragraph scale search of Typesetting on a dense two-column
+# paper: the linear search, which lays the paragraph out at every candidate
+# scale in turn, against the binary search over ParagraphMetrics. With
+# --workers, also typeset the paper in that many worker processes.
+# --builtin-font typesets with PyMuPDF's Helvetica instead of the font
+# assets, for machines that cannot download them.
+
+import argparse
+import copy
+import random
+import time
+
+import pymupdf
+from babeldoc.format.pdf.document_il import il_version_1
+from babeldoc.format.pdf.document_il.midend.typesetting import MIN_SCALE
+from babeldoc.format.pdf.document_il.midend.typesetting import Typesetting
+from babeldoc.format.pdf.document_il.utils.fontmap import set_worker_font_mapper
+from babeldoc.format.pdf.translation_config import WatermarkOutputMode
+from rich.console import Console
+from rich.table import Table
+
+WORDS = (
+    "die Übersetzung eines wissenschaftlichen Artikels ist meistens länger als "
+    "das Original und muss trotzdem in denselben Kasten passen damit Abbildungen "
+    "Tabellen und Formeln an ihrem Platz bleiben wir messen hier nur den Satz"
+).split()
+
+
+class _Config:
+    """The part of TranslationConfig that Typesetting uses."""
+
+    lang_out = "de"
+    primary_font_family = None
+    watermark_output_mode = WatermarkOutputMode.NoWatermark
+    debug = False
+    progress_monitor = None
+    typesetting_workers = None
+
+    def raise_if_cancelled(self):
+        pass
+
+
+class _Progress:
+    def advance(self, n: int = 1):
+        pass
+
+
+class BuiltinFontMapper:
+    """The part of FontMapper that Typesetting and PDFCreater use, mapping
+    every character to PyMuPDF's built-in Helvetica."""
+
+    def __init__(self):
+        self.base_font = pymupdf.Font("helv")
+        self.base_font.font_id = "base"
+        self.base_font.encoding_length = 2
+        self.fontid2font = {"base": self.base_font}
+
+    def map(self, original_font, char_unicode: str):
+        return self.base_font
+
+    def add_font(self, doc_zh, il):
+        pass
+
+
+class LinearTypesetting(Typesetting):
+    """Typesetting with the former search: a full layout at every scale."""
+
+    def _find_optimal_scale_and_layout(
+        self,
+        paragraph,
+        page,
+        typesetting_units,
+        initial_scale=1.0,
+        use_english_line_break=True,
+        apply_layout=False,
+    ):
+        if not paragraph.box:
+            return initial_scale, None
+        line_skip = 1.50 if self.is_cjk else 1.4
+        for box, scales in self._scale_runs(
+            paragraph, page, initial_scale, apply_layout
+        ):
+            for scale in scales:
+                try:
+                    typeset_units, all_units_fit = self._layout_typesetting_units(
+                        typesetting_units,
+                        box,
+                        scale,
+                        line_skip,
+                        paragraph,
+                        use_english_line_break,
+                    )
+                except Exception:
+                    continue
+                if all_units_fit:
+                    if apply_layout:
+                        paragraph.scale = scale
+                        paragraph.pdf_paragraph_composition = [
+                            il_version_1.PdfParagraphComposition(pdf_character=char)
+                            for unit in typeset_units
+                            for char in unit.render()[0]
+                        ]
+                    return scale, typeset_units if apply_layout else None
+        if use_english_line_break:
+            return self._find_optimal_scale_and_layout(
+                paragraph, page, typesetting_units, initial_scale, False, apply_layout
+            )
+        return MIN_SCALE, None
+
+
+def paragraph_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)) + "."
+
+
+def dense_paper(pages: int, seed: int = 0) -> il_version_1.Document:
+    """A two-column paper whose translated paragraphs overflow their boxes."""
+    rng = random.Random(seed)  # noqa: S311
+    style = il_version_1.PdfStyle(
+        font_id="base", font_size=9, graphic_state=il_version_1.GraphicState()
+    )
+    document = il_version_1.Document(total_pages=pages)
+    for page_number in range(pages):
+        page = il_version_1.Page(
+            page_number=page_number,
+            cropbox=il_version_1.Cropbox(box=il_version_1.Box(0, 0, 612, 792)),
+        )
+        for column_x in (54, 318):
+            y2 = 740
+            while y2 > 80:
+                # Boxes sized for the source text; the translation is longer
+                lines = rng.randint(2, 12)
+                height = lines * 11
+                words = int(lines * 8 * rng.uniform(1.0, 1.8))
+                y = max(y2 - height, 60)
+                page.pdf_paragraph.append(
+                    il_version_1.PdfParagraph(
+                        box=il_version_1.Box(column_x, y, column_x + 240, y2),
+                        debug_id=f"p{page_number}-{column_x}-{y2}",
+                        first_line_indent=rng.random() < 0.5,
+                        xobj_id=-1,
+                        pdf_style=style,
+                        pdf_paragraph_composition=[
+                            il_version_1.PdfParagraphComposition(
+                                pdf_same_style_unicode_characters=il_version_1.PdfSameStyleUnicodeCharacters(
+                                    unicode=paragraph_text(rng, words),
+                                    pdf_style=style,
+                                )
+                            )
+                        ],
+                    )
+                )
+                y2 = y - 8
+        document.page.append(page)
+    return document
+
+
+class _PassCounter:
+    """Counts the full and the measure-only layout passes of a Typesetting."""
+
+    def __init__(self, typesetting: Typesetting):
+        self.counts = {"_layout_typesetting_units": 0, "_measure_layout": 0}
+        for name in self.counts:
+            setattr(typesetting, name, self._counting(name, getattr(typesetting, name)))
+
+    def _counting(self, name, method):
+        def counted(*args, **kwargs):
+            self.counts[name] += 1
+            return method(*args, **kwargs)
+
+        return counted
+
+
+def run(typesetting_class, document: il_version_1.Document, font_mapper=None):
+    typesetting = typesetting_class(_Config(), font_mapper)
+    counter = _PassCounter(typesetting)
+    document = copy.deepcopy(document)
+    start = time.perf_counter()
+    # What typesetting_document does, with a progress monitor
+    typesetting.preprocess_document(document, _Progress())
+    for page in document.page:
+        typesetting.render_page(page)
+    elapsed = time.perf_counter() - start
+    scales = [p.scale for page in document.page for p in page.pdf_paragraph]
+    return elapsed, counter.counts, scales
+
+
+def run_in_pool(document: il_version_1.Document, workers: int, font_mapper=None):
+    config = _Config()
+    config.typesetting_workers = workers
+    typesetting = Typesetting(config, font_mapper)
+    document = copy.deepcopy(document)
+    start = time.perf_counter()
+    typesetting._typesetting_pages(document, _Progress())
+    elapsed = time.perf_counter() - start
+    scales = [p.scale for page in document.page for p in page.pdf_paragraph]
+    return elapsed, scales
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark typesetting.")
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--builtin-font",
+        action="store_true",
+        help="Typeset with a built-in font instead of the font assets.",
+    )
+    args = parser.parse_args()
+
+    font_mapper = None
+    if args.builtin_font:
+        font_mapper = BuiltinFontMapper()
+        # The pool workers are forked later and inherit it
+        set_worker_font_mapper(_Config(), font_mapper)
+
+    document = dense_paper(args.pages, args.seed)
+    paragraphs = sum(len(page.pdf_paragraph) for page in document.page)
+    # Load the fonts and warm up the glyph caches
+    run(Typesetting, dense_paper(1, args.seed + 1), font_mapper)
+
+    table = Table(title=f"Typesetting, {args.pages} pages, {paragraphs} paragraphs")
+    table.add_column("Scale search")
+    table.add_column("Seconds", justify="right")
+    table.add_column("Full layouts", justify="right")
+    table.add_column("Measured layouts", justify="right")
+    table.add_column("Same scales", justify="right")
+
+    expected = None
+    for name, typesetting_class in (
+        ("linear", LinearTypesetting),
+        ("binary search", Typesetting),
+    ):
+        elapsed, counts, scales = run(typesetting_class, document, font_mapper)
+        if expected is None:
+            expected = scales
+        same = sum(a == b for a, b in zip(expected, scales, strict=True))
+        table.add_row(
+            name,
+            f"{elapsed:.2f}",
+            str(counts["_layout_typesetting_units"]),
+            str(counts["_measure_layout"]),
+            f"{same}/{paragraphs}",
+        )
+    if args.workers > 1:
+        # Start the workers and load their fonts first
+        run_in_pool(
+            dense_paper(args.workers * 4, args.seed + 1), args.workers, font_mapper
+        )
+        elapsed, scales = run_in_pool(document, args.workers, font_mapper)
+        same = sum(a == b for a, b in zip(expected, scales, strict=True))
+        table.add_row(
+            f"binary search, {args.workers} workers",
+            f"{elapsed:.2f}",
+            "-",
+            "-",
+            f"{same}/{paragraphs}",
+        )
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,27 @@
+import asyncio
+import hashlib
 import json
 import logging
 import random
 import threading
+import time
+from abc import ABC
+from abc import abstractmethod
+from collections import OrderedDict
+from collections.abc import Iterable
 from pathlib import Path
+from typing import NamedTuple
 
 import peewee
+import pyzstd
 from peewee import SQL
 from peewee import AutoField
+from peewee import BlobField
 from peewee import CharField
+from peewee import FloatField
+from peewee import IntegerField
 from peewee import Model
 from peewee import SqliteDatabase
-from peewee import TextField
 from peewee import fn  # For aggregation functions
 
 from babeldoc.const import CACHE_FOLDER
@@ -22,33 +33,159 @@ db = SqliteDatabase(None)
 
 # Cleanup configuration
 CLEAN_PROBABILITY = 0.001  # 0.1% chance to trigger cleanup
-MAX_CACHE_ROWS = 50_000  # Keep only the latest 50,000 rows
+MAX_CACHE_ROWS = 50_000  # Keep only the 50,000 most recently used rows
+MAX_CACHE_BYTES = 256 * 1024 * 1024  # ... and at most 256 MiB of stored data
+# Run VACUUM/wal_checkpoint after a cleanup at most this often (seconds)
+COMPACT_INTERVAL = 60 * 60
+# Unused space (fraction of the file) above which compaction runs VACUUM
+VACUUM_FREE_RATIO = 0.25
+
+# Texts shorter than this (in bytes) are stored uncompressed
+COMPRESS_MIN_SIZE = 64
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Entries kept in memory in front of the database, by least recent use
+LRU_CACHE_SIZE = 20_000
+# Keys per query of get_many, below SQLite's limit of host parameters
+BATCH_SIZE = 500
+# Access times are written back once this many entries were read
+ACCESS_FLUSH_SIZE = 1000
 
 # Thread-level mutex to ensure only one cleanup runs at a time within the process
 _cleanup_lock = threading.Lock()
+_compaction_lock = threading.Lock()
+_last_compaction: float | None = None
+_compaction_thread: threading.Thread | None = None
 
 
 class _TranslationCache(Model):
     id = AutoField()
+    # sha256 of translate_engine, translate_engine_params and original_text
+    key = CharField(max_length=64)
     translate_engine = CharField(max_length=20)
-    translate_engine_params = TextField()
-    original_text = TextField()
-    translation = TextField()
+    # Both are UTF-8, zstd compressed when long enough, see _pack
+    original_text = BlobField()
+    translation = BlobField()
+    # Bytes stored for the row, for the size limit
+    size = IntegerField()
+    last_access = FloatField(index=True)
 
     class Meta:
         database = db
-        constraints = [
-            SQL(
-                """
-            UNIQUE (
-                translate_engine,
-                translate_engine_params,
-                original_text
-                )
-            ON CONFLICT REPLACE
-            """,
-            ),
-        ]
+        constraints = [SQL("UNIQUE (key) ON CONFLICT REPLACE")]
+
+
+def _pack(text: str) -> bytes:
+    data = text.encode()
+    if len(data) >= COMPRESS_MIN_SIZE:
+        compressed = pyzstd.compress(data)
+        if len(compressed) < len(data):
+            return compressed
+    return data
+
+
+def _unpack(data: bytes) -> str:
+    # No UTF-8 text starts with the zstd magic number (0xB5 can't follow "(")
+    if data[:4] == _ZSTD_MAGIC:
+        data = pyzstd.decompress(data)
+    return bytes(data).decode()
+
+
+class CacheEntry(NamedTuple):
+    """One translation, as stored by a cache backend."""
+
+    key: str
+    translate_engine: str
+    original_text: str
+    translation: str
+
+
+class CacheBackend(ABC):
+    """
+    Where TranslationCache keeps its entries, behind the in-process LRU.
+
+    The default is the local SQLite database; set_cache_backend switches all
+    caches of the process, e.g. to a RemoteCacheBackend shared by several
+    hosts. Backends must be thread-safe and picklable, so that they can be
+    passed on to worker processes.
+    """
+
+    @abstractmethod
+    def get_many(self, keys: list[str]) -> dict[str, str]:
+        """The translations of those of ``keys`` that are cached."""
+
+    @abstractmethod
+    def set_many(self, entries: list[CacheEntry]) -> int:
+        """Store ``entries``, replacing those with the same keys.
+
+        Returns how many were stored: 0 if the backend was busy or could not
+        be reached and dropped them.
+        """
+
+    @abstractmethod
+    def scan(self, after_key: str = "", limit: int = 1000) -> list[CacheEntry]:
+        """Up to ``limit`` entries with keys after ``after_key``, in key order."""
+
+    def touch(self, keys: Iterable[str]):  # noqa: B027
+        """Note that ``keys`` were used, from memory, for eviction by last use."""
+
+    def cleanup(self):  # noqa: B027
+        """Evict entries beyond the size limits."""
+
+
+class _LRUCache:
+    """A thread-safe mapping that keeps the ``maxsize`` most recently used items."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+# Shared by all TranslationCache instances of the process
+_lru = _LRUCache(LRU_CACHE_SIZE)
+
+# Keys read since the access times were last written to the database
+_accessed_keys = set()
+_accessed_keys_lock = threading.Lock()
+
+
+def _record_access(keys: Iterable[str]):
+    with _accessed_keys_lock:
+        _accessed_keys.update(keys)
+        flush = len(_accessed_keys) >= ACCESS_FLUSH_SIZE
+    if flush:
+        _flush_access_times()
+
+
+def _flush_access_times():
+    """Write the access time of the entries read since the last flush."""
+    with _accessed_keys_lock:
+        keys = list(_accessed_keys)
+        _accessed_keys.clear()
+    now = time.time()
+    for start in range(0, len(keys), BATCH_SIZE):
+        _TranslationCache.update(last_access=now).where(
+            _TranslationCache.key.in_(keys[start : start + BATCH_SIZE])
+        ).execute()
 
 
 class TranslationCache:
@@ -77,6 +214,9 @@ class TranslationCache:
         self.params = params
         params = self._sort_dict_recursively(params)
         self.translate_engine_params = json.dumps(params)
+        self._key_prefix = hashlib.sha256(
+            f"{self.translate_engine}\0{self.translate_engine_params}\0".encode()
+        )
 
     def update_params(self, params: dict = None):
         if params is None:
@@ -88,67 +228,343 @@ class TranslationCache:
         self.params[k] = v
         self.replace_params(self.params)
 
-    # Since peewee and the underlying sqlite are thread-safe,
-    # get and set operations don't need locks.
+    def key(self, original_text: str) -> str:
+        """The fixed-size key of ``original_text`` under the current params."""
+        key = self._key_prefix.copy()
+        key.update(original_text.encode())
+        return key.hexdigest()
+
+    # The backends are thread-safe, so get and set operations don't need locks.
     def get(self, original_text: str) -> str | None:
-        try:
-            result = _TranslationCache.get_or_none(
-                translate_engine=self.translate_engine,
-                translate_engine_params=self.translate_engine_params,
-                original_text=original_text,
+        return self.get_many([original_text])[0]
+
+    def get_many(self, original_texts: Iterable[str]) -> list[str | None]:
+        """Look up many texts, asking the backend only for those not in memory."""
+        backend = get_cache_backend()
+        keys = [self.key(text) for text in original_texts]
+        translations = [_lru.get(key) for key in keys]
+        missing = list(
+            {
+                key
+                for key, found in zip(keys, translations, strict=True)
+                if found is None
+            }
+        )
+        backend.touch(
+            key
+            for key, translation in zip(keys, translations, strict=True)
+            if translation is not None
+        )
+        if not missing:
+            return translations
+        found = backend.get_many(missing)
+        for key, translation in found.items():
+            _lru.set(key, translation)
+        return [
+            translation if translation is not None else found.get(key)
+            for key, translation in zip(keys, translations, strict=True)
+        ]
+
+    def set(self, original_text: str, translation: str):
+        self.set_many([(original_text, translation)])
+
+    # The backends block on SQLite or on the cache server's socket, so callers
+    # on an event loop run them in a worker thread
+    async def aget(self, original_text: str) -> str | None:
+        return (await self.aget_many([original_text]))[0]
+
+    async def aget_many(self, original_texts: Iterable[str]) -> list[str | None]:
+        return await asyncio.to_thread(self.get_many, list(original_texts))
+
+    async def aset(self, original_text: str, translation: str):
+        await self.aset_many([(original_text, translation)])
+
+    async def aset_many(self, items: Iterable[tuple[str, str]]):
+        await asyncio.to_thread(self.set_many, list(items))
+
+    def set_many(self, items: Iterable[tuple[str, str]]):
+        """Store many (original_text, translation) pairs in one transaction."""
+        entries = []
+        for original_text, translation in items:
+            entry = CacheEntry(
+                self.key(original_text),
+                self.translate_engine,
+                original_text,
+                translation,
             )
+            # Readers in this process get the translations even if the
+            # backend fails to store them
+            _lru.set(entry.key, translation)
+            entries.append(entry)
+        get_cache_backend().set_many(entries)
+
+    def _cleanup(self) -> None:
+        get_cache_backend().cleanup()
+
+
+def _evict_least_recently_used() -> int:
+    """Delete the least recently used rows over the limits; returns how many."""
+    count, total_size = _TranslationCache.select(
+        fn.COUNT(_TranslationCache.id), fn.SUM(_TranslationCache.size)
+    ).scalar(as_tuple=True)
+    excess_rows = count - MAX_CACHE_ROWS
+    excess_bytes = (total_size or 0) - MAX_CACHE_BYTES
+    # Nothing to do if table is empty or below threshold
+    if excess_rows <= 0 and excess_bytes <= 0:
+        return 0
+    evicted = []
+    query = _TranslationCache.select(
+        _TranslationCache.id, _TranslationCache.size
+    ).order_by(_TranslationCache.last_access, _TranslationCache.id)
+    for row_id, size in query.tuples().iterator():
+        if excess_rows <= 0 and excess_bytes <= 0:
+            break
+        evicted.append(row_id)
+        excess_rows -= 1
+        excess_bytes -= size
+    with _TranslationCache._meta.database.atomic():
+        for start in range(0, len(evicted), BATCH_SIZE):
+            _TranslationCache.delete().where(
+                _TranslationCache.id.in_(evicted[start : start + BATCH_SIZE])
+            ).execute()
+    logger.info(f"Evicted {len(evicted)} translation cache entries")
+    return len(evicted)
+
+
+def _schedule_compaction():
+    """Run compact() in a background thread, at most once per COMPACT_INTERVAL."""
+    global _last_compaction, _compaction_thread
+    with _compaction_lock:
+        if (
+            _last_compaction is not None
+            and time.monotonic() - _last_compaction < COMPACT_INTERVAL
+        ):
+            return
+        _last_compaction = time.monotonic()
+        _compaction_thread = threading.Thread(
+            target=_compact_in_background, name="translation-cache-compaction"
+        )
+        _compaction_thread.start()
+
+
+def _compact_in_background():
+    try:
+        compact()
+    finally:
+        _TranslationCache._meta.database.close()
+
+
+def compact():
+    """Checkpoint the WAL into the database file and, when a large part of the
+    file is unused after evictions, VACUUM it."""
+    database = _TranslationCache._meta.database
+    try:
+        database.execute_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+        page_count = database.execute_sql("PRAGMA page_count").fetchone()[0]
+        free_pages = database.execute_sql("PRAGMA freelist_count").fetchone()[0]
+        if page_count and free_pages / page_count > VACUUM_FREE_RATIO:
+            logger.info("Vacuuming translation cache...")
+            database.execute_sql("VACUUM")
+            database.execute_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    except peewee.OperationalError as e:
+        # Busy with other connections, try again after the next cleanup
+        logger.debug(f"Translation cache compaction failed: {e}")
+
+
+class SqliteCacheBackend(CacheBackend):
+    """The translation cache database of this host (see init_db)."""
+
+    def get_many(self, keys: list[str]) -> dict[str, str]:
+        found = {}
+        try:
+            for start in range(0, len(keys), BATCH_SIZE):
+                query = _TranslationCache.select(
+                    _TranslationCache.key, _TranslationCache.translation
+                ).where(_TranslationCache.key.in_(keys[start : start + BATCH_SIZE]))
+                for key, translation in query.tuples():
+                    found[key] = _unpack(translation)
+            _record_access(found)
             # Trigger cache cleanup with a small probability.
-            if result and random.random() < CLEAN_PROBABILITY:  # noqa: S311
-                self._cleanup()
-            return result.translation if result else None
+            if found and random.random() < CLEAN_PROBABILITY:  # noqa: S311
+                self.cleanup()
         except peewee.OperationalError as e:
             if "database is locked" in str(e):
                 logger.debug("Cache is locked")
-                return None
             else:
                 raise
+        return found
 
-    def set(self, original_text: str, translation: str):
-        try:
-            _TranslationCache.create(
-                translate_engine=self.translate_engine,
-                translate_engine_params=self.translate_engine_params,
-                original_text=original_text,
-                translation=translation,
+    def set_many(self, entries: list[CacheEntry]) -> int:
+        now = time.time()
+        rows = []
+        for entry in entries:
+            packed_text = _pack(entry.original_text)
+            packed_translation = _pack(entry.translation)
+            rows.append(
+                {
+                    "key": entry.key,
+                    "translate_engine": entry.translate_engine,
+                    "original_text": packed_text,
+                    "translation": packed_translation,
+                    "size": len(entry.key) + len(packed_text) + len(packed_translation),
+                    "last_access": now,
+                }
             )
+        try:
+            with _TranslationCache._meta.database.atomic():
+                for start in range(0, len(rows), BATCH_SIZE // 6):
+                    _TranslationCache.insert_many(
+                        rows[start : start + BATCH_SIZE // 6]
+                    ).execute()
             # Trigger cache cleanup with a small probability.
             if random.random() < CLEAN_PROBABILITY:  # noqa: S311
-                self._cleanup()
+                self.cleanup()
+        except peewee.OperationalError as e:
+            if "database is locked" in str(e):
+                logger.debug("Cache is locked")
+                return 0
+            raise
+        return len(entries)
+
+    def scan(self, after_key: str = "", limit: int = 1000) -> list[CacheEntry]:
+        query = (
+            _TranslationCache.select(
+                _TranslationCache.key,
+                _TranslationCache.translate_engine,
+                _TranslationCache.original_text,
+                _TranslationCache.translation,
+            )
+            .where(_TranslationCache.key > after_key)
+            .order_by(_TranslationCache.key)
+            .limit(limit)
+        )
+        return [
+            CacheEntry(key, engine, _unpack(text), _unpack(translation))
+            for key, engine, text, translation in query.tuples()
+        ]
+
+    def touch(self, keys: Iterable[str]):
+        try:
+            _record_access(keys)
         except peewee.OperationalError as e:
             if "database is locked" in str(e):
                 logger.debug("Cache is locked")
             else:
                 raise
 
-    def _cleanup(self) -> None:
-        """Remove old cache entries, keeping only the latest MAX_CACHE_ROWS records."""
+    def cleanup(self):
+        """Remove the least recently used entries beyond MAX_CACHE_ROWS rows or
+        MAX_CACHE_BYTES bytes, then compact the database in the background."""
         # Quick exit if another thread is already performing cleanup.
         if not _cleanup_lock.acquire(blocking=False):
             return
         try:
             logger.info("Cleaning up translation cache...")
-            max_id = _TranslationCache.select(fn.MAX(_TranslationCache.id)).scalar()
-            # Nothing to do if table is empty or below threshold
-            if not max_id or max_id <= MAX_CACHE_ROWS:
-                return
-            threshold = max_id - MAX_CACHE_ROWS
-            # Delete rows with id *less than or equal* to threshold so that at most MAX_CACHE_ROWS remain.
-            _TranslationCache.delete().where(
-                _TranslationCache.id <= threshold
-            ).execute()
+            _flush_access_times()
+            if _evict_least_recently_used():
+                _schedule_compaction()
         finally:
             _cleanup_lock.release()
 
 
+_backend: CacheBackend = SqliteCacheBackend()
+
+
+def set_cache_backend(backend: CacheBackend):
+    """Use ``backend`` for all translation caches of this process."""
+    global _backend
+    _backend = backend
+    _lru.clear()
+
+
+def get_cache_backend() -> CacheBackend:
+    return _backend
+
+
+def export_entries(path: str | Path, backend: CacheBackend | None = None) -> int:
+    """Write all entries of ``backend`` to ``path`` as zstd compressed NDJSON.
+
+    Returns the number of entries written.
+    """
+    backend = backend or get_cache_backend()
+    count = 0
+    after_key = ""
+    with pyzstd.open(path, "wt", encoding="utf-8") as f:
+        while entries := backend.scan(after_key, BATCH_SIZE):
+            for entry in entries:
+                f.write(json.dumps(entry._asdict(), ensure_ascii=False))
+                f.write("\n")
+            count += len(entries)
+            after_key = entries[-1].key
+    return count
+
+
+def import_entries(path: str | Path, backend: CacheBackend | None = None) -> int:
+    """Add the entries of a file written by export_entries to ``backend``.
+
+    Returns the number of entries stored, which is less than the number read
+    if the backend dropped some, e.g. while its database was locked.
+    """
+    backend = backend or get_cache_backend()
+    count = 0
+    dropped = 0
+    batch = []
+    with pyzstd.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            batch.append(CacheEntry(**json.loads(line)))
+            if len(batch) >= BATCH_SIZE:
+                stored = backend.set_many(batch)
+                count += stored
+                dropped += len(batch) - stored
+                batch = []
+    if batch:
+        stored = backend.set_many(batch)
+        count += stored
+        dropped += len(batch) - stored
+    if dropped:
+        logger.warning(f"The cache backend dropped {dropped} of the imported entries")
+    return count
+
+
+class TranslationMemory:
+    """
+    Translations of single paragraphs, independent of the prompt they were
+    sent in: its batch, title context and glossary.
+
+    Entries are keyed by the paragraph text with its placeholders, whitespace
+    normalized, and by the translator's name, language pair and model.
+    """
+
+    def __init__(self, translator):
+        self.cache = TranslationCache(
+            "paragraph_memory",
+            {
+                "translate_engine": translator.name,
+                "lang_in": translator.lang_in,
+                "lang_out": translator.lang_out,
+                "model": getattr(translator, "model", None),
+            },
+        )
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.split())
+
+    def get_many(self, texts: Iterable[str]) -> list[str | None]:
+        return self.cache.get_many([self.normalize(text) for text in texts])
+
+    def set_many(self, items: Iterable[tuple[str, str]]):
+        self.cache.set_many(
+            [(self.normalize(text), translation) for text, translation in items]
+        )
+
+
 def init_db(remove_exists=False):
     CACHE_FOLDER.mkdir(parents=True, exist_ok=True)
     # The current version does not support database migration, so add the version number to the file name.
-    cache_db_path = CACHE_FOLDER / "cache.v1.db"
+    cache_db_path = CACHE_FOLDER / "cache.v3.db"
     logger.info(f"Initializing cache database at {cache_db_path}")
     if remove_exists and cache_db_path.exists():
         cache_db_path.unlink()
@@ -160,6 +576,8 @@ def init_db(remove_exists=False):
         },
     )
     db.create_tables([_TranslationCache], safe=True)
+    _lru.clear()
+    _accessed_keys.clear()
 
 
 def init_test_db():
@@ -179,12 +597,17 @@ def init_test_db():
     test_db.bind([_TranslationCache], bind_refs=False, bind_backrefs=False)
     test_db.connect()
     test_db.create_tables([_TranslationCache], safe=True)
+    _lru.clear()
     return test_db
 
 
 def clean_test_db(test_db):
+    if _compaction_thread is not None:
+        _compaction_thread.join()
+    _accessed_keys.clear()
     test_db.drop_tables([_TranslationCache])
     test_db.close()
+    _lru.clear()
     db_path = Path(test_db.database)
     if db_path.exists():
         db_path.unlink()
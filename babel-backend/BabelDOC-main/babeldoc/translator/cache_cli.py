@@ -0,0 +1,77 @@
+"""``babeldoc cache``: share the translation cache between hosts.
+
+    babeldoc cache serve [--host HOST] [--port PORT]
+    babeldoc cache export FILE [--server HOST:PORT]
+    babeldoc cache import FILE [--server HOST:PORT]
+
+``serve`` shares this host's cache database over TCP; translation runs on
+other hosts use it with ``--cache-server HOST:PORT``. ``export`` and
+``import`` move entries in bulk as zstd compressed NDJSON, e.g. to start a
+new node with a warm cache. They work on the local database, or on a cache
+server with ``--server``.
+"""
+
+import argparse
+import logging
+
+from babeldoc.translator.cache import export_entries
+from babeldoc.translator.cache import get_cache_backend
+from babeldoc.translator.cache import import_entries
+from babeldoc.translator.cache_server import DEFAULT_PORT
+from babeldoc.translator.cache_server import CacheServer
+from babeldoc.translator.cache_server import RemoteCacheBackend
+
+logger = logging.getLogger(__name__)
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="babeldoc cache", description="Manage the translation cache."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Serve the local cache over TCP.")
+    serve.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address to listen on (default: 127.0.0.1). The server has no "
+        "authentication, only listen on trusted networks.",
+    )
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+
+    for name, help_text in (
+        ("export", "Write all cache entries to FILE (.ndjson.zst)."),
+        ("import", "Add the cache entries of FILE, written by export."),
+    ):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("file")
+        command.add_argument(
+            "--server",
+            metavar="HOST:PORT",
+            help="Use this cache server instead of the local database.",
+        )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = create_parser().parse_args(argv)
+    if args.command == "serve":
+        with CacheServer((args.host, args.port)) as server:
+            logger.info(f"Serving the translation cache on {args.host}:{args.port}")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+        return 0
+
+    if args.server:
+        backend = RemoteCacheBackend.from_address(args.server)
+    else:
+        backend = get_cache_backend()
+    if args.command == "export":
+        count = export_entries(args.file, backend)
+        logger.info(f"Exported {count} cache entries to {args.file}")
+    else:
+        count = import_entries(args.file, backend)
+        logger.info(f"Imported {count} cache entries from {args.file}")
+    return 0
@@ -0,0 +1,233 @@
+"""A small TCP server sharing one translation cache between several hosts.
+
+Messages are msgpack maps, each preceded by its length as a 4-byte big-endian
+integer. A request names its ``op`` (one of the CacheBackend methods) and
+carries that method's arguments; the reply holds either the ``result`` or an
+``error``. Connections stay open for any number of requests.
+
+This is meant for trusted networks only: there is no authentication.
+"""
+
+import logging
+import socket
+import socketserver
+import struct
+import threading
+import time
+from collections.abc import Iterable
+
+import msgpack
+
+from babeldoc.translator.cache import ACCESS_FLUSH_SIZE
+from babeldoc.translator.cache import CacheBackend
+from babeldoc.translator.cache import CacheEntry
+from babeldoc.translator.cache import SqliteCacheBackend
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 7878
+# Largest message accepted, as a guard against garbage on the socket
+MAX_MESSAGE_SIZE = 256 * 1024 * 1024
+# Seconds without requests after the server could not be reached
+RETRY_INTERVAL = 30
+
+_HEADER = struct.Struct(">I")
+
+
+def _send(sock: socket.socket, message):
+    data = msgpack.packb(message, use_bin_type=True)
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _receive_exactly(sock: socket.socket, size: int) -> bytes | None:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1024 * 1024))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _receive(sock: socket.socket):
+    """The next message, or None when the peer closed the connection."""
+    header = _receive_exactly(sock, _HEADER.size)
+    if header is None:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        raise ValueError(f"message of {size} bytes is too large")
+    data = _receive_exactly(sock, size)
+    if data is None:
+        return None
+    return msgpack.unpackb(data, raw=False)
+
+
+class _CacheRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        backend: CacheBackend = self.server.backend
+        while True:
+            try:
+                request = _receive(self.request)
+            except (OSError, ValueError) as e:
+                logger.debug(f"Dropping cache client {self.client_address}: {e}")
+                return
+            if request is None:
+                return
+            try:
+                op = request["op"]
+                if op == "get_many":
+                    result = backend.get_many(request["keys"])
+                elif op == "set_many":
+                    result = backend.set_many(
+                        [CacheEntry(*e) for e in request["entries"]]
+                    )
+                elif op == "scan":
+                    result = [
+                        list(entry)
+                        for entry in backend.scan(
+                            request["after_key"], request["limit"]
+                        )
+                    ]
+                elif op == "touch":
+                    backend.touch(request["keys"])
+                    result = None
+                else:
+                    raise ValueError(f"unknown op {op!r}")
+                reply = {"result": result}
+            except Exception as e:
+                logger.exception("Error handling cache request")
+                reply = {"error": f"{type(e).__name__}: {e}"}
+            try:
+                _send(self.request, reply)
+            except OSError:
+                return
+
+
+class CacheServer(socketserver.ThreadingTCPServer):
+    """Serves ``backend`` (the local SQLite cache by default) over TCP."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(
+        self,
+        address: tuple[str, int] = ("127.0.0.1", DEFAULT_PORT),
+        backend: CacheBackend | None = None,
+    ):
+        self.backend = backend or SqliteCacheBackend()
+        super().__init__(address, _CacheRequestHandler)
+
+
+class RemoteCacheBackend(CacheBackend):
+    """
+    A translation cache kept by a CacheServer.
+
+    Each thread uses its own connection. The cache must never fail a
+    translation, so when the server can't be reached lookups miss and writes
+    are dropped, with a warning, for the next RETRY_INTERVAL seconds.
+
+    Keys used from memory are sent to the server ACCESS_FLUSH_SIZE at a time,
+    and on cleanup, rather than in a request per lookup.
+    """
+
+    def __init__(self, host: str, port: int = DEFAULT_PORT, timeout: float = 10):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._local = threading.local()
+        self._unavailable_until = 0.0
+        self._touched_keys = set()
+        self._touched_keys_lock = threading.Lock()
+
+    @classmethod
+    def from_address(cls, address: str) -> "RemoteCacheBackend":
+        """A backend for ``"host:port"`` (or just ``"host"``)."""
+        host, _, port = address.rpartition(":")
+        if not host:
+            return cls(address)
+        return cls(host, int(port))
+
+    def __getstate__(self):
+        return {"host": self.host, "port": self.port, "timeout": self.timeout}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.create_connection((self.host, self.port), self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def call(self, op: str, **args):
+        """Run ``op`` on the server; reconnects once if the connection broke."""
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                _send(sock, {"op": op, **args})
+                reply = _receive(sock)
+                if reply is None:
+                    raise ConnectionError("cache server closed the connection")
+                break
+            except OSError:
+                self._close()
+                if attempt:
+                    raise
+        if "error" in reply:
+            raise RuntimeError(f"cache server error: {reply['error']}")
+        return reply["result"]
+
+    def _call_or_warn(self, op: str, default, **args):
+        if time.monotonic() < self._unavailable_until:
+            return default
+        try:
+            return self.call(op, **args)
+        except (OSError, RuntimeError, ValueError) as e:
+            logger.warning(
+                f"Translation cache server {self.host}:{self.port} failed, "
+                f"not using it for {RETRY_INTERVAL}s: {e}"
+            )
+            self._unavailable_until = time.monotonic() + RETRY_INTERVAL
+            return default
+
+    def get_many(self, keys: list[str]) -> dict[str, str]:
+        return self._call_or_warn("get_many", {}, keys=list(keys))
+
+    def set_many(self, entries: list[CacheEntry]) -> int:
+        return self._call_or_warn(
+            "set_many", 0, entries=[list(entry) for entry in entries]
+        )
+
+    def scan(self, after_key: str = "", limit: int = 1000) -> list[CacheEntry]:
+        # Unlike lookups, a failed export must not look like an empty cache
+        entries = self.call("scan", after_key=after_key, limit=limit)
+        return [CacheEntry(*entry) for entry in entries]
+
+    def touch(self, keys: Iterable[str]):
+        with self._touched_keys_lock:
+            self._touched_keys.update(keys)
+            flush = len(self._touched_keys) >= ACCESS_FLUSH_SIZE
+        if flush:
+            self.flush_touched()
+
+    def flush_touched(self):
+        """Send the keys used since the last flush to the server."""
+        with self._touched_keys_lock:
+            keys = list(self._touched_keys)
+            self._touched_keys.clear()
+        if keys:
+            self._call_or_warn("touch", None, keys=keys)
+
+    def cleanup(self):
+        # The server evicts entries itself; it only needs the access times
+        self.flush_touched()
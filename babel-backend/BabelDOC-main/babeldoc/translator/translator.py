@@ -1,8 +1,11 @@
+import asyncio
 import contextlib
+import importlib.util
 import logging
-import threading
+import multiprocessing
 import time
 import unicodedata
+import weakref
 from abc import ABC
 from abc import abstractmethod
 
@@ -20,6 +23,9 @@ from babeldoc.utils.atomic_integer import AtomicInteger
 
 logger = logging.getLogger(__name__)
 
+# HTTP/2 needs the h2 package (httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
 
 def remove_control_characters(s):
     return "".join(ch for ch in s if unicodedata.category(ch)[0] != "C")
@@ -27,36 +33,83 @@ def remove_control_characters(s):
 
 class RateLimiter:
     """
-    A rate limiter using the leaky bucket algorithm to ensure a smooth, constant rate of requests.
-    This implementation is thread-safe and robust against system clock changes.
+    A rate limiter for requests per second and, optionally, tokens per minute.
+
+    Requests are spaced at least ``1 / max_qps`` apart (leaky bucket). With
+    ``max_tpm`` set, each request also reserves its token count and waits while
+    more than ``max_tpm`` tokens were reserved in the last minute (GCRA).
+
+    The state lives in shared memory behind a process-shared lock, so the limit
+    holds across all processes that inherit the limiter: forked children, and
+    pool workers started with ``install_translate_rate_limiter`` as initializer.
+    Monotonic time is used, which is the same clock in every process.
     """
 
-    def __init__(self, max_qps: int):
+    # Indices into the shared state array
+    _MAX_QPS = 0
+    _MAX_TPM = 1
+    _NEXT_REQUEST_TIME = 2
+    _TOKEN_ARRIVAL_TIME = 3
+
+    def __init__(self, max_qps: int, max_tpm: int | None = None):
         if max_qps <= 0:
             raise ValueError("max_qps must be a positive number")
-        self.max_qps = max_qps
-        self.min_interval = 1.0 / max_qps
-        self.lock = threading.Lock()
-        # Use monotonic time to prevent issues with system time changes
-        self.next_request_time = time.monotonic()
-
-    def wait(self, _rate_limit_params: dict = None):
+        if max_tpm is not None and max_tpm <= 0:
+            raise ValueError("max_tpm must be a positive number")
+        # A spawn context lock can be passed to both spawned and forked workers
+        self.lock = multiprocessing.get_context("spawn").Lock()
+        now = time.monotonic()
+        self._state = multiprocessing.RawArray("d", [max_qps, max_tpm or 0, now, now])
+
+    @property
+    def max_qps(self) -> float:
+        return self._state[self._MAX_QPS]
+
+    @property
+    def max_tpm(self) -> float | None:
+        return self._state[self._MAX_TPM] or None
+
+    def reserve(self, token_count: int = 0) -> float:
         """
-        Blocks until the next request can be processed, ensuring the rate limit is not exceeded.
+        Reserve the next request slot and return when it may be sent.
         """
         with self.lock:
+            state = self._state
             now = time.monotonic()
+            start = max(now, state[self._NEXT_REQUEST_TIME])
+            max_tpm = state[self._MAX_TPM]
+            if max_tpm and token_count > 0:
+                arrival = (
+                    max(now, state[self._TOKEN_ARRIVAL_TIME])
+                    + token_count * 60 / max_tpm
+                )
+                # Up to a minute's worth of tokens may be sent at once
+                start = max(start, arrival - 60)
+                state[self._TOKEN_ARRIVAL_TIME] = arrival
+            state[self._NEXT_REQUEST_TIME] = start + 1.0 / state[self._MAX_QPS]
+            return start
 
-            wait_duration = self.next_request_time - now
-            if wait_duration > 0:
-                time.sleep(wait_duration)
+    def wait(self, rate_limit_params: dict = None):
+        """
+        Blocks until the next request can be processed, ensuring the rate limit is not exceeded.
 
-            # Update the next allowed request time.
-            # If the limiter has been idle, the next request should start from 'now'.
-            now = time.monotonic()
-            self.next_request_time = (
-                max(self.next_request_time, now) + self.min_interval
-            )
+        ``rate_limit_params["paragraph_token_count"]`` is counted against the
+        tokens per minute limit.
+        """
+        token_count = (rate_limit_params or {}).get("paragraph_token_count") or 0
+        # Sleep outside the lock so that other requests can reserve their slots
+        wait_duration = self.reserve(token_count) - time.monotonic()
+        if wait_duration > 0:
+            time.sleep(wait_duration)
+
+    async def wait_async(self, rate_limit_params: dict = None):
+        """
+        Like wait, but only suspends the calling task.
+        """
+        token_count = (rate_limit_params or {}).get("paragraph_token_count") or 0
+        wait_duration = self.reserve(token_count) - time.monotonic()
+        if wait_duration > 0:
+            await asyncio.sleep(wait_duration)
 
     def set_max_qps(self, max_qps: int):
         """
@@ -65,15 +118,40 @@ class RateLimiter:
         if max_qps <= 0:
             raise ValueError("max_qps must be a positive number")
         with self.lock:
-            self.max_qps = max_qps
-            self.min_interval = 1.0 / max_qps
+            self._state[self._MAX_QPS] = max_qps
+
+    def set_max_tpm(self, max_tpm: int | None):
+        """
+        Updates the maximum tokens per minute; None disables the token limit.
+        """
+        if max_tpm is not None and max_tpm <= 0:
+            raise ValueError("max_tpm must be a positive number")
+        with self.lock:
+            self._state[self._MAX_TPM] = max_tpm or 0
 
 
 _translate_rate_limiter = RateLimiter(5)
 
 
-def set_translate_rate_limiter(max_qps):
+def set_translate_rate_limiter(max_qps, max_tpm=None):
     _translate_rate_limiter.set_max_qps(max_qps)
+    _translate_rate_limiter.set_max_tpm(max_tpm)
+
+
+def get_translate_rate_limiter() -> RateLimiter:
+    return _translate_rate_limiter
+
+
+def install_translate_rate_limiter(rate_limiter: RateLimiter):
+    """
+    Use ``rate_limiter`` for all translations in this process.
+
+    Meant as the initializer of worker processes, with the parent's
+    ``get_translate_rate_limiter()`` as argument, so that the workers share
+    the parent's limits instead of each getting their own.
+    """
+    global _translate_rate_limiter
+    _translate_rate_limiter = rate_limiter
 
 
 class BaseTranslator(ABC):
@@ -132,7 +210,7 @@ class BaseTranslator(ABC):
                     return cache
             except Exception as e:
                 logger.debug(f"try get cache failed, ignore it: {e}")
-        _translate_rate_limiter.wait()
+        _translate_rate_limiter.wait(rate_limit_params)
         translation = self.do_translate(text, rate_limit_params)
         if not (self.ignore_cache or ignore_cache):
             self.cache.set(text, translation)
@@ -153,7 +231,7 @@ class BaseTranslator(ABC):
                     return cache
             except Exception as e:
                 logger.debug(f"try get cache failed, ignore it: {e}")
-        _translate_rate_limiter.wait()
+        _translate_rate_limiter.wait(rate_limit_params)
         translation = self.do_llm_translate(text, rate_limit_params)
         if not (self.ignore_cache or ignore_cache):
             try:
@@ -164,6 +242,47 @@ class BaseTranslator(ABC):
                 )
         return translation
 
+    async def allm_translate(
+        self, text, ignore_cache=False, rate_limit_params: dict = None
+    ):
+        """
+        Async version of llm_translate, for callers running on an event loop.
+        :param text: text to translate
+        :return: translated text
+        """
+        self.translate_call_count += 1
+        if not (self.ignore_cache or ignore_cache):
+            try:
+                cache = await self.cache.aget(text)
+                if cache is not None:
+                    self.translate_cache_call_count += 1
+                    return cache
+            except Exception as e:
+                logger.debug(f"try get cache failed, ignore it: {e}")
+        await _translate_rate_limiter.wait_async(rate_limit_params)
+        translation = await self.do_allm_translate(text, rate_limit_params)
+        if not (self.ignore_cache or ignore_cache):
+            try:
+                await self.cache.aset(text, translation)
+            except Exception as e:
+                logger.debug(
+                    f"try set cache failed, ignore it: {e}, text: {text}, translation: {translation}"
+                )
+        return translation
+
+    async def do_allm_translate(self, text, rate_limit_params: dict = None):
+        """
+        Actual translate text without blocking the event loop. Translators
+        with an async client should override this; by default
+        do_llm_translate runs in a worker thread.
+        :param text: text to translate
+        :return: translated text
+        """
+        return await asyncio.to_thread(self.do_llm_translate, text, rate_limit_params)
+
+    async def aclose(self):  # noqa: B027
+        """Release the resources of the async API on the running event loop."""
+
     @abstractmethod
     def do_llm_translate(self, text, rate_limit_params: dict = None):
         """
@@ -226,6 +345,10 @@ class OpenAITranslator(BaseTranslator):
         #     }
         #     self.add_cache_impact_parameters("reasoning-effort", 'minimal')
         self.reasoning = reasoning
+        self.base_url = base_url
+        self.api_key = api_key
+        # One async client per event loop, see get_async_client
+        self._async_clients = weakref.WeakKeyDictionary()
         self.client = openai.OpenAI(
             base_url=base_url,
             api_key=api_key,
@@ -288,16 +411,39 @@ class OpenAITranslator(BaseTranslator):
             },
         ]
 
-    @retry(
-        retry=retry_if_exception_type(openai.RateLimitError),
-        stop=stop_after_attempt(100),
-        wait=wait_exponential(multiplier=1, min=1, max=15),
-        before_sleep=before_sleep_log(logger, logging.WARNING),
-    )
-    def do_llm_translate(self, text, rate_limit_params: dict = None):
-        if text is None:
-            return None
+    def get_async_client(self) -> openai.AsyncOpenAI:
+        """The async client of the running event loop.
 
+        httpx connection pools are bound to the event loop they were created
+        on, so every loop gets its own client. Connections are kept alive and,
+        when h2 is installed, multiplexed over HTTP/2.
+        """
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = openai.AsyncOpenAI(
+                base_url=self.base_url,
+                api_key=self.api_key,
+                http_client=httpx.AsyncClient(
+                    http2=HTTP2_AVAILABLE,
+                    limits=httpx.Limits(
+                        max_connections=None,
+                        max_keepalive_connections=None,
+                        keepalive_expiry=60,
+                    ),
+                    timeout=60,
+                ),
+            )
+            self._async_clients[loop] = client
+        return client
+
+    async def aclose(self):
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+    def llm_request(self, text, rate_limit_params: dict = None) -> dict:
+        """Keyword arguments of the chat completion request of do_llm_translate."""
         options = {}
         if self.send_temperature:
             options.update(self.options)
@@ -311,30 +457,67 @@ class OpenAITranslator(BaseTranslator):
             extra_headers["X-DashScope-DataInspection"] = (
                 '{"input": "disable", "output": "disable"}'
             )
+        return {
+            "model": self.model,
+            **options,
+            "max_tokens": 2048,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": text,
+                },
+            ],
+            "extra_headers": extra_headers,
+            "extra_body": self.extra_body,
+        }
+
+    @staticmethod
+    def raise_if_content_filtered(e: openai.BadRequestError):
+        if (
+            "系统检测到输入或生成内容可能包含不安全或敏感内容，请您避免输入易产生敏感内容的提示语，感谢您的配合。"
+            in e.message
+        ):
+            raise ContentFilterError(e.message) from e
+
+    @retry(
+        retry=retry_if_exception_type(openai.RateLimitError),
+        stop=stop_after_attempt(100),
+        wait=wait_exponential(multiplier=1, min=1, max=15),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+    )
+    def do_llm_translate(self, text, rate_limit_params: dict = None):
+        if text is None:
+            return None
+
         try:
             response = self.client.chat.completions.create(
-                model=self.model,
-                **options,
-                max_tokens=2048,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": text,
-                    },
-                ],
-                extra_headers=extra_headers,
-                extra_body=self.extra_body,
+                **self.llm_request(text, rate_limit_params)
             )
-            self.update_token_count(response)
-            return response.choices[0].message.content.strip()
         except openai.BadRequestError as e:
-            if (
-                "系统检测到输入或生成内容可能包含不安全或敏感内容，请您避免输入易产生敏感内容的提示语，感谢您的配合。"
-                in e.message
-            ):
-                raise ContentFilterError(e.message) from e
-            else:
-                raise
+            self.raise_if_content_filtered(e)
+            raise
+        self.update_token_count(response)
+        return response.choices[0].message.content.strip()
+
+    @retry(
+        retry=retry_if_exception_type(openai.RateLimitError),
+        stop=stop_after_attempt(100),
+        wait=wait_exponential(multiplier=1, min=1, max=15),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+    )
+    async def do_allm_translate(self, text, rate_limit_params: dict = None):
+        if text is None:
+            return None
+
+        try:
+            response = await self.get_async_client().chat.completions.create(
+                **self.llm_request(text, rate_limit_params)
+            )
+        except openai.BadRequestError as e:
+            self.raise_if_content_filtered(e)
+            raise
+        self.update_token_count(response)
+        return response.choices[0].message.content.strip()
 
     def update_token_count(self, response):
         try:
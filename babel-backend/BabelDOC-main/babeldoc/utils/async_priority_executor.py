@@ -0,0 +1,72 @@
+import asyncio
+import itertools
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPriorityExecutor:
+    """
+    Runs coroutine functions on the current event loop, lowest priority first,
+    with at most ``max_concurrency`` of them running at a time.
+
+    The asyncio counterpart of PriorityThreadPoolExecutor: ``submit`` takes the
+    same arguments, but ``fn`` is a coroutine function, and thousands of tasks
+    can wait on I/O at once without a thread each. Use it as an async context
+    manager; leaving the block waits until all submitted work is done,
+    including work submitted by the tasks themselves.
+
+    As with the thread pool, an exception only ends the task that raised it;
+    it is logged and the remaining tasks go on.
+    """
+
+    def __init__(self, max_concurrency: int):
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be a positive number")
+        self.max_concurrency = max_concurrency
+        self._queue: asyncio.PriorityQueue | None = None
+        self._counter = itertools.count()
+        self._workers: list[asyncio.Task] = []
+        self._closing = False
+
+    def submit(self, fn, *args, priority: int = sys.maxsize - 1, **kwargs):
+        """
+        Queue ``fn(*args, **kwargs)``; must be called from the event loop.
+        """
+        if self._queue is None or self._closing:
+            raise RuntimeError("cannot schedule new tasks outside of async with")
+        self._queue.put_nowait((priority, next(self._counter), fn, args, kwargs))
+
+    async def __aenter__(self):
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.max_concurrency)
+        ]
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                await self._queue.join()
+        finally:
+            self._closing = True
+            for worker in self._workers:
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self._workers = []
+
+    async def _worker(self):
+        while True:
+            _, _, fn, args, kwargs = await self._queue.get()
+            try:
+                await fn(*args, **kwargs)
+            except asyncio.CancelledError:
+                if self._closing:
+                    raise
+                # Raised by the task itself, e.g. by raise_if_cancelled
+                logger.debug("Task %s was cancelled", fn)
+            except Exception:
+                logger.exception("Exception in task %s", fn)
+            finally:
+                self._queue.task_done()
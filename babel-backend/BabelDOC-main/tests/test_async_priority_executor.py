@@ -0,0 +1,51 @@
+import asyncio
+
+from babeldoc.utils.async_priority_executor import AsyncPriorityExecutor
+
+
+def test_runs_by_priority_with_bounded_concurrency():
+    started = []
+    running = 0
+    max_running = 0
+
+    async def task(name):
+        nonlocal running, max_running
+        started.append(name)
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if name == "b":
+            executor.submit(task, "d", priority=0)
+
+    async def main():
+        nonlocal executor
+        async with AsyncPriorityExecutor(2) as executor:
+            for priority, name in enumerate("cba"):
+                executor.submit(task, name, priority=-priority)
+
+    executor = None
+    asyncio.run(main())
+
+    assert started == ["a", "b", "c", "d"]
+    assert max_running == 2
+
+
+def test_failed_task_does_not_stop_the_others():
+    done = []
+
+    async def task(name):
+        if name == "bad":
+            raise ValueError(name)
+        if name == "cancelled":
+            raise asyncio.CancelledError
+        done.append(name)
+
+    async def main():
+        async with AsyncPriorityExecutor(1) as executor:
+            for name in ["bad", "cancelled", "good"]:
+                executor.submit(task, name)
+
+    asyncio.run(main())
+
+    assert done == ["good"]
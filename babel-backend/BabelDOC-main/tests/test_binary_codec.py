@@ -0,0 +1,87 @@
+import pytest
+from babeldoc.format.pdf.document_il import binary_codec
+from babeldoc.format.pdf.document_il import il_version_1
+
+
+def _character(i: int) -> il_version_1.PdfCharacter:
+    return il_version_1.PdfCharacter(
+        pdf_style=il_version_1.PdfStyle(font_id="F1", font_size=10.5),
+        box=il_version_1.Box(x=i * 1.5, y=2.0, x2=i * 1.5 + 1.0, y2=12.0),
+        # Optional nested objects and values, present on some characters only
+        visual_bbox=il_version_1.VisualBbox(il_version_1.Box(0.0, 1.0, 2.0, 3.0))
+        if i % 2
+        else None,
+        scale=None if i % 3 else 0.5,
+        pdf_character_id=i,
+        char_unicode=chr(ord("a") + i),
+        render_order=2**40 + i,
+    )
+
+
+def _document() -> il_version_1.Document:
+    chars = [_character(i) for i in range(5)]
+    paragraph = il_version_1.PdfParagraph(
+        pdf_paragraph_composition=[
+            il_version_1.PdfParagraphComposition(
+                pdf_line=il_version_1.PdfLine(pdf_character=chars[:3])
+            ),
+            il_version_1.PdfParagraphComposition(pdf_character=chars[3]),
+        ],
+        unicode="abcd",
+        original_composition=None,
+    )
+    curve = il_version_1.PdfCurve(
+        pdf_path=[il_version_1.PdfPath(x=1.0, y=2.0, op="l", has_xy=True)],
+        ctm=[1.0, 0.0, 0.0, 1.0, 10, 20.5],
+        relocation_transform=None,
+    )
+    return il_version_1.Document(
+        page=[
+            il_version_1.Page(
+                pdf_character=chars,
+                pdf_paragraph=[paragraph],
+                pdf_curve=[curve],
+                page_number=0,
+                unit="point",
+            ),
+            il_version_1.Page(page_number=1),
+        ],
+        total_pages=2,
+    )
+
+
+def test_round_trip():
+    document = _document()
+    assert binary_codec.decode(binary_codec.encode(document)) == document
+
+
+def test_round_trip_list():
+    pages = _document().page
+    assert (
+        binary_codec.decode(binary_codec.encode_list(il_version_1.Page, pages)) == pages
+    )
+    assert binary_codec.decode(binary_codec.encode_list(il_version_1.Page, [])) == []
+
+
+def test_lone_surrogate():
+    character = _character(0)
+    character.char_unicode = "\udc80"
+    paragraph = il_version_1.PdfParagraph(unicode="a\ud835")
+    page = il_version_1.Page(pdf_character=[character], pdf_paragraph=[paragraph])
+    assert binary_codec.decode(binary_codec.encode(page)) == page
+    assert binary_codec.decode(
+        binary_codec.encode_list(il_version_1.PdfCharacter, [character])
+    ) == [character]
+
+
+def test_write_and_read_document(tmp_path):
+    path = tmp_path / "document.il.zst"
+    binary_codec.write_document(_document(), path)
+    assert binary_codec.read_document(path) == _document()
+
+
+def test_rejects_other_schema(monkeypatch):
+    data = binary_codec.encode(_document())
+    monkeypatch.setattr(binary_codec, "SCHEMA_HASH", "0" * 16)
+    with pytest.raises(ValueError):
+        binary_codec.decode(data)
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import pickle
+import socket
+import threading
+import time
+
+import pyzstd
+from babeldoc.translator.cache import CacheEntry
+from babeldoc.translator.cache import SqliteCacheBackend
+from babeldoc.translator.cache import TranslationCache
+from babeldoc.translator.cache import clean_test_db
+from babeldoc.translator.cache import export_entries
+from babeldoc.translator.cache import get_cache_backend
+from babeldoc.translator.cache import import_entries
+from babeldoc.translator.cache import init_test_db
+from babeldoc.translator.cache import set_cache_backend
+from babeldoc.translator.cache_server import CacheServer
+from babeldoc.translator.cache_server import RemoteCacheBackend
+from babeldoc.translator.translator import BaseTranslator
+
+
+def test_remote_backend_and_export_import(tmp_path):
+    test_db = init_test_db()
+    server = CacheServer(("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    local_backend = get_cache_backend()
+    try:
+        host, port = server.server_address
+        remote = pickle.loads(pickle.dumps(RemoteCacheBackend(host, port)))  # noqa: S301
+        set_cache_backend(remote)
+        cache = TranslationCache("dummy", {"model": "a"})
+        cache.set_many((f"text_{i}", f"译文 {i}") for i in range(1200))
+        set_cache_backend(remote)  # Forget what is in memory
+        assert cache.get_many(["text_7", "missing"]) == ["译文 7", None]
+
+        path = tmp_path / "cache.ndjson.zst"
+        assert export_entries(path, remote) == 1200
+        clean_test_db(test_db)
+        test_db = init_test_db()
+        assert import_entries(path, SqliteCacheBackend()) == 1200
+        set_cache_backend(local_backend)
+        assert cache.get("text_1199") == "译文 1199"
+    finally:
+        set_cache_backend(local_backend)
+        server.shutdown()
+        server.server_close()
+        clean_test_db(test_db)
+
+
+def test_unreachable_server_only_misses():
+    backend = RemoteCacheBackend("127.0.0.1", 1, timeout=1)
+    backend.set_many([CacheEntry("k", "dummy", "text", "translation")])
+    assert backend.get_many(["k"]) == {}
+
+
+def test_touches_are_sent_in_batches(monkeypatch):
+    backend = RemoteCacheBackend("127.0.0.1", 1)
+    calls = []
+    monkeypatch.setattr(
+        backend, "_call_or_warn", lambda *args, **kwargs: calls.append((args, kwargs))
+    )
+    monkeypatch.setattr("babeldoc.translator.cache_server.ACCESS_FLUSH_SIZE", 3)
+    backend.touch(["a", "b"])
+    backend.touch(["b"])
+    assert calls == []
+    backend.touch(["c"])
+    assert calls[0][0] == ("touch", None)
+    assert sorted(calls[0][1]["keys"]) == ["a", "b", "c"]
+    backend.touch(["d"])
+    backend.cleanup()
+    assert calls[1] == (("touch", None), {"keys": ["d"]})
+
+
+def test_import_counts_only_stored_entries(tmp_path):
+    class LockedBackend(SqliteCacheBackend):
+        def set_many(self, entries):
+            return 0
+
+    path = tmp_path / "cache.ndjson.zst"
+    entries = [CacheEntry(f"k{i}", "dummy", f"text {i}", "t") for i in range(3)]
+    with pyzstd.open(path, "wt", encoding="utf-8") as f:
+        f.writelines(json.dumps(entry._asdict()) + "\n" for entry in entries)
+    assert import_entries(path, LockedBackend()) == 0
+
+
+def test_dead_server_does_not_stall_event_loop():
+    class EchoTranslator(BaseTranslator):
+        name = "echo"
+
+        def do_translate(self, text, rate_limit_params: dict = None):
+            return text
+
+        def do_llm_translate(self, text, rate_limit_params: dict = None):
+            return text
+
+    async def translate_with_heartbeat(translator):
+        lags = []
+
+        async def heartbeat():
+            while True:
+                start = time.monotonic()
+                await asyncio.sleep(0.05)
+                lags.append(time.monotonic() - start - 0.05)
+
+        beat = asyncio.create_task(heartbeat())
+        translation = await translator.allm_translate("text")
+        beat.cancel()
+        return translation, lags
+
+    # Accepts connections in the kernel but never answers a request
+    dead_server = socket.create_server(("127.0.0.1", 0))
+    local_backend = get_cache_backend()
+    try:
+        host, port = dead_server.getsockname()
+        set_cache_backend(RemoteCacheBackend(host, port, timeout=1))
+        translator = EchoTranslator("en", "zh", ignore_cache=False)
+        start = time.monotonic()
+        translation, lags = asyncio.run(translate_with_heartbeat(translator))
+        assert translation == "text"
+        assert time.monotonic() - start >= 1
+        assert len(lags) >= 10
+        assert max(lags) < 0.5
+    finally:
+        set_cache_backend(local_backend)
+        dead_server.close()
@@ -0,0 +1,55 @@
+import pymupdf
+from babeldoc.format.pdf.document_il.backend.content_stream import ContentStreamWriter
+from babeldoc.format.pdf.document_il.backend.content_stream import hex_code
+
+
+def test_hex_code():
+    assert hex_code(0x41, 1) == b"<41>"
+    assert hex_code(0xABC, 2) == b"<0ABC>"
+
+
+def test_characters_share_text_object():
+    writer = ContentStreamWriter(b"base ")
+    writer.show_char("0 g", "F1", 10, 1, 2, b"<01>", advance=5)
+    writer.show_char("0 g", "F1", 10, 6, 2, b"<02>", advance=5)
+    writer.show_char("0 g", "F1", 10, 12, 2, b"<03>", advance=5)
+    writer.show_char("0 g", "F1", 10, 1, 20, b"<04>")
+    writer.show_char("0 g", "F1", 10, 6, 20, b"<05>")
+    writer.show_char("0 g", "F2", 10, 6, 20, b"<06>")
+    writer.append(b"Q\n")
+    assert writer.tobytes() == (
+        b"base q 0 g \nBT 0 Tc 0 Tw 100 Tz /F1 10.000000 Tf "
+        b"1 0 0 1 1.000000 2.000000 Tm [<01><02>-100.000<03>"
+        b"] TJ 1 0 0 1 1.000000 20.000000 Tm [<04>"
+        b"] TJ 1 0 0 1 6.000000 20.000000 Tm [<05>] TJ ET Q \n"
+        b"q 0 g \nBT /F2 10.000000 Tf 1 0 0 1 6.000000 20.000000 Tm [<06>] TJ ET Q \n"
+        b"Q\n"
+    )
+
+
+def test_glyph_positions():
+    font = pymupdf.Font("helv")
+    text = "Typeset, with a gap  here"
+    writer = ContentStreamWriter()
+    expected = []
+    x = 72.0
+    for char in text:
+        advance = font.char_lengths(char, 11)[0]
+        code = hex_code(font.has_glyph(ord(char)), 2)
+        writer.show_char(None, "F1", 11, x, 700, code, advance)
+        expected.append(x)
+        x += advance + (1.25 if char == "," else 0)
+
+    document = pymupdf.open()
+    page = document.new_page()
+    page.insert_font(fontname="F1", fontbuffer=font.buffer)
+    xref = document.get_new_xref()
+    document.update_object(xref, "<<>>")
+    document.update_stream(xref, writer.tobytes())
+    page.set_contents(xref)
+
+    origins = [char[2] for span in page.get_texttrace() for char in span["chars"]]
+    assert len(origins) == len(text)
+    for (origin_x, origin_y), x in zip(origins, expected, strict=True):
+        assert abs(origin_x - x) < 0.01
+        assert abs(origin_y - (page.rect.height - 700)) < 0.01
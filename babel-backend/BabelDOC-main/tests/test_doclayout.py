@@ -0,0 +1,125 @@
+import pickle
+
+import numpy as np
+import onnx
+import pymupdf
+from babeldoc.docvision import doclayout
+from babeldoc.docvision import layout_cache
+from babeldoc.docvision.doclayout import OnnxModel
+from babeldoc.format.pdf.document_il import il_version_1
+from onnx import TensorProto
+from onnx import helper
+from onnx import numpy_helper
+
+
+def _write_model(path) -> str:
+    """A stand-in for the layout model: one box row per 32x32 cell."""
+    rng = np.random.default_rng(0)
+    weights = rng.standard_normal((6, 3, 32, 32)).astype(np.float32) * 0.05
+    graph = helper.make_graph(
+        [
+            helper.make_node("Conv", ["images", "w"], ["conv"], strides=[32, 32]),
+            helper.make_node("Sigmoid", ["conv"], ["sigmoid"]),
+            helper.make_node("Reshape", ["sigmoid", "shape"], ["rows"]),
+            helper.make_node("Transpose", ["rows"], ["output0"], perm=[0, 2, 1]),
+        ],
+        "layout",
+        [
+            helper.make_tensor_value_info(
+                "images", TensorProto.FLOAT, ["batch", 3, None, None]
+            )
+        ],
+        [helper.make_tensor_value_info("output0", TensorProto.FLOAT, None)],
+        [
+            numpy_helper.from_array(weights, "w"),
+            numpy_helper.from_array(np.array([0, 6, -1], dtype=np.int64), "shape"),
+        ],
+    )
+    model = helper.make_model(
+        graph, ir_version=8, opset_imports=[helper.make_opsetid("", 17)]
+    )
+    helper.set_model_props(model, {"stride": "32", "names": "{0: 'text'}"})
+    onnx.save(model, path)
+    return str(path)
+
+
+def test_unpickled_model_reuses_session(tmp_path, monkeypatch):
+    monkeypatch.setattr(doclayout, "_sessions", {})
+    model = OnnxModel(_write_model(tmp_path / "layout.onnx"))
+    assert model.stride == 32
+
+    copy = pickle.loads(pickle.dumps(model))  # noqa: S301
+    assert copy.model is model.model
+
+
+def test_unpickled_model_loads_session_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(doclayout, "_sessions", {})
+    data = pickle.dumps(OnnxModel(_write_model(tmp_path / "layout.onnx")))
+    # As in a new worker process, which has not loaded the model yet
+    doclayout._sessions.clear()
+
+    first = pickle.loads(data)  # noqa: S301
+    assert first.model is None
+    first.warm_up()
+    assert pickle.loads(data).model is first.model  # noqa: S301
+
+
+class _Config:
+    use_layout_cache = False
+
+    def raise_if_cancelled(self):
+        pass
+
+
+def test_handle_document_matches_predict(tmp_path, monkeypatch):
+    monkeypatch.setattr(doclayout, "_sessions", {})
+    model = OnnxModel(_write_model(tmp_path / "layout.onnx"))
+    model.batch_size = 2
+    doc = pymupdf.open()
+    for i in range(5):
+        # A landscape page in the middle cannot share a batch with the others
+        page = doc.new_page(width=842 if i == 2 else 595, height=595 if i == 2 else 842)
+        page.insert_text((72, 72 + 40 * i), f"page {i}", fontsize=30)
+    pages = [il_version_1.Page(page_number=i) for i in range(5)]
+
+    results = list(model.handle_document(pages, doc, _Config(), lambda *_: None))
+
+    assert [page.page_number for page, _ in results] == [0, 1, 2, 3, 4]
+    for page, result in results:
+        pix = doc[page.page_number].get_pixmap(dpi=72)
+        image = np.frombuffer(pix.samples, np.uint8).reshape(pix.height, pix.width, 3)[
+            :, :, ::-1
+        ]
+        (expected,) = model.predict(image, batch_size=1)
+        assert len(result.boxes) == len(expected.boxes) > 0
+        for box, expected_box in zip(result.boxes, expected.boxes, strict=True):
+            assert np.allclose(box.xyxy, expected_box.xyxy, atol=1e-3)
+
+
+def test_handle_document_reuses_cached_layout(tmp_path, monkeypatch):
+    monkeypatch.setattr(doclayout, "_sessions", {})
+    layout_cache.init_db(tmp_path / "layout_cache.db")
+    try:
+        model = OnnxModel(_write_model(tmp_path / "layout.onnx"))
+        doc = pymupdf.open()
+        for i in range(3):
+            doc.new_page().insert_text((72, 72 + 40 * i), f"page {i}", fontsize=30)
+        pages = [il_version_1.Page(page_number=i) for i in range(3)]
+        config = _Config()
+        config.use_layout_cache = True
+
+        first = list(model.handle_document(pages, doc, config, lambda *_: None))
+
+        def fail(*_):
+            raise AssertionError("the model ran on a cached page")
+
+        monkeypatch.setattr(model, "infer_boxes", fail)
+        second = list(model.handle_document(pages, doc, config, lambda *_: None))
+    finally:
+        layout_cache.init_db()
+
+    assert [page.page_number for page, _ in second] == [0, 1, 2]
+    for (_, expected), (_, result) in zip(first, second, strict=True):
+        assert len(result.boxes) == len(expected.boxes) > 0
+        for box, expected_box in zip(result.boxes, expected.boxes, strict=True):
+            assert np.allclose(box.xyxy, expected_box.xyxy)
@@ -0,0 +1,63 @@
+import random
+
+from babeldoc.format.pdf.document_il import Box
+from babeldoc.format.pdf.document_il import il_version_1
+from babeldoc.format.pdf.document_il.midend.typesetting import FreeSpaceIndex
+
+
+def random_box(rng: random.Random, size: float) -> Box:
+    x = rng.uniform(0, 600)
+    y = rng.uniform(0, 800)
+    return Box(x, y, x + rng.uniform(-1, size), y + rng.uniform(-1, size))
+
+
+def blocking(page: il_version_1.Page, current_box: Box):
+    paragraphs = [p.box for p in page.pdf_paragraph if p.box != current_box]
+    chars = [c.box for c in page.pdf_character]
+    figures = [f.box for f in page.pdf_figure]
+    return paragraphs + chars + figures
+
+
+def test_free_space_queries_match_page_scan():
+    rng = random.Random(0)  # noqa: S311
+    page = il_version_1.Page(
+        pdf_paragraph=[
+            il_version_1.PdfParagraph(box=random_box(rng, 150)) for _ in range(40)
+        ],
+        pdf_character=[
+            il_version_1.PdfCharacter(char_unicode="a", box=random_box(rng, 10))
+            for _ in range(2000)
+        ],
+        pdf_figure=[il_version_1.PdfFigure(box=random_box(rng, 200)) for _ in range(3)],
+    )
+    space_index = FreeSpaceIndex(page)
+
+    for i in range(200):
+        if i % 2:
+            paragraph = page.pdf_paragraph[i % len(page.pdf_paragraph)]
+            paragraph.box = random_box(rng, 150)
+            space_index.move_paragraph(paragraph)
+        current_box = random_box(rng, 150)
+        boxes = blocking(page, current_box)
+
+        expected_x = min(
+            [550.0]
+            + [
+                b.x
+                for b in boxes
+                if b.x > current_box.x
+                and not (b.y >= current_box.y2 or b.y2 <= current_box.y)
+            ]
+        )
+        assert space_index.max_right_space(current_box, 550.0) == expected_x
+
+        expected_y = max(
+            [0.0]
+            + [
+                b.y2
+                for b in boxes
+                if b.y2 < current_box.y
+                and not (b.x >= current_box.x2 or b.x2 <= current_box.x)
+            ]
+        )
+        assert space_index.max_bottom_space(current_box, 0.0) == expected_y
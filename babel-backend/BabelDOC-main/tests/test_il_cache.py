@@ -0,0 +1,73 @@
+import os
+from types import SimpleNamespace
+
+from babeldoc.format.pdf.document_il import il_version_1
+from babeldoc.format.pdf.il_cache import ILCache
+from babeldoc.format.pdf.il_cache import get_parse_state
+from babeldoc.format.pdf.il_cache import restore_parse_state
+from babeldoc.format.pdf.translation_config import SharedContextCrossSplitPart
+
+
+def _document(total_pages: int) -> il_version_1.Document:
+    return il_version_1.Document(
+        page=[
+            il_version_1.Page(page_number=i, unit="point") for i in range(total_pages)
+        ],
+        total_pages=total_pages,
+    )
+
+
+def test_round_trip(tmp_path):
+    cache = ILCache(tmp_path)
+    state = {"ocr_workaround": True, "auto_enabled_ocr_workaround": True}
+    cache.set("key", _document(3), state)
+
+    document, cached_state = cache.get("key")
+    assert document == _document(3)
+    assert cached_state == state
+    assert cache.get("other") is None
+
+
+def test_parse_state_keeps_character_counts():
+    def config():
+        return SimpleNamespace(
+            ocr_workaround=False,
+            skip_scanned_detection=False,
+            disable_rich_text_translate=False,
+            remove_non_formula_lines=False,
+            shared_context_cross_split_part=SharedContextCrossSplitPart(),
+        )
+
+    parsed = config()
+    parsed.ocr_workaround = True
+    parsed.shared_context_cross_split_part.valid_char_count_total = 1234
+    parsed.shared_context_cross_split_part.total_valid_text_token_count = 321
+
+    cached = config()
+    restore_parse_state(cached, get_parse_state(parsed))
+    assert cached.ocr_workaround
+    assert cached.shared_context_cross_split_part.valid_char_count_total == 1234
+    assert cached.shared_context_cross_split_part.total_valid_text_token_count == 321
+
+
+def test_unreadable_entry_is_discarded(tmp_path):
+    cache = ILCache(tmp_path)
+    (tmp_path / "key.il.zst").write_bytes(b"not zstd")
+
+    assert cache.get("key") is None
+    assert not (tmp_path / "key.il.zst").exists()
+
+
+def test_cleanup_keeps_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr("babeldoc.format.pdf.il_cache.MAX_CACHE_ENTRIES", 2)
+    cache = ILCache(tmp_path)
+    for i, key in enumerate(("a", "b")):
+        cache.set(key, _document(1), {})
+        os.utime(tmp_path / f"{key}.il.zst", (i, i))
+    # Reading "a" makes "b" the least recently used entry
+    cache.get("a")
+    cache.set("c", _document(1), {})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
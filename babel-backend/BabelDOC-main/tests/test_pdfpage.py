@@ -0,0 +1,49 @@
+import io
+
+from babeldoc.pdfminer.pdfdocument import PDFDocument
+from babeldoc.pdfminer.pdfpage import PDFPage
+from babeldoc.pdfminer.pdfparser import PDFParser
+
+
+def _nested_pdf() -> bytes:
+    """Five pages in a page tree of two intermediate nodes, [0, 1] and [2, 3, 4]."""
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: b"<< /Type /Pages /Kids [3 0 R 4 0 R] /Count 5 >>",
+        3: b"<< /Type /Pages /Parent 2 0 R /Kids [5 0 R 6 0 R] /Count 2 "
+        b"/MediaBox [0 0 100 100] >>",
+        4: b"<< /Type /Pages /Parent 2 0 R /Kids [7 0 R 8 0 R 9 0 R] /Count 3 "
+        b"/MediaBox [0 0 200 200] >>",
+    }
+    for objid in range(5, 10):
+        parent = 3 if objid < 7 else 4
+        objects[objid] = b"<< /Type /Page /Parent %d 0 R >>" % parent
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = {}
+    for objid, body in objects.items():
+        offsets[objid] = out.tell()
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (objid, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for objid in sorted(objects):
+        out.write(b"%010d 00000 n \n" % offsets[objid])
+    out.write(
+        b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+        % (len(objects) + 1, xref)
+    )
+    return out.getvalue()
+
+
+def test_create_pages_by_index():
+    document = PDFDocument(PDFParser(io.BytesIO(_nested_pdf())))
+    all_pages = list(PDFPage.create_pages(document))
+    assert PDFPage.count_pages(document) == len(all_pages) == 5
+
+    pages = list(PDFPage.create_pages_by_index(document, [4, 1, 3, 7]))
+
+    assert [index for index, _ in pages] == [1, 3, 4]
+    for index, page in pages:
+        assert page.pageid == all_pages[index].pageid
+        # Attributes are still inherited from the skipped-over nodes
+        assert page.mediabox == all_pages[index].mediabox
@@ -0,0 +1,44 @@
+import io
+
+import orjson
+from babeldoc.progress_monitor import MAX_EVENT_BYTES
+from babeldoc.progress_monitor import ProgressEventWriter
+
+
+def test_long_error_fits_in_one_pipe_write():
+    stream = io.BytesIO()
+    writer = ProgressEventWriter(stream, job_id="job")
+    error = RuntimeError('Traceback "line"\n' * 1000)
+    writer.write({"type": "error", "error": error})
+    writer.write({"type": "progress_update", "overall_progress": 50.0})
+
+    lines = stream.getvalue().splitlines(keepends=True)
+    assert len(lines) == 2
+    assert all(len(line) <= MAX_EVENT_BYTES for line in lines)
+    event = orjson.loads(lines[0])
+    assert event["job_id"] == "job"
+    assert event["error_type"] == "RuntimeError"
+    assert event["error"].startswith('Traceback "line"\n')
+    assert event["error"].endswith("[truncated]")
+
+
+def test_long_language_errors_fit_in_one_pipe_write():
+    stream = io.BytesIO()
+    writer = ProgressEventWriter(stream)
+    writer.write(
+        {
+            "type": "finish",
+            "translate_result": None,
+            "translate_results": {},
+            "translate_errors": {
+                "fr": ValueError("x" * 5000),
+                "de": KeyError("de"),
+            },
+        }
+    )
+
+    line = stream.getvalue()
+    assert len(line) <= MAX_EVENT_BYTES
+    errors = orjson.loads(line)["translate_errors"]
+    assert errors["fr"]["error"].endswith("[truncated]")
+    assert errors["de"] == {"error_type": "KeyError", "error": "'de'"}
@@ -0,0 +1,37 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from babeldoc.translator import translator
+from babeldoc.translator.translator import RateLimiter
+from babeldoc.translator.translator import install_translate_rate_limiter
+
+
+def _reserve_slots(count: int) -> list[float]:
+    return [translator.get_translate_rate_limiter().reserve() for _ in range(count)]
+
+
+def test_limit_is_shared_by_worker_processes():
+    limiter = RateLimiter(10)
+    with ProcessPoolExecutor(
+        max_workers=2,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=install_translate_rate_limiter,
+        initargs=(limiter,),
+    ) as executor:
+        futures = [executor.submit(_reserve_slots, 5) for _ in range(2)]
+        slots = sorted(slot for future in futures for slot in future.result())
+
+    assert len(slots) == 10
+    for earlier, later in zip(slots, slots[1:], strict=False):
+        assert later - earlier == pytest.approx(0.1, abs=1e-6)
+
+
+def test_token_budget():
+    limiter = RateLimiter(1000, max_tpm=600)
+    first = limiter.reserve(600)
+    # A full minute's worth of tokens may be sent at once, then 10 tokens/s
+    assert limiter.reserve(300) - first == pytest.approx(30, abs=0.1)
+    # Requests without a token count only wait for the QPS limit
+    limiter.set_max_tpm(None)
+    assert limiter.reserve(10**6) - first == pytest.approx(30.001, abs=0.1)
@@ -0,0 +1,84 @@
+from babeldoc.translator import cache as cache_module
+from babeldoc.translator.cache import TranslationCache
+from babeldoc.translator.cache import _TranslationCache
+from babeldoc.translator.cache import clean_test_db
+from babeldoc.translator.cache import init_test_db
+
+
+def test_get_many_and_set_many(monkeypatch):
+    test_db = init_test_db()
+    try:
+        monkeypatch.setattr(cache_module, "BATCH_SIZE", 8)
+        cache = TranslationCache("dummy", {"model": "a"})
+        cache.set_many((f"text_{i}", f"translation_{i}") for i in range(20))
+        assert _TranslationCache.select().count() == 20
+        assert len(cache.key("text_0")) == 64
+
+        # Entries are found in memory first, then in the database
+        cache_module._lru.clear()
+        cache.get_many(["text_0", "text_1"])
+        _TranslationCache.delete().where(
+            _TranslationCache.key == cache.key("text_0")
+        ).execute()
+        assert cache.get_many(["text_0", "text_5", "missing", "text_19"]) == [
+            "translation_0",
+            "translation_5",
+            None,
+            "translation_19",
+        ]
+        assert TranslationCache("dummy", {"model": "b"}).get("text_5") is None
+    finally:
+        clean_test_db(test_db)
+
+
+def test_lru_keeps_most_recently_used():
+    lru = cache_module._LRUCache(2)
+    lru.set("a", "1")
+    lru.set("b", "2")
+    lru.get("a")
+    lru.set("c", "3")
+    assert [lru.get(key) for key in "abc"] == ["1", None, "3"]
+
+
+def test_cleanup_evicts_least_recently_used(monkeypatch):
+    test_db = init_test_db()
+    try:
+        monkeypatch.setattr(cache_module, "MAX_CACHE_ROWS", 10)
+        cache = TranslationCache("dummy")
+        cache.set_many((f"text_{i}", f"translation_{i}") for i in range(10))
+        # Read the oldest entry again, from the database
+        cache_module._lru.clear()
+        assert cache.get("text_0") == "translation_0"
+
+        cache.set("text_10", "translation_10")
+        cache._cleanup()
+
+        assert _TranslationCache.select().count() == 10
+        cache_module._lru.clear()
+        assert cache.get_many(["text_0", "text_1", "text_10"]) == [
+            "translation_0",
+            None,
+            "translation_10",
+        ]
+    finally:
+        clean_test_db(test_db)
+
+
+def test_cleanup_limits_stored_bytes(monkeypatch):
+    test_db = init_test_db()
+    try:
+        cache = TranslationCache("dummy")
+        long_text = "lorem ipsum dolor sit amet " * 100
+        cache.set_many((f"{i} {long_text}", f"{i} translation") for i in range(20))
+        total = _TranslationCache.select(cache_module.fn.SUM(_TranslationCache.size))
+        # Long texts are stored compressed
+        assert total.scalar() < 20 * len(long_text)
+
+        monkeypatch.setattr(cache_module, "MAX_CACHE_BYTES", total.scalar() // 2)
+        cache._cleanup()
+
+        assert 0 < total.scalar() <= cache_module.MAX_CACHE_BYTES
+        cache_module._lru.clear()
+        assert cache.get(f"19 {long_text}") == "19 translation"
+    finally:
+        clean_test_db(test_db)
@@ -0,0 +1,24 @@
+from types import SimpleNamespace
+
+from babeldoc.translator.cache import TranslationMemory
+from babeldoc.translator.cache import clean_test_db
+from babeldoc.translator.cache import init_test_db
+
+
+def _translator(model="gpt-4o-mini"):
+    return SimpleNamespace(name="openai", lang_in="en", lang_out="zh", model=model)
+
+
+def test_translation_memory_is_keyed_by_paragraph():
+    test_db = init_test_db()
+    try:
+        memory = TranslationMemory(_translator())
+        memory.set_many([("Page {v1} of  the\nbook", "本书第 {v1} 页")])
+
+        assert memory.get_many(
+            [" Page {v1} of the book ", "Page {v2} of the book"]
+        ) == ["本书第 {v1} 页", None]
+        other_model = TranslationMemory(_translator("gpt-4o"))
+        assert other_model.get_many(["Page {v1} of the book"]) == [None]
+    finally:
+        clean_test_db(test_db)
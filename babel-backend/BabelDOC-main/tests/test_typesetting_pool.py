@@ -0,0 +1,128 @@
+import concurrent.futures
+import contextlib
+import copy
+from concurrent.futures.process import BrokenProcessPool
+
+import pymupdf
+from babeldoc.const import TYPESETTING_POOL_NAME
+from babeldoc.const import close_worker_pool
+from babeldoc.format.pdf.document_il import il_version_1
+from babeldoc.format.pdf.document_il.backend import pdf_creater
+from babeldoc.format.pdf.document_il.midend import typesetting
+from babeldoc.format.pdf.document_il.utils import fontmap
+from babeldoc.format.pdf.document_il.utils.fontmap import set_worker_font_mapper
+from babeldoc.tools.benchmark_typesetting import BuiltinFontMapper
+from babeldoc.tools.benchmark_typesetting import _Config
+from babeldoc.tools.benchmark_typesetting import dense_paper
+
+PAGES = 2
+
+
+class _Stage:
+    def __init__(self, total):
+        self.total = total
+        self.current = 0
+
+    def advance(self, n: int = 1):
+        self.current += n
+
+
+class _ProgressMonitor:
+    def __init__(self):
+        self.stages = []
+
+    @contextlib.contextmanager
+    def stage_start(self, stage_name: str, total: int):
+        stage = _Stage(total)
+        self.stages.append(stage)
+        yield stage
+
+    def raise_if_cancelled(self):
+        pass
+
+
+class _PoolConfig(_Config):
+    skip_form_render = False
+    skip_curve_render = False
+    ocr_workaround = False
+    font = None
+
+    def __init__(self, workers):
+        self.typesetting_workers = workers
+        self.progress_monitor = _ProgressMonitor()
+
+
+class _BreakingPool:
+    """Runs the first ``healthy`` tasks here and fails the rest like a pool
+    whose worker died."""
+
+    def __init__(self, healthy: int):
+        self.healthy = healthy
+
+    def submit(self, fn, *args):
+        future = concurrent.futures.Future()
+        if self.healthy > 0:
+            self.healthy -= 1
+            future.set_result(fn(*args))
+        else:
+            future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+
+def _typeset_and_render(document, config, font_mapper):
+    document = copy.deepcopy(document)
+    typesetting.Typesetting(config, font_mapper).typesetting_document(document)
+    for page in document.page:
+        page.pdf_font.append(il_version_1.PdfFont(font_id="base", encoding_length=2))
+        for paragraph in page.pdf_paragraph:
+            for composition in paragraph.pdf_paragraph_composition:
+                if char := composition.pdf_character:
+                    char.pdf_character_id = ord(char.char_unicode)
+    pdf = pymupdf.open()
+    for _ in document.page:
+        pdf.new_page()
+    creater = pdf_creater.PDFCreater(None, document, config, None, font_mapper)
+    with config.progress_monitor.stage_start("Render", len(document.page)) as pbar:
+        creater.update_content_streams(False, pdf, config, pbar)
+    layout = [
+        (
+            paragraph.scale,
+            [
+                composition.pdf_character
+                for composition in paragraph.pdf_paragraph_composition
+            ],
+        )
+        for page in document.page
+        for paragraph in page.pdf_paragraph
+    ]
+    return layout, [page.read_contents() for page in pdf]
+
+
+def test_pool_and_fallback_match_serial(monkeypatch):
+    document = dense_paper(PAGES)
+    font_mapper = BuiltinFontMapper()
+    # Close a pool forked before the font mapper was set
+    close_worker_pool(TYPESETTING_POOL_NAME)
+    monkeypatch.setattr(fontmap, "_worker_font_mappers", {})
+    set_worker_font_mapper(_PoolConfig(1), font_mapper)
+    try:
+        serial = _typeset_and_render(document, _PoolConfig(1), font_mapper)
+        pool_config = _PoolConfig(2)
+        assert _typeset_and_render(document, pool_config, font_mapper) == serial
+
+        # Typesetting breaks after preprocessing, rendering after one chunk
+        for module, healthy in ((typesetting, 2), (pdf_creater, 1)):
+            monkeypatch.setattr(
+                module,
+                "get_worker_pool",
+                lambda *_args, healthy=healthy: _BreakingPool(healthy),
+            )
+        fallback_config = _PoolConfig(2)
+        assert _typeset_and_render(document, fallback_config, font_mapper) == serial
+        for config in (pool_config, fallback_config):
+            assert [stage.current for stage in config.progress_monitor.stages] == [
+                PAGES * 2,
+                PAGES,
+            ]
+    finally:
+        close_worker_pool(TYPESETTING_POOL_NAME)
@@ -0,0 +1,60 @@
+import random
+
+from babeldoc.format.pdf.document_il import Box
+from babeldoc.format.pdf.document_il import PdfCharacter
+from babeldoc.format.pdf.document_il.midend.typesetting import ParagraphMetrics
+from babeldoc.format.pdf.document_il.midend.typesetting import TypesettingUnit
+from babeldoc.format.pdf.document_il.midend.typesetting import _first_fitting_scale
+
+SCALES = [1.0, 0.95, 0.9, 0.85, 0.8, 0.75, 0.7]
+
+
+def test_first_fitting_scale_matches_linear_search():
+    rng = random.Random(0)  # noqa: S311
+    for _ in range(500):
+        threshold = rng.choice([*SCALES, 0.5, 1.5])
+        start = rng.randrange(len(SCALES))
+        guess = rng.choice([None, *range(len(SCALES) + 1)])
+        tried = []
+
+        def fits(scale, threshold=threshold, tried=tried):
+            tried.append(scale)
+            return scale <= threshold
+
+        expected = next(
+            (i for i in range(start, len(SCALES)) if SCALES[i] <= threshold), None
+        )
+        assert _first_fitting_scale(SCALES, fits, start, guess) == expected
+        assert len(tried) <= 6
+
+
+def test_first_fitting_scale_good_guess():
+    tried = []
+
+    def fits(scale):
+        tried.append(scale)
+        return scale <= 0.8
+
+    assert _first_fitting_scale(SCALES, fits, guess=4) == 4
+    assert tried == [1.0, 0.8, 0.85]
+
+
+def test_width_before_next_break():
+    units = []
+    x = 0
+    for i, char in enumerate("ab cd,ef  g"):
+        width = i + 1
+        units.append(
+            TypesettingUnit(
+                char=PdfCharacter(char_unicode=char, box=Box(x, 0, x + width, 10))
+            )
+        )
+        x += width
+    metrics = ParagraphMetrics(units)
+    for i in range(len(units)):
+        expected = 0
+        for following in units[i:]:
+            if following.can_break_line:
+                break
+            expected += following.width
+        assert metrics.width_before_next_break[i] == expected
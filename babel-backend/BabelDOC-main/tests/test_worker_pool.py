@@ -0,0 +1,18 @@
+from babeldoc.const import close_worker_pool
+from babeldoc.const import get_worker_pool
+
+
+def _init(value):
+    pass
+
+
+def test_pool_is_recreated_for_other_initargs():
+    first, second = object(), object()
+    try:
+        pool = get_worker_pool("test", 2, initializer=_init, initargs=(first,))
+        assert get_worker_pool("test", 2, initializer=_init, initargs=(first,)) is pool
+        other = get_worker_pool("test", 2, initializer=_init, initargs=(second,))
+        assert other is not pool
+        assert get_worker_pool("test", 2) is not other
+    finally:
+        close_worker_pool("test")
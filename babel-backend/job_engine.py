@@ -0,0 +1,202 @@
+"""
+In-process BabelDOC job engine.
+
+Translation jobs run in a pool of long-lived worker processes instead of a
+fresh `uv run babeldoc` per upload. Each worker loads the expensive pieces
+once (ONNX layout model, font assets, translation cache) and then calls
+`babeldoc.format.pdf.high_level.async_translate` directly for every job.
+"""
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import sys
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+BASE_DIR = Path(__file__).parent
+BABELDOC_DIR = BASE_DIR / "BabelDOC-main"
+
+# Make the bundled BabelDOC importable when it is not installed in this environment
+if str(BABELDOC_DIR) not in sys.path:
+    sys.path.insert(0, str(BABELDOC_DIR))
+
+# Languages whose fonts are preloaded in every worker (comma separated)
+WARM_LANGUAGES = [
+    lang.strip()
+    for lang in os.environ.get("BABEL_WARM_LANGUAGES", "en").split(",")
+    if lang.strip()
+]
+
+# Worker process state, populated by _init_worker
+_event_stream = None
+_doc_layout_model = None
+
+
+def _init_worker(event_connection):
+    """Warm up a worker process: load everything a job would otherwise load itself"""
+    global _event_stream, _doc_layout_model
+    # Events are written as raw JSON lines to the pipe, not pickled Connection messages
+    _event_stream = os.fdopen(os.dup(event_connection.fileno()), "wb", buffering=0)
+    event_connection.close()
+
+    from babeldoc.docvision.doclayout import DocLayoutModel
+    from babeldoc.format.pdf import high_level
+    from babeldoc.format.pdf.document_il.utils.fontmap import preload_font_family
+    # Importing the cache module opens the translation cache database
+    import babeldoc.translator.cache  # noqa: F401
+
+    high_level.init()
+    high_level.download_font_assets()
+    _doc_layout_model = DocLayoutModel.load_onnx()
+    for lang in WARM_LANGUAGES:
+        preload_font_family(lang)
+    print(f"[Worker {os.getpid()}] Ready (warm languages: {', '.join(WARM_LANGUAGES)})")
+
+
+async def _translate(job_id: str, input_file: str, target_language: str,
+                     openai_api_key: str, options: dict) -> dict:
+    from babeldoc.format.pdf import high_level
+    from babeldoc.format.pdf.translation_config import TranslationConfig
+    from babeldoc.progress_monitor import ProgressEventWriter
+    from babeldoc.translator.translator import OpenAITranslator
+    from babeldoc.translator.translator import set_translate_rate_limiter
+
+    translator = OpenAITranslator(
+        lang_in=options["lang_in"],
+        lang_out=target_language,
+        model=options["model"],
+        api_key=openai_api_key,
+    )
+    set_translate_rate_limiter(options["qps"])
+
+    config = TranslationConfig(
+        translator=translator,
+        input_file=input_file,
+        lang_in=options["lang_in"],
+        lang_out=target_language,
+        doc_layout_model=_doc_layout_model,
+        output_dir=options["output_dir"],
+        qps=options["qps"],
+        pool_max_workers=options["pool_max_workers"],
+        use_rich_pbar=False,
+        report_interval=options["report_interval"],
+    )
+    init_font_mapper = getattr(_doc_layout_model, "init_font_mapper", None)
+    if init_font_mapper:
+        init_font_mapper(config)
+
+    events = ProgressEventWriter(_event_stream, job_id=job_id)
+    async for event in high_level.async_translate(config):
+        events.write(event)
+        if event["type"] == "finish":
+            result = event["translate_result"]
+            return {
+                "mono_pdf_path": str(result.mono_pdf_path) if result.mono_pdf_path else None,
+                "dual_pdf_path": str(result.dual_pdf_path) if result.dual_pdf_path else None,
+            }
+        if event["type"] == "error":
+            error = event["error"]
+            if isinstance(error, BaseException):
+                raise error
+            raise RuntimeError(str(error))
+
+    raise RuntimeError("Translation finished without a result")
+
+
+def _run_job(job_id: str, input_file: str, target_language: str,
+             openai_api_key: str, options: dict) -> dict:
+    """Entry point executed inside a warm worker process"""
+    print(f"[Worker {os.getpid()}] Starting job {job_id}")
+    return asyncio.run(
+        _translate(job_id, input_file, target_language, openai_api_key, options)
+    )
+
+
+class JobEngine:
+    """Pool of warm BabelDOC worker processes"""
+
+    def __init__(self, max_workers: int, output_dir: Path,
+                 on_event: Callable[[str, dict], None],
+                 model: str = "gpt-4o", lang_in: str = "en",
+                 qps: int = 4, pool_max_workers: int = 4,
+                 report_interval: float = 0.1):
+        self.max_workers = max_workers
+        self.on_event = on_event
+        self.options = {
+            "output_dir": str(Path(output_dir).absolute()),
+            "model": model,
+            "lang_in": lang_in,
+            "qps": qps,
+            "pool_max_workers": pool_max_workers,
+            "report_interval": report_interval,
+        }
+        # spawn keeps worker processes independent of the server's threads
+        self._mp_context = mp.get_context("spawn")
+        # All workers share one pipe and write whole JSON lines to it
+        self._event_reader, self._event_writer = self._mp_context.Pipe(duplex=False)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=self._mp_context,
+            initializer=_init_worker,
+            initargs=(self._event_writer,),
+        )
+        # Start all workers now so the warm-up happens before the first upload
+        for _ in range(self.max_workers):
+            self._executor.submit(os.getpid)
+        print(f"[Engine] Started {self.max_workers} warm worker process(es)")
+
+    async def consume_events(self):
+        """Read worker progress events line by line on the event loop"""
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        pipe = os.fdopen(os.dup(self._event_reader.fileno()), "rb", buffering=0)
+        transport, _ = await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), pipe
+        )
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    event = json.loads(line)
+                    self.on_event(event.pop("job_id"), event)
+                except Exception as e:
+                    print(f"[Engine] Error handling progress event {line[:200]!r}: {e}")
+        finally:
+            transport.close()
+
+    def submit(self, job_id: str, input_file: Path, target_language: str,
+               openai_api_key: str):
+        """Queue a job on the pool and return its future"""
+        if self._executor is None:
+            raise RuntimeError("Job engine is not started")
+        args = (job_id, str(Path(input_file).absolute()),
+                target_language, openai_api_key, self.options)
+        try:
+            return self._executor.submit(_run_job, *args)
+        except BrokenExecutor:
+            # A worker died (e.g. killed by the OOM killer) and took the pool
+            # down with it: replace the pool so this and later jobs still run
+            print(f"[Engine] Worker pool is broken, restarting it for job {job_id}")
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self.start()
+        try:
+            return self._executor.submit(_run_job, *args)
+        except BrokenExecutor as e:
+            # Hand the failure to the caller like any other job error, so the
+            # job is marked failed instead of being left pending
+            future = Future()
+            future.set_exception(e)
+            return future
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        print("[Engine] Stopped")
@@ -0,0 +1,97 @@
+"""
+Push-based job progress for long-lived client connections.
+
+Handlers that change a job only mark it as changed here. Every open
+`/api/job/{job_id}/events` stream waits for that signal and then sends the
+job's current state, at most once per `report_interval`, so a burst of
+ProgressMonitor updates collapses into a single message per client.
+"""
+import asyncio
+import json
+from typing import AsyncIterator, Callable, Dict, Optional, Set
+
+# Job states after which no further updates are sent
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Fields of the job dict that are pushed to clients
+SNAPSHOT_FIELDS = (
+    "job_id", "status", "progress", "message", "queue_position",
+    "translated_file", "error",
+)
+
+
+class _Subscriber:
+    def __init__(self):
+        self.changed = asyncio.Event()
+
+
+class JobEventBroker:
+    """Fan job state changes out to the event streams watching each job"""
+
+    def __init__(self, report_interval: float = 0.1, keepalive_interval: float = 15.0):
+        self.report_interval = report_interval
+        self.keepalive_interval = keepalive_interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: Dict[str, Set[_Subscriber]] = {}
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """Attach the event loop that serves the event streams"""
+        self._loop = loop
+
+    def notify(self, job_id: str):
+        """Mark a job as changed; safe to call from any thread"""
+        loop = self._loop
+        if loop is None or job_id not in self._subscribers:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._wake(job_id)
+        else:
+            loop.call_soon_threadsafe(self._wake, job_id)
+
+    def _wake(self, job_id: str):
+        for subscriber in self._subscribers.get(job_id, ()):
+            subscriber.changed.set()
+
+    async def stream(self, job_id: str, snapshot: Callable[[], Optional[dict]]) -> AsyncIterator[str]:
+        """Yield SSE messages for a job until it completes, fails or disappears"""
+        subscriber = _Subscriber()
+        self._subscribers.setdefault(job_id, set()).add(subscriber)
+        last_sent = None
+        try:
+            while True:
+                state = snapshot()
+                if state is None:
+                    yield "event: gone\ndata: {}\n\n"
+                    return
+                if state != last_sent:
+                    last_sent = state
+                    yield f"event: progress\ndata: {json.dumps(state)}\n\n"
+                if state["status"] in TERMINAL_STATUSES:
+                    return
+
+                # Anything that changes while we sleep is coalesced into the next message
+                await asyncio.sleep(self.report_interval)
+                if subscriber.changed.is_set():
+                    subscriber.changed.clear()
+                    continue
+                try:
+                    await asyncio.wait_for(subscriber.changed.wait(), self.keepalive_interval)
+                    subscriber.changed.clear()
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing idle connections; also refreshes queue_position
+                    yield ": keepalive\n\n"
+        finally:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[job_id]
+
+
+def job_snapshot(job: dict) -> dict:
+    """The subset of a job dict that is pushed to clients"""
+    return {field: job.get(field) for field in SNAPSHOT_FIELDS}
@@ -0,0 +1,186 @@
+"""
+Persistent job history for the FastAPI server.
+
+Jobs are stored in a WAL-mode SQLite database through peewee, the same way
+BabelDOC stores its translation cache. Pending and running jobs are also kept
+in memory: progress events mutate that dict directly, and the row is written
+only when the job changes state, so progress updates never touch the disk.
+"""
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from peewee import CharField
+from peewee import IntegerField
+from peewee import Model
+from peewee import SqliteDatabase
+from peewee import TextField
+
+# we don't init the database here
+db = SqliteDatabase(None)
+
+ACTIVE_STATUSES = ("pending", "processing")
+
+
+class _Job(Model):
+    job_id = CharField(primary_key=True, max_length=36)
+    status = CharField(max_length=16)
+    progress = IntegerField(default=0)
+    message = TextField(null=True)
+    original_filename = TextField()
+    target_language = CharField(max_length=16)
+    # SHA-256 of the uploaded PDF and the model used; identical requests reuse the output
+    source_hash = CharField(max_length=64, null=True)
+    model = CharField(max_length=64, null=True)
+    translated_file = TextField(null=True, index=True)
+    error = TextField(null=True)
+    # ISO 8601 strings sort chronologically and are what the API returns
+    created_at = CharField(max_length=32, index=True)
+    completed_at = CharField(max_length=32, null=True)
+
+    class Meta:
+        database = db
+        table_name = "jobs"
+        indexes = (
+            # Filtered listing: WHERE status = ? ORDER BY created_at DESC
+            (("status", "created_at"), False),
+            # Dedup lookup: same source, language and model
+            (("source_hash", "target_language", "model"), False),
+        )
+
+
+FIELDS = tuple(_Job._meta.sorted_field_names)
+
+
+def _row_to_dict(row: _Job) -> dict:
+    return {field: getattr(row, field) for field in FIELDS}
+
+
+class JobStore:
+    """Job table plus an in-memory view of the jobs that are still active"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        db.init(
+            str(self.db_path),
+            pragmas={
+                "journal_mode": "wal",
+                "synchronous": "normal",
+                "busy_timeout": 1000,
+            },
+        )
+        db.create_tables([_Job], safe=True)
+        self._lock = threading.Lock()
+        self._active: Dict[str, dict] = {}
+
+    def create(self, job: dict):
+        """Insert a new job and keep it in memory while it is active"""
+        with self._lock:
+            self._active[job["job_id"]] = job
+        _Job.insert(**{field: job[field] for field in FIELDS if field in job}).execute()
+
+    def active(self, job_id: str) -> Optional[dict]:
+        """The live, mutable dict of a pending or running job"""
+        return self._active.get(job_id)
+
+    def active_ids(self, status: Optional[str] = None) -> List[str]:
+        with self._lock:
+            return [
+                job_id for job_id, job in self._active.items()
+                if status is None or job["status"] == status
+            ]
+
+    def get(self, job_id: str) -> Optional[dict]:
+        job = self._active.get(job_id)
+        if job is not None:
+            return job
+        row = _Job.get_or_none(_Job.job_id == job_id)
+        return _row_to_dict(row) if row else None
+
+    def save(self, job_id: str):
+        """Write an active job back to the table; finished jobs leave memory"""
+        job = self._active.get(job_id)
+        if job is None:
+            return
+        _Job.update(**{field: job.get(field) for field in FIELDS if field != "job_id"}).where(
+            _Job.job_id == job_id
+        ).execute()
+        if job["status"] not in ACTIVE_STATUSES:
+            with self._lock:
+                self._active.pop(job_id, None)
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._active.pop(job_id, None)
+        _Job.delete().where(_Job.job_id == job_id).execute()
+
+    def list(self, status: Optional[str] = None, limit: int = 50,
+             before: Optional[str] = None) -> List[dict]:
+        """Newest jobs first, `limit` at a time; pass the last `created_at` as `before`"""
+        query = _Job.select()
+        if status:
+            query = query.where(_Job.status == status)
+        if before:
+            query = query.where(_Job.created_at < before)
+        query = query.order_by(_Job.created_at.desc()).limit(limit)
+        results = []
+        for row in query:
+            # Active jobs have fresher progress in memory than in the table
+            job = self._active.get(row.job_id)
+            results.append(dict(job) if job is not None else _row_to_dict(row))
+        return results
+
+    def find_completed(self, source_hash: str, target_language: str,
+                       model: str) -> Optional[dict]:
+        """The newest completed job that translated the same source the same way"""
+        row = (
+            _Job.select()
+            .where(
+                (_Job.source_hash == source_hash)
+                & (_Job.target_language == target_language)
+                & (_Job.model == model)
+                & (_Job.status == "completed")
+            )
+            .order_by(_Job.created_at.desc())
+            .first()
+        )
+        return _row_to_dict(row) if row else None
+
+    def find_active(self, source_hash: str, target_language: str,
+                    model: str) -> List[dict]:
+        """The pending or running jobs that translate the same source the same way"""
+        with self._lock:
+            return [
+                job for job in self._active.values()
+                if (job.get("source_hash"), job["target_language"], job.get("model")) == (
+                    source_hash, target_language, model
+                )
+            ]
+
+    def input_in_use(self, source_hash: str) -> bool:
+        """Whether any remaining job was created from this stored input"""
+        return _Job.select().where(_Job.source_hash == source_hash).exists()
+
+    def output_in_use(self, translated_file: str) -> bool:
+        """Whether any remaining job still points at this output file"""
+        return _Job.select().where(_Job.translated_file == translated_file).exists()
+
+    def recover_interrupted(self, message: str) -> int:
+        """Fail jobs left pending or running by a previous server process; call at startup"""
+        return _Job.update(
+            status="failed",
+            error=message,
+            message=f"Translation failed: {message}",
+            completed_at=datetime.now().isoformat(),
+        ).where(_Job.status.in_(ACTIVE_STATUSES)).execute()
+
+    def purge_expired(self, max_age: timedelta) -> List[dict]:
+        """Delete finished jobs created more than `max_age` ago and return them"""
+        cutoff = (datetime.now() - max_age).isoformat()
+        condition = (_Job.created_at < cutoff) & (_Job.status.not_in(ACTIVE_STATUSES))
+        expired = [_row_to_dict(row) for row in _Job.select().where(condition)]
+        if expired:
+            _Job.delete().where(condition).execute()
+        return expired
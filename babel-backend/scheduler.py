@@ -0,0 +1,185 @@
+"""
+Admission control and fair scheduling for translation jobs.
+
+Jobs wait in a bounded queue with one FIFO per tenant (API key). Tenants are
+served round-robin, so one client uploading a burst of files cannot starve the
+others, and only `max_concurrency` jobs run on the worker pool at a time.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import Callable, Optional
+
+# Rough resident memory of one running job (layout model, IL, fonts, PDF buffers)
+JOB_MEMORY_ESTIMATE = 1536 * 1024 * 1024
+
+
+class AdmissionError(Exception):
+    """A job was rejected by admission control"""
+
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: int = 30):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueFullError(AdmissionError):
+    """The global job queue is full"""
+
+    status_code = 503
+
+
+class TenantLimitError(AdmissionError):
+    """The tenant already has too many queued jobs"""
+
+    status_code = 429
+
+
+def default_concurrency(pool_max_workers: int) -> int:
+    """Size the number of concurrent jobs to the machine's cores and memory"""
+    cpu_count = os.cpu_count() or 1
+    by_cpu = max(1, cpu_count // max(1, pool_max_workers))
+    try:
+        import psutil
+
+        available = psutil.virtual_memory().available
+        by_memory = max(1, available // JOB_MEMORY_ESTIMATE)
+    except Exception:
+        by_memory = by_cpu
+    return int(min(by_cpu, by_memory))
+
+
+def tenant_id(api_key: Optional[str]) -> str:
+    """Derive a stable tenant id from a client API key without keeping the key"""
+    if not api_key:
+        return "anonymous"
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+class JobScheduler:
+    """Bounded, per-tenant fair queue in front of a JobEngine"""
+
+    def __init__(self, engine, max_queue_size: int, max_concurrency: int,
+                 max_running_per_tenant: int, max_queued_per_tenant: int,
+                 on_done: Callable[[str, object], None]):
+        self.engine = engine
+        self.max_queue_size = max_queue_size
+        self.max_concurrency = max_concurrency
+        self.max_running_per_tenant = max_running_per_tenant
+        self.max_queued_per_tenant = max_queued_per_tenant
+        self.on_done = on_done
+
+        # Re-entrant: a future that is already done runs its callback inside dispatch
+        self._lock = threading.RLock()
+        # tenant -> FIFO of (job_id, submit args); insertion order is the round-robin order
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._queued_count = 0
+        self._running: dict = {}
+        self._running_per_tenant: dict = {}
+
+    def check_admission(self, tenant: str):
+        """Raise an AdmissionError if a new job from `tenant` would be rejected"""
+        with self._lock:
+            self._check_admission_locked(tenant)
+
+    def _check_admission_locked(self, tenant: str):
+        if self._queued_count >= self.max_queue_size:
+            raise QueueFullError(
+                f"Job queue is full ({self.max_queue_size} jobs waiting), try again later"
+            )
+        tenant_queue = self._queues.get(tenant)
+        if tenant_queue is not None and len(tenant_queue) >= self.max_queued_per_tenant:
+            raise TenantLimitError(
+                f"Too many queued jobs for this API key (limit {self.max_queued_per_tenant})",
+                retry_after=60,
+            )
+
+    def submit(self, job_id: str, tenant: str, *args):
+        """Queue a job; it is dispatched to the engine as soon as a slot frees up"""
+        with self._lock:
+            self._check_admission_locked(tenant)
+            self._queues.setdefault(tenant, deque()).append((job_id, args))
+            self._queued_count += 1
+            self._dispatch_locked()
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based position of a queued job in dispatch order, None if not queued"""
+        with self._lock:
+            for index, (queued_job_id, _) in enumerate(self._dispatch_order_locked()):
+                if queued_job_id == job_id:
+                    return index + 1
+        return None
+
+    def tenant(self, job_id: str) -> Optional[str]:
+        """The tenant that submitted a queued or running job, None otherwise"""
+        with self._lock:
+            if job_id in self._running:
+                return self._running[job_id]
+            for tenant, tenant_queue in self._queues.items():
+                if any(queued_job_id == job_id for queued_job_id, _ in tenant_queue):
+                    return tenant
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self._queued_count,
+                "running": len(self._running),
+                "max_queue_size": self.max_queue_size,
+                "max_concurrency": self.max_concurrency,
+            }
+
+    def _dispatch_order_locked(self):
+        """Yield queued jobs in the order round-robin dispatch would start them"""
+        queues = [list(q) for q in self._queues.values()]
+        depth = 0
+        while True:
+            emitted = False
+            for q in queues:
+                if depth < len(q):
+                    emitted = True
+                    yield q[depth]
+            if not emitted:
+                return
+            depth += 1
+
+    def _dispatch_locked(self):
+        while len(self._running) < self.max_concurrency and self._queued_count:
+            tenant = self._next_tenant_locked()
+            if tenant is None:
+                return
+            tenant_queue = self._queues[tenant]
+            job_id, args = tenant_queue.popleft()
+            self._queued_count -= 1
+            # Move the tenant to the back of the round-robin order
+            del self._queues[tenant]
+            if tenant_queue:
+                self._queues[tenant] = tenant_queue
+
+            future = self.engine.submit(job_id, *args)
+            self._running[job_id] = tenant
+            self._running_per_tenant[tenant] = self._running_per_tenant.get(tenant, 0) + 1
+            future.add_done_callback(
+                lambda f, job_id=job_id: self._job_finished(job_id, f)
+            )
+
+    def _next_tenant_locked(self) -> Optional[str]:
+        for tenant in self._queues:
+            if self._running_per_tenant.get(tenant, 0) < self.max_running_per_tenant:
+                return tenant
+        return None
+
+    def _job_finished(self, job_id: str, future):
+        with self._lock:
+            tenant = self._running.pop(job_id, None)
+            if tenant is not None:
+                self._running_per_tenant[tenant] -= 1
+                if not self._running_per_tenant[tenant]:
+                    del self._running_per_tenant[tenant]
+        try:
+            self.on_done(job_id, future)
+        finally:
+            with self._lock:
+                self._dispatch_locked()
@@ -1,20 +1,42 @@
+import asyncio
+import hashlib
 import os
-import shutil
-import subprocess
+import tempfile
 import threading
 import uuid
-import time
-import re
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional, Dict
-from datetime import datetime
+from typing import Optional
+from datetime import datetime, timedelta
 
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi import FastAPI, File, UploadFile, Form, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse
+from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
-app = FastAPI()
+from job_engine import JobEngine
+from job_events import JobEventBroker, job_snapshot
+from job_store import ACTIVE_STATUSES, JobStore
+from scheduler import AdmissionError, JobScheduler, default_concurrency, tenant_id
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the warm worker pool with the server and stop it on shutdown"""
+    interrupted = job_store.recover_interrupted("Server restarted before the job finished")
+    if interrupted:
+        print(f"[Jobs] Marked {interrupted} interrupted job(s) as failed")
+    broker.bind(asyncio.get_running_loop())
+    engine.start()
+    event_task = asyncio.create_task(engine.consume_events())
+    retention_task = asyncio.create_task(purge_expired_jobs_periodically())
+    yield
+    retention_task.cancel()
+    event_task.cancel()
+    engine.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS configuration
 origins = [
@@ -33,15 +55,20 @@ app.add_middleware(
 BASE_DIR = Path(__file__).parent
 INPUTS_DIR = BASE_DIR / "Inputs"
 OUTPUTS_DIR = BASE_DIR / "Outputs"
-BABELDOC_DIR = BASE_DIR / "BabelDOC-main"
 DASHBOARD_DIR = BASE_DIR.parent / "dashboard"
 
 # Ensure directories exist
 INPUTS_DIR.mkdir(exist_ok=True)
 OUTPUTS_DIR.mkdir(exist_ok=True)
 
-# Job tracking
-jobs: Dict[str, dict] = {}
+# Uploads are read and written in chunks of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Job tracking: persistent history, with pending/running jobs also held in memory
+job_store = JobStore(Path(os.environ.get("BABEL_JOB_DB", BASE_DIR / "jobs.db")))
+
+# Finished jobs (and their output files) are deleted after this many days; 0 keeps them forever
+JOB_RETENTION_DAYS = float(os.environ.get("BABEL_JOB_RETENTION_DAYS", "30"))
 
 def load_env_file():
     """Load environment variables from .env file"""
@@ -66,240 +93,246 @@ def load_env_file():
 # Load env vars on startup
 load_env_file()
 
-def run_translation_job(job_id: str, file_path: Path, target_language: str, openai_api_key: str):
-    """Run translation in background thread"""
-    try:
-        # Update job status immediately with initial progress
-        if job_id in jobs:
-            jobs[job_id]["status"] = "processing"
-            jobs[job_id]["progress"] = 3  # Start at 3% immediately
-            jobs[job_id]["message"] = "File uploaded, preparing translation..."
-            print(f"[Job {job_id}] Status updated: processing, progress: 3%")
-        
-        # Start progress simulator thread (fallback - will be overridden by actual BabelDOC stages)
-        import threading
-        stop_simulator = threading.Event()
-        
-        def simulate_progress():
-            """Gradually increase progress over time as fallback if BabelDOC stages aren't detected"""
-            # Fallback progress points (will be overridden by actual BabelDOC stage detection)
-            progress_points = [
-                (5, "Starting translation..."),           # 0-2s: Initial
-                (10, "Parsing PDF document..."),          # 2-4s: Quick start
-                (20, "Extracting content..."),            # 4-8s: Building confidence
-                (30, "Extracting terminology..."),        # 8-12s
-                (40, "Translating content..."),           # 12-16s
-                (50, "Translating paragraphs..."),        # 16-20s
-                (60, "Processing translation..."),        # 20-28s
-                (70, "Formatting document..."),           # 28-40s
-                (80, "Applying styles..."),               # 40-60s
-                (85, "Generating PDF..."),                # 60-80s
-                (90, "Optimizing output..."),             # 80-100s
-                (95, "Finalizing..."),                    # 100-120s
-            ]
-            
-            start_time = time.time()
-            last_progress = 1  # Start from initial 1%
-            
-            for target_progress, message in progress_points:
-                if stop_simulator.is_set():
-                    break
-                
-                # Calculate time elapsed to adjust pacing
-                elapsed = time.time() - start_time
-                
-                # Slower updates to avoid getting stuck at high percentages too early
-                if target_progress <= 35:
-                    sleep_time = 3  # Initial updates
-                elif target_progress <= 75:
-                    sleep_time = 6  # Medium speed
-                else:
-                    sleep_time = 10 # Much slower near completion
-                
-                time.sleep(sleep_time)
-                
-                if jobs[job_id]["status"] == "processing":
-                    # Smoothly increase progress
-                    jobs[job_id]["progress"] = target_progress
-                    jobs[job_id]["message"] = message
-                    print(f"[Job {job_id}] Progress: {target_progress}% - {message}")
-                    last_progress = target_progress
-        
-        simulator_thread = threading.Thread(target=simulate_progress, daemon=True)
-        simulator_thread.start()
-        print(f"[Job {job_id}] Progress simulator thread started")
-        
-        cmd = [
-            "uv", "run", "babeldoc",
-            "--files", str(file_path.absolute()),
-            "--lang-out", target_language,
-            "--openai",
-            "--openai-model", "gpt-4o",
-            "--openai-api-key", openai_api_key,
-            "--pool-max-workers", "4",  # Process with 4 parallel workers for faster translation
-            "--output", str(OUTPUTS_DIR.absolute())
-        ]
-        
-        print(f"[Job {job_id}] Running command: {' '.join(cmd)}")
-        
-        # Run BabelDOC
-        process = subprocess.Popen(
-            cmd,
-            cwd=str(BABELDOC_DIR),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            env=dict(os.environ, PYTHONUNBUFFERED="1")
-        )
-        
-        print(f"[Job {job_id}] BabelDOC process started with PID {process.pid}")
-        
-        # BabelDOC stage mapping to progress percentages
-        babeldoc_stages = {
-            "Loading ONNX model": (2, "Loading translation engine..."),
-            "start to translate": (5, "Starting translation..."),
-            "Parse PDF and Create Intermediate Representation": (10, "Parsing PDF document..."),
-            "DetectScannedFile": (12, "Detecting document type..."),
-            "Parse Page Layout": (18, "Analyzing page layout..."),
-            "Parse Paragraphs": (25, "Extracting paragraphs..."),
-            "Parse Formulas and Styles": (30, "Parsing formulas and styles..."),
-            "Automatic Term Extraction": (35, "Extracting terminology..."),
-            "Translate Paragraphs": (45, "Translating content..."),  # Main translation work
-            "Typesetting": (75, "Formatting document..."),
-            "Add Fonts": (82, "Adding fonts..."),
-            "Generate drawing instructions": (88, "Generating graphics..."),
-            "Subset font": (92, "Optimizing fonts..."),
-            "Save PDF": (95, "Saving PDF..."),
-            "finish translate": (97, "Finalizing translation..."),
-            "Translation results": (98, "Translation complete!")
-        }
-        
-        # Monitor output and detect BabelDOC stages
-        # Use a buffer to handle fragmented output (e.g. single characters)
-        output_buffer = ""
-        
-        while True:
-            # Read one character at a time
-            char = process.stdout.read(1)
-            
-            # If end of stream and process finished
-            if not char and process.poll() is not None:
-                break
-                
-            if not char:
-                continue
-                
-            output_buffer += char
-            
-            # Process line if newline or carriage return detected
-            if char == '\n' or char == '\r':
-                line = output_buffer.strip()
-                output_buffer = "" # Reset buffer
-                
-                if not line:
-                    continue
-                    
-                print(f"[Job {job_id}] {line}")
-                
-                # Check for BabelDOC validation errors
-                if "Cannot translate files that have already been translated" in line:
-                    print(f"[Job {job_id}] Error detected: Input file is already a BabelDOC output")
-                    jobs[job_id]["status"] = "failed"
-                    jobs[job_id]["error"] = "Cannot translate a file that was already generated by BabelDOC. Please upload the original source file."
-                    jobs[job_id]["message"] = "Error: File already translated"
-                    process.kill()
-                    return
-
-                # Detect BabelDOC stages and update progress accordingly
-                line_lower = line.lower()
-                for stage_key, (progress, message) in babeldoc_stages.items():
-                    if stage_key.lower() in line_lower:
-                        if jobs[job_id]["status"] == "processing":
-                            jobs[job_id]["progress"] = max(jobs[job_id].get("progress", 0), progress)
-                            jobs[job_id]["message"] = message
-                            print(f"[Job {job_id}] Stage detected: {stage_key} -> Progress: {progress}% - {message}")
-                        break
-
-                # Parse progress from output if available (fallback)
-                if "%" in line:
-                    match = re.search(r'(\d+)%', line)
-                    if match:
-                        progress = int(match.group(1))
-                        # Only update if higher than current progress
-                        if progress > jobs[job_id].get("progress", 0):
-                            jobs[job_id]["progress"] = min(progress, 95)
-        
-        process.wait()
-        
-        # Stop simulator
-        stop_simulator.set()
-        
-        if process.returncode != 0:
-            stderr = process.stderr.read()
-            print(f"[Job {job_id}] Error: {stderr}")
-            jobs[job_id]["status"] = "failed"
-            jobs[job_id]["error"] = stderr
-            jobs[job_id]["message"] = "Translation failed"
-            return
-        
-        # Find output file - prioritize mono version over dual version
-        input_stem = Path(jobs[job_id]["original_filename"]).stem
-        
-        # BabelDOC creates: filename.langcode.mono.pdf and filename.langcode.dual.pdf
-        mono_pattern = f"{input_stem}.{target_language}.mono.pdf"
-        dual_pattern = f"{input_stem}.{target_language}.dual.pdf"
-        
-        # Check for mono version first
-        mono_file = OUTPUTS_DIR / mono_pattern
-        if mono_file.exists():
-            translated_file = mono_file
-            print(f"[Job {job_id}] Found mono version: {mono_file.name}")
+# BabelDOC stage names mapped to user-facing progress messages
+STAGE_MESSAGES = {
+    "Parse PDF and Create Intermediate Representation": "Parsing PDF document...",
+    "DetectScannedFile": "Detecting document type...",
+    "Parse Page Layout": "Analyzing page layout...",
+    "Parse Table": "Analyzing tables...",
+    "Parse Paragraphs": "Extracting paragraphs...",
+    "Parse Formulas and Styles": "Parsing formulas and styles...",
+    "Automatic Term Extraction": "Extracting terminology...",
+    "Translate Paragraphs": "Translating content...",
+    "Typesetting": "Formatting document...",
+    "Add Fonts": "Adding fonts...",
+    "Generate drawing instructions": "Generating graphics...",
+    "Subset font": "Optimizing fonts...",
+    "Save PDF": "Saving PDF...",
+}
+
+ALREADY_TRANSLATED_ERROR = (
+    "Cannot translate a file that was already generated by BabelDOC. "
+    "Please upload the original source file."
+)
+
+
+# Uploads that match a job in progress become aliases of that job: they have
+# a row and filename of their own but follow the job, so that one output file
+# is never written by two jobs at once. Job id -> alias ids, and back.
+job_aliases: dict = {}
+alias_leaders: dict = {}
+job_aliases_lock = threading.Lock()
+
+# What an alias takes over from the job it follows
+MIRRORED_FIELDS = ("status", "progress", "message", "translated_file", "error", "completed_at")
+
+
+def mirror_job(job: dict, alias_id: str):
+    """Copy the state of `job` to its alias and wake the alias's event streams"""
+    alias = job_store.active(alias_id)
+    if alias is None:
+        return
+    status_changed = alias["status"] != job["status"]
+    for field in MIRRORED_FIELDS:
+        alias[field] = job.get(field)
+    if status_changed:
+        job_store.save(alias_id)
+    broker.notify(alias_id)
+
+
+def sync_aliases(job: dict, finished: bool = False):
+    """Bring the aliases of `job` up to date; they are released once it finished"""
+    with job_aliases_lock:
+        if finished:
+            alias_ids = job_aliases.pop(job["job_id"], [])
+            for alias_id in alias_ids:
+                alias_leaders.pop(alias_id, None)
         else:
-            # Fall back to finding any matching file, excluding dual versions
-            all_files = list(OUTPUTS_DIR.glob(f"{input_stem}*.pdf"))
-            if not all_files:
-                all_files = list(OUTPUTS_DIR.glob(f"{input_stem}*"))
-            
-            if not all_files:
-                jobs[job_id]["status"] = "failed"
-                jobs[job_id]["error"] = "Output file not found"
-                jobs[job_id]["message"] = "Translation failed: output file not found"
-                return
-            
-            # Filter out dual versions - prioritize mono
-            mono_files = [f for f in all_files if '.mono.pdf' in f.name]
-            if mono_files:
-                potential_files = mono_files
-                print(f"[Job {job_id}] Found {len(mono_files)} mono version(s)")
-            else:
-                # Filter out dual, get any remaining
-                non_dual = [f for f in all_files if '.dual.pdf' not in f.name]
-                if non_dual:
-                    potential_files = non_dual
-                    print(f"[Job {job_id}] Using non-dual version")
-                else:
-                    # Last resort: use dual
-                    potential_files = all_files
-                    print(f"[Job {job_id}] No mono version found, using dual as fallback")
-            
-            # Sort by modification time, newest first
-            potential_files.sort(key=lambda f: f.stat().st_mtime, reverse=True)
-            translated_file = potential_files[0]
-            print(f"[Job {job_id}] Selected file: {translated_file.name}")
-        
-        jobs[job_id]["status"] = "completed"
-        jobs[job_id]["progress"] = 100
-        jobs[job_id]["translated_file"] = translated_file.name
-        jobs[job_id]["message"] = "Translation complete!"
-        jobs[job_id]["completed_at"] = datetime.now().isoformat()
-        
-        print(f"[Job {job_id}] Completed: {translated_file.name}")
-        
+            alias_ids = list(job_aliases.get(job["job_id"], ()))
+        for alias_id in alias_ids:
+            mirror_job(job, alias_id)
+
+
+def create_alias(job: dict, original_filename: str) -> str:
+    """Create a job for an upload that follows `job`, which is in progress"""
+    alias_id = str(uuid.uuid4())
+    with job_aliases_lock:
+        # Under the lock: the job cannot finish between the copy and the registration
+        alias = {field: job.get(field) for field in MIRRORED_FIELDS}
+        alias.update({
+            "job_id": alias_id,
+            "original_filename": original_filename,
+            "target_language": job["target_language"],
+            "source_hash": job["source_hash"],
+            "model": job["model"],
+            "created_at": datetime.now().isoformat(),
+            "queue_position": None,
+        })
+        job_store.create(alias)
+        if job["status"] in ACTIVE_STATUSES:
+            job_aliases.setdefault(job["job_id"], []).append(alias_id)
+            alias_leaders[alias_id] = job["job_id"]
+        else:
+            # The job finished in the meantime
+            job_store.save(alias_id)
+    return alias_id
+
+
+def queue_position(job_id: str) -> Optional[int]:
+    """Position of a pending job, or of the job it is an alias of, in the queue"""
+    return scheduler.position(alias_leaders.get(job_id, job_id))
+
+
+def handle_job_event(job_id: str, event: dict):
+    """Apply a progress event published by a worker process to the job"""
+    job = job_store.active(job_id)
+    if job is None:
+        return
+    apply_job_event(job_id, job, event)
+    sync_aliases(job)
+
+
+def apply_job_event(job_id: str, job: dict, event: dict):
+    """Update an active job from one of its progress events"""
+    if event["type"] == "finish":
+        job["progress"] = max(job.get("progress", 0), 98)
+        job["message"] = "Finalizing translation..."
+        broker.notify(job_id)
+        return
+    if event["type"] not in ("progress_start", "progress_update", "progress_end"):
+        return
+    if job["status"] == "pending":
+        job["status"] = "processing"
+        job["queue_position"] = None
+        job_store.save(job_id)
+    if job["status"] != "processing":
+        return
+    overall = event.get("overall_progress")
+    if overall is not None:
+        # Keep a little headroom: 100% is only reported once the output is located
+        job["progress"] = max(job.get("progress", 0), min(int(overall), 97))
+    stage = event.get("stage")
+    if stage:
+        job["message"] = STAGE_MESSAGES.get(stage, f"{stage}...")
+    broker.notify(job_id)
+
+
+def find_translated_file(job_id: str, job: dict, result: dict) -> Optional[Path]:
+    """Locate the translated PDF, preferring the mono version over the dual version"""
+    for key in ("mono_pdf_path", "dual_pdf_path"):
+        path = result.get(key)
+        if path and Path(path).exists():
+            print(f"[Job {job_id}] Found output: {Path(path).name}")
+            return Path(path)
+
+    # Fall back to searching the outputs directory by input name
+    # Inputs are stored by content hash, so outputs are named after it
+    input_stem = job.get("source_hash") or Path(job["original_filename"]).stem
+    target_language = job["target_language"]
+
+    # BabelDOC creates: filename.langcode.mono.pdf and filename.langcode.dual.pdf
+    mono_file = OUTPUTS_DIR / f"{input_stem}.{target_language}.mono.pdf"
+    if mono_file.exists():
+        print(f"[Job {job_id}] Found mono version: {mono_file.name}")
+        return mono_file
+
+    all_files = list(OUTPUTS_DIR.glob(f"{input_stem}*.pdf"))
+    if not all_files:
+        all_files = list(OUTPUTS_DIR.glob(f"{input_stem}*"))
+    if not all_files:
+        return None
+
+    # Filter out dual versions - prioritize mono
+    mono_files = [f for f in all_files if '.mono.pdf' in f.name]
+    non_dual = [f for f in all_files if '.dual.pdf' not in f.name]
+    potential_files = mono_files or non_dual or all_files
+
+    # Sort by modification time, newest first
+    potential_files.sort(key=lambda f: f.stat().st_mtime, reverse=True)
+    print(f"[Job {job_id}] Selected file: {potential_files[0].name}")
+    return potential_files[0]
+
+
+def handle_job_done(job_id: str, future):
+    """Record the outcome of a finished job and wake its event streams"""
+    job = job_store.active(job_id)
+    try:
+        record_job_result(job_id, future)
+    finally:
+        job_store.save(job_id)
+        broker.notify(job_id)
+        if job is not None:
+            sync_aliases(job, finished=True)
+        # The queue moved up: refresh queue_position for jobs still waiting
+        for other_id in job_store.active_ids("pending"):
+            broker.notify(other_id)
+
+
+def record_job_result(job_id: str, future):
+    """Record the outcome of a finished job"""
+    job = job_store.active(job_id)
+    if job is None:
+        return
+    job["queue_position"] = None
+    job["completed_at"] = datetime.now().isoformat()
+    try:
+        result = future.result()
     except Exception as e:
-        print(f"[Job {job_id}] Exception: {str(e)}")
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["error"] = str(e)
-        jobs[job_id]["message"] = f"Translation failed: {str(e)}"
+        error = str(e)
+        print(f"[Job {job_id}] Error: {error}")
+        job["status"] = "failed"
+        if "Cannot translate files that have already been translated" in error:
+            job["error"] = ALREADY_TRANSLATED_ERROR
+            job["message"] = "Error: File already translated"
+        else:
+            job["error"] = error
+            job["message"] = f"Translation failed: {error}"
+        return
+
+    translated_file = find_translated_file(job_id, job, result)
+    if translated_file is None:
+        job["status"] = "failed"
+        job["error"] = "Output file not found"
+        job["message"] = "Translation failed: output file not found"
+        return
+
+    job["status"] = "completed"
+    job["progress"] = 100
+    job["translated_file"] = translated_file.name
+    job["message"] = "Translation complete!"
+
+    print(f"[Job {job_id}] Completed: {translated_file.name}")
+
+
+# Each job parses/translates with this many processes/threads of its own
+JOB_POOL_MAX_WORKERS = int(os.environ.get("BABEL_JOB_POOL_MAX_WORKERS", "4"))
+MAX_CONCURRENT_JOBS = int(
+    os.environ.get("BABEL_MAX_CONCURRENT_JOBS")
+    or os.environ.get("BABEL_JOB_WORKERS")
+    or default_concurrency(JOB_POOL_MAX_WORKERS)
+)
+
+# Minimum seconds between two progress updates, both from BabelDOC and to each client
+REPORT_INTERVAL = float(os.environ.get("BABEL_REPORT_INTERVAL", "0.1"))
+
+engine = JobEngine(
+    max_workers=MAX_CONCURRENT_JOBS,
+    output_dir=OUTPUTS_DIR,
+    on_event=handle_job_event,
+    pool_max_workers=JOB_POOL_MAX_WORKERS,
+    report_interval=REPORT_INTERVAL,
+)
+
+broker = JobEventBroker(report_interval=REPORT_INTERVAL)
+
+scheduler = JobScheduler(
+    engine,
+    max_queue_size=int(os.environ.get("BABEL_MAX_QUEUED_JOBS", "50")),
+    max_concurrency=MAX_CONCURRENT_JOBS,
+    max_running_per_tenant=int(os.environ.get("BABEL_MAX_RUNNING_JOBS_PER_KEY", "1")),
+    max_queued_per_tenant=int(os.environ.get("BABEL_MAX_QUEUED_JOBS_PER_KEY", "10")),
+    on_done=handle_job_done,
+)
 
 # Mount dashboard static files at /dashboard to match frontend paths
 try:
@@ -326,18 +359,94 @@ async def redirect_upload():
     """Redirect /upload to upload page"""
     return RedirectResponse(url="/dashboard/upload-page/index.html", status_code=301)
 
+async def save_upload(file: UploadFile) -> tuple:
+    """Stream an upload to Inputs/<sha256>.pdf, hashing it on the way; returns (path, hash)"""
+    digest = hashlib.sha256()
+    fd, tmp_name = tempfile.mkstemp(dir=INPUTS_DIR, suffix=".part")
+    tmp_path = Path(tmp_name)
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                await asyncio.to_thread(buffer.write, chunk)
+        source_hash = digest.hexdigest()
+        file_path = INPUTS_DIR / f"{source_hash}.pdf"
+        if file_path.exists():
+            tmp_path.unlink()
+        else:
+            os.replace(tmp_path, file_path)
+        return file_path, source_hash
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
 @app.post("/api/translate")
 async def translate_document(
     file: UploadFile = File(...),
-    target_language: str = Form(...)
+    target_language: str = Form(...),
+    x_api_key: Optional[str] = Header(None)
 ):
     try:
-        # 1. Save uploaded file
-        file_path = INPUTS_DIR / file.filename
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # 2. Check API key
+        # Jobs are queued and rate limited per client API key. Reject before
+        # reading the upload, so that an overloaded server does not store it
+        tenant = tenant_id(x_api_key)
+        try:
+            scheduler.check_admission(tenant)
+        except AdmissionError as e:
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)},
+            )
+
+        # 1. Save uploaded file under its content hash
+        file_path, source_hash = await save_upload(file)
+        model = engine.options["model"]
+
+        # 2. Reuse an identical translation that is done or already running
+        existing = job_store.find_completed(source_hash, target_language, model)
+        if existing is not None and (OUTPUTS_DIR / existing["translated_file"]).exists():
+            job_id = str(uuid.uuid4())
+            now = datetime.now().isoformat()
+            job_store.create({
+                "job_id": job_id,
+                "status": "completed",
+                "progress": 100,
+                "original_filename": file.filename,
+                "target_language": target_language,
+                "source_hash": source_hash,
+                "model": model,
+                "translated_file": existing["translated_file"],
+                "error": None,
+                "message": "Translation complete!",
+                "created_at": now,
+                "completed_at": now,
+            })
+            job_store.save(job_id)
+            print(f"Upload {file.filename} reuses translation {existing['translated_file']}")
+            return {
+                "status": "success",
+                "job_id": job_id,
+                "message": "Translation complete!",
+                "queue_position": None,
+                "translated_file": existing["translated_file"]
+            }
+        # Whichever API key started it: a second job would write the same output files
+        running = [
+            job for job in job_store.find_active(source_hash, target_language, model)
+            if job["job_id"] not in alias_leaders
+        ]
+        if running:
+            job_id = create_alias(running[0], file.filename)
+            print(f"Upload {file.filename} follows running job {running[0]['job_id']} as {job_id}")
+            return {
+                "status": "success",
+                "job_id": job_id,
+                "message": "Identical translation already in progress",
+                "queue_position": queue_position(job_id)
+            }
+
+        # 3. Check API key
         openai_api_key = os.environ.get("OPENAI_API_KEY")
         if not openai_api_key:
             raise HTTPException(
@@ -345,38 +454,50 @@ async def translate_document(
                 detail="OPENAI_API_KEY environment variable is not set"
             )
         
-        # 3. Create job
+        # 4. Create job
         job_id = str(uuid.uuid4())
-        jobs[job_id] = {
+        job_store.create({
             "job_id": job_id,
             "status": "pending",
             "progress": 1,  # Start with 1% so progress bar shows immediately
             "original_filename": file.filename,
             "target_language": target_language,
+            "source_hash": source_hash,
+            "model": model,
             "translated_file": None,
             "error": None,
             "message": "Translation queued - starting...",
             "created_at": datetime.now().isoformat(),
-            "completed_at": None
-        }
+            "completed_at": None,
+            "queue_position": None
+        })
         
         print(f"Created job {job_id} for {file.filename} -> {target_language}")
         
-        # 4. Start background thread
-        thread = threading.Thread(
-            target=run_translation_job,
-            args=(job_id, file_path, target_language, openai_api_key)
-        )
-        thread.daemon = True
-        thread.start()
+        # 5. Queue the job; the scheduler hands it to a warm worker when a slot frees up
+        try:
+            scheduler.submit(job_id, tenant, file_path, target_language, openai_api_key)
+        except AdmissionError as e:
+            # The queue filled up while the file was uploading
+            job_store.delete(job_id)
+            if not job_store.input_in_use(source_hash):
+                file_path.unlink(missing_ok=True)
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)},
+            )
         
-        # 5. Return job ID immediately
+        # 6. Return job ID immediately
         return {
             "status": "success",
             "job_id": job_id,
-            "message": "Translation started"
+            "message": "Translation queued",
+            "queue_position": queue_position(job_id)
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error creating job: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -384,37 +505,83 @@ async def translate_document(
 @app.get("/api/job/{job_id}")
 async def get_job_status(job_id: str):
     """Get translation job status"""
-    if job_id not in jobs:
-        print(f"[API] Job {job_id} not found in jobs dict")
-        print(f"[API] Available jobs: {list(jobs.keys())[:5]}")
+    job = job_store.get(job_id)
+    if job is None:
+        print(f"[API] Job {job_id} not found")
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = jobs[job_id]
+    job["queue_position"] = queue_position(job_id) if job["status"] == "pending" else None
     print(f"[API] Returning job {job_id}: status={job.get('status')}, progress={job.get('progress')}%")
     return job
 
+@app.get("/api/job/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Push job progress as Server-Sent Events until the job completes or fails"""
+    if job_store.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    def snapshot():
+        job = job_store.get(job_id)
+        if job is None:
+            return None
+        job["queue_position"] = queue_position(job_id) if job["status"] == "pending" else None
+        return job_snapshot(job)
+
+    return StreamingResponse(
+        broker.stream(job_id, snapshot),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Stop nginx from buffering the stream
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+@app.get("/api/queue")
+async def get_queue_status():
+    """Current queue depth and concurrency limits"""
+    return scheduler.stats()
+
 @app.get("/api/translations")
-async def list_translations():
-    """List all translation jobs (for My Translations page)"""
-    # Return all jobs, sorted by creation time (newest first)
-    all_jobs = list(jobs.values())
-    all_jobs.sort(key=lambda j: j.get("created_at", ""), reverse=True)
-    return {"translations": all_jobs, "count": len(all_jobs)}
+async def list_translations(
+    status: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[str] = None
+):
+    """List translation jobs, newest first (for My Translations page)
+
+    Pages are fetched by passing the previous page's `next_before` as `before`.
+    """
+    page = job_store.list(status=status, limit=limit, before=before)
+    next_before = page[-1]["created_at"] if len(page) == limit else None
+    return {"translations": page, "count": len(page), "next_before": next_before}
+
+def client_filename(filename: str, job_id: Optional[str]) -> str:
+    """The name to offer for an output file: outputs are stored under the hash
+    of their source, so the hash is replaced by the stem of the job's upload"""
+    job = job_store.get(job_id) if job_id else None
+    if job is None or job.get("translated_file") != filename:
+        return filename
+    source_hash = job.get("source_hash")
+    if not source_hash or not filename.startswith(source_hash):
+        return filename
+    return Path(job["original_filename"]).stem + filename[len(source_hash):]
 
 @app.get("/api/download/{filename}")
-async def download_file(filename: str):
+async def download_file(filename: str, job_id: Optional[str] = None):
+    """Download an output file; pass `job_id` to get it under the uploaded file's name"""
     file_path = OUTPUTS_DIR / filename
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="File not found")
     
     return FileResponse(
         path=file_path,
-        filename=filename,
+        filename=client_filename(filename, job_id),
         media_type='application/octet-stream'
     )
 
 @app.get("/api/view/{filename}")
-async def view_file(filename: str):
+async def view_file(filename: str, job_id: Optional[str] = None):
     """Serve PDF for viewing in browser"""
     file_path = OUTPUTS_DIR / filename
     if not file_path.exists():
@@ -422,12 +589,25 @@ async def view_file(filename: str):
     
     return FileResponse(
         path=file_path,
+        filename=client_filename(filename, job_id),
         media_type='application/pdf',
-        headers={
-            'Content-Disposition': f'inline; filename="{filename}"'
-        }
+        content_disposition_type='inline'
     )
 
+async def purge_expired_jobs_periodically(interval: float = 3600):
+    """Apply the job retention policy now and then every `interval` seconds"""
+    if JOB_RETENTION_DAYS <= 0:
+        return
+    while True:
+        expired = job_store.purge_expired(timedelta(days=JOB_RETENTION_DAYS))
+        for job in expired:
+            # Deduplicated jobs share output files
+            if job["translated_file"] and not job_store.output_in_use(job["translated_file"]):
+                (OUTPUTS_DIR / job["translated_file"]).unlink(missing_ok=True)
+        if expired:
+            print(f"[Jobs] Removed {len(expired)} job(s) older than {JOB_RETENTION_DAYS:g} days")
+        await asyncio.sleep(interval)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
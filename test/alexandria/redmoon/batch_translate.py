@@ -36,13 +36,15 @@ LANGUAGES = [
     ("id", "Indonesian") # Added Indonesian to reach 22
 ]
 
-def run_translation(lang_code, lang_name):
-    print(f"\n--- Starting translation for {lang_name} ({lang_code}) ---")
+def run_translation(languages):
+    names = ", ".join(lang_name for _, lang_name in languages)
+    print(f"\n--- Starting translation for {names} ---")
     
+    # One babeldoc run parses the PDF once and translates it into every language
     cmd = [
         "uv", "run", "babeldoc",
         "--files", str(INPUT_FILE.absolute()),
-        "--lang-out", lang_code,
+        "--lang-out", ",".join(lang_code for lang_code, _ in languages),
         "--openai",
         "--openai-model", "gpt-4o",
         "--openai-api-key", API_KEY,
@@ -51,26 +53,29 @@ def run_translation(lang_code, lang_name):
     ]
     
     try:
-        # Using subprocess.run to wait for each translation to finish
-        result = subprocess.run(
+        subprocess.run(
             cmd,
             cwd=str(BABELDOC_DIR),
             capture_output=True,
             text=True,
             check=True
         )
-        print(f"Successfully translated to {lang_name}")
-        # print(result.stdout)
     except subprocess.CalledProcessError as e:
-        print(f"Error translating to {lang_name}: {e}")
+        print(f"Error translating: {e}")
         print(f"Stderr: {e.stderr}")
+    
+    for lang_code, lang_name in languages:
+        output = OUTPUT_DIR / f"{INPUT_FILE.stem}.{lang_code}.mono.pdf"
+        if output.exists():
+            print(f"Successfully translated to {lang_name}")
+        else:
+            print(f"Error translating to {lang_name}: no output")
 
 def main():
     if not OUTPUT_DIR.exists():
         OUTPUT_DIR.mkdir(parents=True)
     
-    for lang_code, lang_name in LANGUAGES:
-        run_translation(lang_code, lang_name)
+    run_translation(LANGUAGES)
 
 if __name__ == "__main__":
     main()
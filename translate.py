@@ -19,8 +19,6 @@ import sys
 import time
 from datetime import datetime
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
-import threading
 
 # Fix Windows console encoding for emoji/unicode
 if sys.platform == "win32":
@@ -153,15 +151,20 @@ def apply_watermark(pdf_path: Path) -> Path:
         return pdf_path
 
 
-def translate_file(input_file: Path, lang_code: str, output_dir: Path, api_key: str, watermark: bool = True, model: str = "gpt-4o-mini", **kwargs) -> bool:
-    """Translate a single file to the specified language."""
-    lang_name = ALL_LANGUAGES.get(lang_code, lang_code)
-    print(f"\n📄 Translating to {lang_name} ({lang_code})...")
+def translate_file(input_file: Path, lang_codes: list, output_dir: Path, api_key: str, watermark: bool = True, model: str = "gpt-4o-mini", **kwargs) -> dict:
+    """Translate a file to all the given languages with a single babeldoc run.
+
+    BabelDOC parses the PDF once and translates the shared result into every
+    language. Returns a dict mapping each language code to whether its output
+    was produced.
+    """
+    lang_names = ", ".join(ALL_LANGUAGES.get(lc, lc) for lc in lang_codes)
+    print(f"\n📄 Translating to {lang_names}...")
     
     cmd = [
         "uv", "run", "babeldoc",
         "--files", str(input_file.absolute()),
-        "--lang-out", lang_code,
+        "--lang-out", ",".join(lang_codes),
         "--openai",
         "--openai-model", model,
         "--openai-api-key", api_key,
@@ -206,26 +209,29 @@ def translate_file(input_file: Path, lang_code: str, output_dir: Path, api_key:
         
         return_code = process.poll()
         
-        if return_code == 0:
-            print(f"  ✅ Translation complete: {lang_name}")
-            
-            # Find and optionally watermark the output
-            if watermark:
-                mono_pattern = f"{input_file.stem}.{lang_code}.mono.pdf"
-                mono_file = output_dir / mono_pattern
-                if mono_file.exists():
-                    apply_watermark(mono_file)
-            
-            return True
-        else:
+        if return_code != 0:
             stderr = process.stderr.read()
-            print(f"  ❌ Translation failed: {lang_name}")
+            print(f"  ❌ Translation failed: {lang_names}")
             print(f"  Error: {stderr[:500]}")
-            return False
+            return {lc: False for lc in lang_codes}
+        
+        results = {}
+        for lang_code in lang_codes:
+            lang_name = ALL_LANGUAGES.get(lang_code, lang_code)
+            mono_file = output_dir / f"{input_file.stem}.{lang_code}.mono.pdf"
+            results[lang_code] = mono_file.exists()
+            if not results[lang_code]:
+                print(f"  ❌ Translation failed: {lang_name}")
+                continue
+            print(f"  ✅ Translation complete: {lang_name}")
+            # Optionally watermark the output
+            if watermark:
+                apply_watermark(mono_file)
+        return results
             
     except Exception as e:
         print(f"  ❌ Exception: {e}")
-        return False
+        return {lc: False for lc in lang_codes}
 
 
 def main():
@@ -316,26 +322,19 @@ Examples:
     
     print(f"\n🚀 Starting translation of {len(languages)} languages...")
     
-    # We use ThreadPoolExecutor to run multiple 'babeldoc' processes in parallel.
-    # Each process handles one language.
-    max_parallel_languages = min(len(languages), 4) # Don't overwhelm the system
-    
-    def run_translation(lc):
-        res = translate_file(
-            input_file, lc, output_dir, api_key, 
-            watermark=not args.no_watermark, 
-            model=args.model, 
-            pool_max_workers=args.workers,
-            qps=args.qps or args.workers,
-            fast=args.fast,
-            primary_font_family=args.font_family
-        )
-        return lc, res
-
-    with ThreadPoolExecutor(max_workers=max_parallel_languages) as executor:
-        results = list(executor.map(run_translation, languages))
+    # One babeldoc process parses the PDF once and translates it into every
+    # language, sharing a single rate limiter across all of them.
+    results = translate_file(
+        input_file, languages, output_dir, api_key,
+        watermark=not args.no_watermark,
+        model=args.model,
+        pool_max_workers=args.workers,
+        qps=args.qps or args.workers,
+        fast=args.fast,
+        primary_font_family=args.font_family
+    )
     
-    for lang_code, res in results:
+    for lang_code, res in results.items():
         if res:
             successful.append(lang_code)
         else: